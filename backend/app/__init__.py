@@ -1,14 +1,15 @@
 import os
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_socketio import SocketIO
 from app.config import config
+from app.utils.db_engines import RoutingSession, init_pool_monitoring
 
 # Inicialización de extensiones
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # Lecturas de reportes al bind 'reports'
 migrate = Migrate()
 jwt = JWTManager()
 socketio = SocketIO()  # US-INV-001 CA-3: WebSocket para actualizaciones en tiempo real
@@ -32,6 +33,8 @@ def create_app(config_name=None):
 
     # Inicializar extensiones con la app
     db.init_app(app)
+    with app.app_context():
+        init_pool_monitoring(app, db.engines)
     migrate.init_app(app, db)
     jwt.init_app(app)
     CORS(app, origins=app.config['CORS_ORIGIN'])
@@ -45,6 +48,18 @@ def create_app(config_name=None):
         engineio_logger=False
     )
 
+    # Conteo y tiempo de SQL por request (Server-Timing + log 'sql')
+    from app.utils.query_instrumentation import init_query_instrumentation
+    init_query_instrumentation(app)
+
+    # Métricas en proceso en formato Prometheus (GET /metrics)
+    from app.utils.metrics import init_metrics
+    init_metrics(app)
+
+    # Comandos CLI (flask rollups backfill)
+    from app.cli import register_commands
+    register_commands(app)
+
     # Registrar blueprints
     from app.routes.auth import auth_bp
     from app.routes.categories import categories_bp
@@ -98,9 +113,12 @@ def create_app(config_name=None):
     def uploaded_file(filename):
         """
         Servir archivos subidos (imágenes de productos, etc.)
-        Ejemplo: /uploads/products/10_2f39200a.png
+        Ejemplo: /uploads/products/10_2f39200a5c1d7e44.png
+
+        Archivos con hash de contenido se sirven como inmutables; soporta
+        ETag, 304, Range y delegación a nginx/Apache (UPLOADS_SENDFILE_MODE)
         """
-        upload_folder = app.config['UPLOAD_FOLDER']
-        return send_from_directory(upload_folder, filename)
+        from app.utils.static_files import serve_upload
+        return serve_upload(filename)
 
     return app
@@ -0,0 +1,72 @@
+"""
+Comandos de línea de comandos (flask <grupo> <comando>)
+
+    flask rollups backfill [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--force]
+    flask movements ensure-partitions [--months-ahead N] [--since YYYY-MM-DD]
+    flask movements archive [--before YYYY-MM-DD] [--dir RUTA] [--format parquet|csv]
+"""
+import click
+from flask.cli import AppGroup
+from app import db
+
+rollups_cli = AppGroup('rollups', help='Agregados diarios de movimientos de inventario')
+movements_cli = AppGroup('movements', help='Particiones y archivo de inventory_movements')
+
+
+@rollups_cli.command('backfill')
+@click.option('--from', 'day_from', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Primer día a reconstruir (por defecto, desde el movimiento más antiguo)')
+@click.option('--to', 'day_to', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Último día a reconstruir, inclusive (por defecto, hasta hoy)')
+@click.option('--force', is_flag=True, default=False,
+              help='Reconstruir también los días anteriores al movimiento más antiguo (borra el rollup de meses archivados)')
+def backfill_rollups(day_from, day_to, force):
+    """Reconstruir movement_daily_rollup desde inventory_movements"""
+    from app.services.movement_rollup_service import MovementRollupService
+
+    rows = MovementRollupService.backfill(
+        day_from.date() if day_from else None,
+        day_to.date() if day_to else None,
+        force=force
+    )
+    db.session.commit()
+    click.echo(f'movement_daily_rollup: {rows} filas reconstruidas')
+
+
+@movements_cli.command('ensure-partitions')
+@click.option('--months-ahead', type=int, default=3, show_default=True,
+              help='Meses futuros con partición creada de antemano')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Cubrir también los meses desde esta fecha (cargas históricas)')
+def ensure_movement_partitions(months_ahead, since):
+    """Crear las particiones mensuales próximas (solo PostgreSQL)"""
+    from app.services.movement_archive_service import MovementArchiveService
+
+    created = MovementArchiveService.ensure_partitions(months_ahead, since.date() if since else None)
+    click.echo(f'inventory_movements: {len(created)} particiones creadas')
+    for name in created:
+        click.echo(f'  {name}')
+
+
+@movements_cli.command('archive')
+@click.option('--before', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Primer mes que se conserva (por defecto, hoy menos MOVEMENTS_RETENTION_MONTHS)')
+@click.option('--dir', 'directory', type=click.Path(file_okay=False), default=None,
+              help='Carpeta destino (por defecto MOVEMENTS_ARCHIVE_DIR)')
+@click.option('--format', 'archive_format', type=click.Choice(['parquet', 'csv']), default=None,
+              help='Formato del archivo (por defecto MOVEMENTS_ARCHIVE_FORMAT)')
+def archive_movements(before, directory, archive_format):
+    """Exportar a disco y eliminar los meses de movimientos fuera de la retención"""
+    from app.services.movement_archive_service import MovementArchiveService
+
+    archived = MovementArchiveService.archive(
+        before.date() if before else None, directory, archive_format
+    )
+    click.echo(f'inventory_movements: {len(archived)} meses archivados')
+    for month in archived:
+        click.echo(f"  {month['month']}: {month['rows']} filas -> {month['file']}")
+
+
+def register_commands(app):
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(movements_cli)
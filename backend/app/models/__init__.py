@@ -4,6 +4,7 @@ from app.models.password_reset_token import PasswordResetToken
 from app.models.category import Category
 from app.models.product import Product
 from app.models.inventory_movement import InventoryMovement
+from app.models.movement_daily_rollup import MovementDailyRollup
 from app.models.product_deletion_audit import ProductDeletionAudit
 from app.models.inventory_alert import InventoryAlert
 from app.models.inventory_value_history import InventoryValueHistory
@@ -12,10 +13,11 @@ from app.models.customer_deletion_audit import CustomerDeletionAudit
 from app.models.customer_note import CustomerNote
 from app.models.customer_segmentation_config import CustomerSegmentationConfig
 from app.models.customer_category_history import CustomerCategoryHistory
+from app.models.customer_stats import CustomerStats
 from app.models.order import Order, OrderItem, OrderStatusHistory
 from app.models.order_edit_audit import OrderEditAudit
 from app.models.payment import Payment
 from app.models.return_order import Return, ReturnItem
 from app.models.supplier import Supplier
 
-__all__ = ['User', 'LoginAttempt', 'PasswordResetToken', 'Category', 'Product', 'InventoryMovement', 'ProductDeletionAudit', 'InventoryAlert', 'InventoryValueHistory', 'Customer', 'CustomerDeletionAudit', 'CustomerNote', 'CustomerSegmentationConfig', 'CustomerCategoryHistory', 'Order', 'OrderItem', 'OrderStatusHistory', 'OrderEditAudit', 'Payment', 'Return', 'ReturnItem', 'Supplier']
+__all__ = ['User', 'LoginAttempt', 'PasswordResetToken', 'Category', 'Product', 'InventoryMovement', 'MovementDailyRollup', 'ProductDeletionAudit', 'InventoryAlert', 'InventoryValueHistory', 'Customer', 'CustomerDeletionAudit', 'CustomerNote', 'CustomerSegmentationConfig', 'CustomerCategoryHistory', 'CustomerStats', 'Order', 'OrderItem', 'OrderStatusHistory', 'OrderEditAudit', 'Payment', 'Return', 'ReturnItem', 'Supplier']
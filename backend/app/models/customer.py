@@ -3,6 +3,8 @@ Modelo de Cliente - Facturación Electrónica Colombia (DIAN)
 US-CUST-001: Registrar Nuevo Cliente
 """
 from app import db
+from app.utils.search import normalize_text, digits_only
+from sqlalchemy import event
 from datetime import datetime
 import uuid
 
@@ -11,6 +13,13 @@ class Customer(db.Model):
     """Modelo de Cliente adaptado para facturación electrónica colombiana"""
 
     __tablename__ = 'customers'
+    __table_args__ = (
+        # US-CUST-001 CA-5: unicidad del correo sin distinguir mayúsculas;
+        # también sirve las búsquedas por lower(correo)
+        db.Index('ux_customers_correo_lower', db.func.lower(db.text('correo')), unique=True),
+        # Sincronización incremental del filtro de unicidad (clientes modificados recientemente)
+        db.Index('ix_customers_updated_at', 'updated_at'),
+    )
 
     # Primary Key
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -38,6 +47,10 @@ class Customer(db.Model):
     # Información adicional
     notes = db.Column(db.Text, nullable=True)
 
+    # Búsqueda (US-CUST-002): nombre y correo normalizados + documento/teléfono solo dígitos.
+    # Se recalcula en cada insert/update; indexado con pg_trgm en PostgreSQL
+    search_text = db.Column(db.Text, nullable=True)
+
     # Segmentación (US-CUST-011 CA-1)
     customer_category = db.Column(db.String(20), nullable=False, default='Regular', index=True)
 
@@ -56,6 +69,19 @@ class Customer(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # US-CUST-008: Usuarios de auditoría (sin FK en BD; solo lectura).
+    # Permiten cargar sus nombres con joinedload/selectinload en vez de una query por fila
+    inactivated_by_user = db.relationship(
+        'User',
+        primaryjoin='foreign(Customer.inactivated_by) == User.id',
+        viewonly=True
+    )
+    reactivated_by_user = db.relationship(
+        'User',
+        primaryjoin='foreign(Customer.reactivated_by) == User.id',
+        viewonly=True
+    )
+
     # US-CUST-009: Notas del Cliente
     customer_notes = db.relationship(
         'CustomerNote',
@@ -67,28 +93,33 @@ class Customer(db.Model):
     def __repr__(self):
         return f'<Customer {self.nombre_razon_social} ({self.numero_documento})>'
 
-    def to_dict(self):
-        """Convertir cliente a diccionario"""
-        # Resolver nombre del usuario que inactivó
-        inactivated_by_name = None
-        if self.inactivated_by:
-            try:
-                from app.models.user import User
-                user = User.query.get(self.inactivated_by)
-                inactivated_by_name = user.full_name if user else None
-            except Exception:
-                pass
-
-        reactivated_by_name = None
-        if self.reactivated_by:
-            try:
-                from app.models.user import User
-                user = User.query.get(self.reactivated_by)
-                reactivated_by_name = user.full_name if user else None
-            except Exception:
-                pass
+    def build_search_text(self):
+        """
+        Construir el texto indexado para búsqueda
 
-        return {
+        Returns:
+            str: 'nombre correo documento telefono' normalizados
+        """
+        parts = [
+            normalize_text(self.nombre_razon_social),
+            normalize_text(self.correo),
+            normalize_text(self.numero_documento),
+            digits_only(self.numero_documento),  # '900.123.456-7' -> '9001234567'
+            digits_only(self.telefono_movil),
+        ]
+        return ' '.join(dict.fromkeys(part for part in parts if part))
+
+    def to_dict(self, include_audit=True):
+        """
+        Convertir cliente a diccionario
+
+        Args:
+            include_audit: Incluir los campos de inactivación/reactivación
+                (US-CUST-008). El listado los omite salvo que se pidan.
+        """
+        stats = self.stats
+
+        data = {
             'id': self.id,
             'tipo_documento': self.tipo_documento,
             'numero_documento': self.numero_documento,
@@ -104,21 +135,34 @@ class Customer(db.Model):
             'correo': self.correo,
             'notes': self.notes,
             'is_active': self.is_active,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            # Acumulados de compra precalculados (customer_stats)
+            'total_purchases': float(stats.total_spent or 0) if stats else 0.0,
+            'last_purchase_date': stats.last_order_at.isoformat() if stats and stats.last_order_at else None,
+            'order_count': stats.order_count if stats else 0,
+            'customer_category': self.customer_category,
+        }
+
+        if include_audit:
+            data.update(self.audit_dict())
+
+        return data
+
+    def audit_dict(self):
+        """Campos de inactivación/reactivación con el nombre de cada usuario (US-CUST-008)"""
+        inactivated_by_user = self.inactivated_by_user if self.inactivated_by else None
+        reactivated_by_user = self.reactivated_by_user if self.reactivated_by else None
+
+        return {
             'inactivated_at': self.inactivated_at.isoformat() if self.inactivated_at else None,
             'inactivated_by': self.inactivated_by,
-            'inactivated_by_name': inactivated_by_name,
+            'inactivated_by_name': inactivated_by_user.full_name if inactivated_by_user else None,
             'inactivation_reason': self.inactivation_reason,
             'reactivated_at': self.reactivated_at.isoformat() if self.reactivated_at else None,
             'reactivated_by': self.reactivated_by,
-            'reactivated_by_name': reactivated_by_name,
+            'reactivated_by_name': reactivated_by_user.full_name if reactivated_by_user else None,
             'reactivation_reason': self.reactivation_reason,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            # Placeholder purchase fields (computed from Orders; overridden in get_customer endpoint)
-            'total_purchases': 0.0,
-            'last_purchase_date': None,
-            'order_count': 0,
-            'customer_category': self.customer_category,
         }
 
     @staticmethod
@@ -154,3 +198,34 @@ class Customer(db.Model):
         if exclude_id:
             query = query.filter(Customer.id != exclude_id)
         return query.first() is None
+
+
+@event.listens_for(Customer, 'before_insert')
+@event.listens_for(Customer, 'before_update')
+def _refresh_customer_search_text(mapper, connection, target):
+    """Mantener search_text sincronizado con los campos buscables"""
+    target.search_text = target.build_search_text()
+
+
+@event.listens_for(Customer, 'after_insert')
+def _create_customer_stats(mapper, connection, target):
+    """Crear la fila de acumulados en cero (la actualizan los pedidos por delta)"""
+    from app.models.customer_stats import CustomerStats
+
+    connection.execute(
+        CustomerStats.__table__.insert().values(
+            customer_id=target.id,
+            total_spent=0,
+            order_count=0,
+            updated_at=datetime.utcnow()
+        )
+    )
+
+
+@event.listens_for(Customer, 'after_insert')
+@event.listens_for(Customer, 'after_update')
+def _register_customer_uniqueness(mapper, connection, target):
+    """Mantener al día el filtro de sondeo de documento/correo de este proceso"""
+    from app.services.customer_uniqueness_service import CustomerUniquenessService
+
+    CustomerUniquenessService.register(target.numero_documento, target.correo)
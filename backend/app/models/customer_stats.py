@@ -0,0 +1,47 @@
+"""
+CustomerStats - Acumulados de compra por cliente
+US-CUST-011 (segmentación) y US-CUST-002 (listado de clientes)
+
+Una fila por cliente con el gasto acumulado, número de pedidos y fechas de
+primera/última compra. Se actualiza por delta desde OrderService y
+ReturnService (ver CustomerStatsService), de modo que listados, exportación
+y segmentación no re-agregan la tabla de pedidos.
+
+Reglas:
+    - total_spent: suma de pedidos no cancelados menos devoluciones aprobadas
+    - order_count: pedidos no cancelados
+    - first_order_at / last_order_at: fechas de pedidos no cancelados
+"""
+from app import db
+from datetime import datetime
+
+
+class CustomerStats(db.Model):
+    """Acumulados de compra de un cliente (1:1 con customers)"""
+    __tablename__ = 'customer_stats'
+
+    customer_id = db.Column(
+        db.String(36),
+        db.ForeignKey('customers.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+
+    total_spent = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    first_order_at = db.Column(db.DateTime, nullable=True)
+    last_order_at = db.Column(db.DateTime, nullable=True)
+
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    customer = db.relationship(
+        'Customer',
+        backref=db.backref('stats', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+    )
+
+    def to_dict(self):
+        return {
+            'total_spent': float(self.total_spent or 0),
+            'order_count': self.order_count or 0,
+            'first_order_at': self.first_order_at.isoformat() if self.first_order_at else None,
+            'last_order_at': self.last_order_at.isoformat() if self.last_order_at else None,
+        }
@@ -12,12 +12,26 @@ class InventoryAlert(db.Model):
     Modelo para gestionar alertas de inventario
 
     Tipos de alertas:
-    - reorder_point: Stock alcanzó el punto de reorden
+    - reorder_point: Stock alcanzó el punto de reorden (0 < stock <= reorder_point)
     - critical_stock: Stock crítico (implementación futura)
-    - out_of_stock: Sin stock (implementación futura)
+    - out_of_stock: Sin stock (US-INV-007)
+
+    Las alertas reorder_point y out_of_stock las crea y resuelve
+    CriticalStockAlertService.evaluate_stock_alerts en la transacción que
+    modifica el stock.
     """
 
     __tablename__ = 'inventory_alerts'
+    __table_args__ = (
+        # US-INV-007: a lo sumo una alerta activa por producto y tipo
+        db.Index(
+            'ux_inventory_alerts_active',
+            'product_id', 'alert_type',
+            unique=True,
+            postgresql_where=db.text('is_active'),
+            sqlite_where=db.text('is_active')
+        ),
+    )
 
     # Primary Key
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
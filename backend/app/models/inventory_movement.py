@@ -1,11 +1,21 @@
 """
 Modelo de Movimiento de Inventario
 Registra todos los cambios en el stock de productos
+
+En PostgreSQL la tabla está particionada por mes sobre created_at (clave
+primaria (id, created_at)); los meses fuera de la retención se archivan con
+MovementArchiveService.
 """
 from app import db
+from app.utils.metrics import STOCK_MUTATIONS
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 from datetime import datetime
 import uuid
 
+# Tipos de movimiento insertados en la transacción en curso (se cuentan al confirmar)
+_PENDING_MUTATIONS = 'pending_stock_mutations'
+
 
 class InventoryMovement(db.Model):
     """
@@ -20,6 +30,24 @@ class InventoryMovement(db.Model):
     """
 
     __tablename__ = 'inventory_movements'
+    __table_args__ = (
+        # US-INV-007 CA-4: último movimiento que dejó cada producto en stock 0
+        db.Index(
+            'ix_inventory_movements_zero_stock',
+            'product_id', 'created_at',
+            postgresql_where=db.text('new_stock = 0'),
+            sqlite_where=db.text('new_stock = 0')
+        ),
+        # US-INV-003 CA-4: historial y evolución de stock por producto
+        db.Index('ix_inventory_movements_product_created', 'product_id', 'created_at'),
+        # US-INV-008 CA-8: movimientos vinculados a un pedido
+        db.Index(
+            'ix_inventory_movements_related_order',
+            'related_order_id',
+            postgresql_where=db.text('related_order_id IS NOT NULL'),
+            sqlite_where=db.text('related_order_id IS NOT NULL')
+        ),
+    )
 
     # Primary Key
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -126,3 +154,22 @@ class InventoryMovement(db.Model):
             notes=notes
         )
         return movement
+
+
+@event.listens_for(InventoryMovement, 'after_insert')
+def _track_stock_mutation(mapper, connection, target):
+    """Métrica de movimientos de stock: se anota aquí y se cuenta al confirmar"""
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_MUTATIONS, []).append(target.movement_type)
+
+
+@event.listens_for(Session, 'after_commit')
+def _count_stock_mutations(session):
+    for movement_type in session.info.pop(_PENDING_MUTATIONS, []):
+        STOCK_MUTATIONS.inc(movement_type=movement_type)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_stock_mutations(session):
+    session.info.pop(_PENDING_MUTATIONS, None)
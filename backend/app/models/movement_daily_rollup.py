@@ -0,0 +1,99 @@
+"""
+MovementDailyRollup - Movimientos de inventario agregados por día
+US-INV-002 (estadísticas de movimientos), US-INV-004 (demanda para punto de
+reorden) y US-INV-010 (dashboard)
+
+Una fila por producto, día y tipo de movimiento con el número de movimientos
+y las unidades que entraron y salieron. Se mantiene al insertar movimientos
+(listener after_flush, un upsert por flush) y se reconstruye con
+`flask rollups backfill` (MovementRollupService.backfill) para movimientos
+cargados fuera del ORM. Las consultas por rango de fechas leen días × productos
+en lugar de cada movimiento.
+"""
+from collections import defaultdict
+from sqlalchemy import event, update, insert
+from sqlalchemy.orm import Session
+from app import db
+from app.models.inventory_movement import InventoryMovement
+from app.utils.sql import upsert_insert
+
+
+class MovementDailyRollup(db.Model):
+    """Agregado diario de movimientos por producto y tipo"""
+    __tablename__ = 'movement_daily_rollup'
+    __table_args__ = (
+        # Rangos de fechas sin producto (estadísticas y dashboard)
+        db.Index('ix_movement_daily_rollup_day', 'day'),
+    )
+
+    product_id = db.Column(
+        db.String(36),
+        db.ForeignKey('products.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    day = db.Column(db.Date, primary_key=True)
+    movement_type = db.Column(db.String(50), primary_key=True)
+
+    count = db.Column(db.Integer, nullable=False, default=0)
+    qty_in = db.Column(db.Integer, nullable=False, default=0)    # Suma de cantidades positivas
+    qty_out = db.Column(db.Integer, nullable=False, default=0)   # Suma de |cantidades negativas|
+
+    def __repr__(self):
+        return f'<MovementDailyRollup {self.product_id} {self.day} {self.movement_type}>'
+
+
+def _rollup_deltas(movements):
+    """Agrupar movimientos nuevos por (producto, día, tipo)"""
+    deltas = defaultdict(lambda: {'count': 0, 'qty_in': 0, 'qty_out': 0})
+    for movement in movements:
+        delta = deltas[(movement.product_id, movement.created_at.date(), movement.movement_type)]
+        delta['count'] += 1
+        if movement.quantity > 0:
+            delta['qty_in'] += movement.quantity
+        else:
+            delta['qty_out'] -= movement.quantity
+    return [
+        {'product_id': product_id, 'day': day, 'movement_type': movement_type, **delta}
+        for (product_id, day, movement_type), delta in deltas.items()
+    ]
+
+
+def apply_rollup_deltas(connection, rows):
+    """Sumar deltas a las filas del rollup (creándolas si no existen)"""
+    table = MovementDailyRollup.__table__
+    statement, supports_on_conflict = upsert_insert(table, bind=connection)
+
+    if supports_on_conflict:
+        statement = statement.on_conflict_do_update(
+            index_elements=['product_id', 'day', 'movement_type'],
+            set_={
+                'count': table.c.count + statement.excluded.count,
+                'qty_in': table.c.qty_in + statement.excluded.qty_in,
+                'qty_out': table.c.qty_out + statement.excluded.qty_out,
+            }
+        )
+        connection.execute(statement, rows)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            update(table).where(
+                table.c.product_id == row['product_id'],
+                table.c.day == row['day'],
+                table.c.movement_type == row['movement_type']
+            ).values(
+                count=table.c.count + row['count'],
+                qty_in=table.c.qty_in + row['qty_in'],
+                qty_out=table.c.qty_out + row['qty_out']
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table), row)
+
+
+@event.listens_for(Session, 'after_flush')
+def _roll_up_new_movements(session, flush_context):
+    """Los movimientos insertados en este flush suman a su día en la misma transacción"""
+    movements = [obj for obj in session.new if isinstance(obj, InventoryMovement)]
+    if movements:
+        apply_rollup_deltas(session.connection(), _rollup_deltas(movements))
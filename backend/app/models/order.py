@@ -54,6 +54,15 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Pedidos por cliente ordenados por fecha (historial, primera/última compra)
+        db.Index('ix_orders_customer_created', 'customer_id', 'created_at'),
+        # Listado filtrado por estado y ordenado por fecha, conteo por estado
+        db.Index('ix_orders_status_created', 'status', 'created_at'),
+        # Listado por defecto, rangos de fecha y ventana de analítica
+        db.Index('ix_orders_created_at', 'created_at'),
+    )
+
     # Relaciones
     customer = db.relationship('Customer', backref=db.backref('orders', lazy='dynamic'))
     created_by = db.relationship('User', foreign_keys=[created_by_id])
@@ -150,12 +159,16 @@ class OrderItem(db.Model):
     """Modelo de Item de Pedido"""
 
     __tablename__ = 'order_items'
+    __table_args__ = (
+        # Ventas por producto (analítica de inventario, historial de clientes)
+        db.Index('ix_order_items_product_order', 'product_id', 'order_id'),
+    )
 
     # Primary Key
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
 
     # Foreign Keys
-    order_id = db.Column(db.String(36), db.ForeignKey('orders.id', ondelete='CASCADE'), nullable=False)
+    order_id = db.Column(db.String(36), db.ForeignKey('orders.id', ondelete='CASCADE'), nullable=False, index=True)
     product_id = db.Column(db.String(36), db.ForeignKey('products.id'), nullable=False)
 
     # Datos del item
@@ -11,6 +11,10 @@ class Payment(db.Model):
     """Modelo de Pago asociado a un pedido"""
 
     __tablename__ = 'payments'
+    __table_args__ = (
+        # Pagos activos de un pedido (filter_by(is_deleted=False))
+        db.Index('ix_payments_order_deleted', 'order_id', 'is_deleted'),
+    )
 
     # Primary Key
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -20,7 +24,6 @@ class Payment(db.Model):
         db.String(36),
         db.ForeignKey('orders.id', ondelete='CASCADE'),
         nullable=False,
-        index=True,
     )
     created_by_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True)
 
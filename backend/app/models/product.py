@@ -11,6 +11,15 @@ class Product(db.Model):
     """Modelo de Producto"""
 
     __tablename__ = 'products'
+    __table_args__ = (
+        # Listado de productos activos no eliminados por categoría y nombre
+        db.Index(
+            'ix_products_listed_category_name',
+            'category_id', 'name',
+            postgresql_where=db.text('is_active AND deleted_at IS NULL'),
+            sqlite_where=db.text('is_active AND deleted_at IS NULL')
+        ),
+    )
 
     # Primary Key
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
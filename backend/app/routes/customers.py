@@ -5,7 +5,7 @@ US-CUST-002: Listar Clientes
 US-CUST-006: Eliminar Cliente
 US-CUST-007: Historial de Compras del Cliente
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app import db
 from app.models.customer import Customer
@@ -20,14 +20,22 @@ from app.schemas.customer_note_schema import (
     customer_note_create_schema,
     customer_note_update_schema
 )
+from app.services.customer_search_service import CustomerSearchService
+from app.services.customer_uniqueness_service import CustomerUniquenessService
 from app.utils.decorators import require_role
+from app.utils.db_engines import use_reporting_engine
+from app.utils.metrics import timed_export
 from marshmallow import ValidationError
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func, case, extract
+from sqlalchemy import func, case, select
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime
 
 ALLOWED_SORT_FIELDS = ['nombre_razon_social', 'correo', 'numero_documento', 'municipio_ciudad', 'created_at']
 
+# US-CUST-011: Nombre del trabajo en segundo plano de recálculo de categorías
+SEGMENTATION_RECALCULATE_JOB = 'segmentation_recalculate'
+
 customers_bp = Blueprint('customers', __name__, url_prefix='/api/customers')
 
 
@@ -160,23 +168,27 @@ def check_documento():
                 }
             }), 400
 
-        is_available = Customer.validate_numero_documento_unique(numero_documento, exclude_id=exclude_id)
+        # Filtro de Bloom: la mayoría de sondeos responde sin consultar la base de datos
+        existing = None
+        if CustomerUniquenessService.might_exist_documento(numero_documento):
+            query = Customer.query.filter(Customer.numero_documento == numero_documento)
+            if exclude_id:
+                query = query.filter(Customer.id != exclude_id)
+            existing = query.first()
 
         result = {
             'success': True,
             'data': {
                 'numero_documento': numero_documento,
-                'available': is_available
+                'available': existing is None
             }
         }
 
-        if not is_available:
-            existing = Customer.query.filter(Customer.numero_documento == numero_documento).first()
-            if existing:
-                result['data']['existing_customer'] = {
-                    'id': existing.id,
-                    'nombre_razon_social': existing.nombre_razon_social
-                }
+        if existing:
+            result['data']['existing_customer'] = {
+                'id': existing.id,
+                'nombre_razon_social': existing.nombre_razon_social
+            }
 
         return jsonify(result), 200
 
@@ -215,23 +227,27 @@ def check_correo():
                 }
             }), 400
 
-        is_available = Customer.validate_correo_unique(correo, exclude_id=exclude_id)
+        # Filtro de Bloom; si puede existir, una consulta por el índice lower(correo)
+        existing = None
+        if CustomerUniquenessService.might_exist_correo(correo):
+            query = Customer.query.filter(db.func.lower(Customer.correo) == correo.lower())
+            if exclude_id:
+                query = query.filter(Customer.id != exclude_id)
+            existing = query.first()
 
         result = {
             'success': True,
             'data': {
                 'correo': correo,
-                'available': is_available
+                'available': existing is None
             }
         }
 
-        if not is_available:
-            existing = Customer.query.filter(db.func.lower(Customer.correo) == correo.lower()).first()
-            if existing:
-                result['data']['existing_customer'] = {
-                    'id': existing.id,
-                    'nombre_razon_social': existing.nombre_razon_social
-                }
+        if existing:
+            result['data']['existing_customer'] = {
+                'id': existing.id,
+                'nombre_razon_social': existing.nombre_razon_social
+            }
 
         return jsonify(result), 200
 
@@ -261,6 +277,7 @@ def get_customers():
         - is_active: Filtrar por estado (true/false)
         - sort_by: Campo para ordenar (default: nombre_razon_social)
         - order: Orden (asc, desc) default: asc
+        - include_audit: Incluir campos de inactivación/reactivación (default: false)
     """
     try:
         page = request.args.get('page', 1, type=int)
@@ -270,6 +287,7 @@ def get_customers():
         category_filter = request.args.get('category', '').strip()  # US-CUST-011 CA-5
         sort_by = request.args.get('sort_by', 'nombre_razon_social')
         order = request.args.get('order', 'asc')
+        include_audit = request.args.get('include_audit', 'false').lower() == 'true'
 
         ALLOWED_SORT_FIELDS_WITH_CATEGORY = ALLOWED_SORT_FIELDS + ['customer_category']
         if sort_by not in ALLOWED_SORT_FIELDS_WITH_CATEGORY:
@@ -278,15 +296,7 @@ def get_customers():
         query = Customer.query
 
         if search:
-            search_filter = f'%{search}%'
-            query = query.filter(
-                db.or_(
-                    Customer.nombre_razon_social.ilike(search_filter),
-                    Customer.correo.ilike(search_filter),
-                    Customer.numero_documento.ilike(search_filter),
-                    Customer.telefono_movil.ilike(search_filter),
-                )
-            )
+            query = query.filter(CustomerSearchService.build_filter(search))
 
         # Statistics from the full (pre-status) query for accurate global counts
         stats_query = query.with_entities(
@@ -324,12 +334,21 @@ def get_customers():
         else:
             query = query.order_by(sort_column.asc())
 
+        # Acumulados de compra en la misma query de la página
+        query = query.options(joinedload(Customer.stats))
+        if include_audit:
+            # Usuarios de auditoría de toda la página en una sola query IN
+            query = query.options(
+                selectinload(Customer.inactivated_by_user),
+                selectinload(Customer.reactivated_by_user)
+            )
+
         pagination = query.paginate(page=page, per_page=limit, error_out=False)
         customers = pagination.items
 
         return jsonify({
             'success': True,
-            'data': [c.to_dict() for c in customers],
+            'data': [c.to_dict(include_audit=include_audit) for c in customers],
             'statistics': statistics,
             'pagination': {
                 'page': pagination.page,
@@ -361,7 +380,11 @@ def get_customer(customer_id):
     try:
         from app.models.order import Order
 
-        customer = Customer.query.get(customer_id)
+        customer = Customer.query.options(
+            joinedload(Customer.stats),
+            joinedload(Customer.inactivated_by_user),
+            joinedload(Customer.reactivated_by_user)
+        ).filter(Customer.id == customer_id).first()
 
         if not customer:
             return jsonify({
@@ -372,26 +395,11 @@ def get_customer(customer_id):
                 }
             }), 404
 
+        # total_purchases y last_purchase_date vienen de customer_stats
         customer_dict = customer.to_dict()
 
-        # Calcular estadísticas reales de pedidos
-        all_orders_count = Order.query.filter(Order.customer_id == customer_id).count()
-        non_cancelled = Order.query.filter(
-            Order.customer_id == customer_id,
-            Order.status != 'Cancelado'
-        )
-        stats = non_cancelled.with_entities(
-            func.count(Order.id).label('count'),
-            func.sum(Order.total).label('total_spent'),
-            func.max(Order.created_at).label('last_purchase'),
-        ).first()
-
-        total_spent = float(stats.total_spent or 0) if stats else 0.0
-        customer_dict['order_count'] = all_orders_count
-        customer_dict['total_purchases'] = total_spent
-        customer_dict['last_purchase_date'] = (
-            stats.last_purchase.isoformat() if stats and stats.last_purchase else None
-        )
+        # order_count incluye cancelados: un cliente con pedidos no se puede eliminar
+        customer_dict['order_count'] = Order.query.filter(Order.customer_id == customer_id).count()
 
         # Recalcular y persistir categoría según gasto total (US-CUST-011 CA-2)
         from app.services.customer_segmentation_service import calculate_and_update_category
@@ -435,180 +443,59 @@ def get_customer_orders_history(customer_id):
         - metrics: Estadísticas calculadas (total, gastado, promedio, etc.)
         - top_products: Top 10 productos más comprados
         - chart_data: Datos mensuales para gráfico
+
+    Responde con ETag; si If-None-Match coincide (historial sin cambios) devuelve 304.
     """
     try:
-        from app.models.order import Order, OrderItem
-        from app.models.product import Product
+        from app.services.customer_order_history_service import CustomerOrderHistoryService
 
-        customer = Customer.query.get(customer_id)
-        if not customer:
+        # Huella del historial (también valida que el cliente exista)
+        version = CustomerOrderHistoryService.get_version(customer_id)
+        if version is None:
             return jsonify({
                 'success': False,
                 'error': {'code': 'NOT_FOUND', 'message': 'Cliente no encontrado'}
             }), 404
 
+        customer_name, fingerprint = version
+        etag = CustomerOrderHistoryService.build_etag(customer_id, fingerprint, request.args)
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag, weak=True)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+
         page = request.args.get('page', 1, type=int)
         limit = min(request.args.get('limit', 20, type=int), 100)
-        date_from = request.args.get('date_from', '').strip()
-        date_to = request.args.get('date_to', '').strip()
-        status_filter = request.args.get('status', '').strip()
-        payment_filter = request.args.get('payment_status', '').strip()
-
-        # Base query
-        query = Order.query.filter(Order.customer_id == customer_id)
-
-        # CA-4: Filtro por rango de fechas
-        if date_from:
-            try:
-                from_dt = datetime.fromisoformat(date_from)
-                query = query.filter(Order.created_at >= from_dt)
-            except ValueError:
-                pass
-
-        if date_to:
-            try:
-                to_dt = datetime.fromisoformat(date_to + 'T23:59:59')
-                query = query.filter(Order.created_at <= to_dt)
-            except ValueError:
-                pass
-
-        # CA-5: Filtro por estado del pedido
-        if status_filter:
-            statuses = [s.strip() for s in status_filter.split(',') if s.strip()]
-            if statuses:
-                query = query.filter(Order.status.in_(statuses))
-
-        # CA-6: Filtro por estado de pago
-        if payment_filter:
-            payment_statuses = [s.strip() for s in payment_filter.split(',') if s.strip()]
-            if payment_statuses:
-                query = query.filter(Order.payment_status.in_(payment_statuses))
-
-        # CA-3: Métricas - calcular sobre pedidos no cancelados
-        total_orders_count = query.count()
-        metrics_query = query.filter(Order.status != 'Cancelado')
-        metrics = metrics_query.with_entities(
-            func.count(Order.id).label('non_cancelled_count'),
-            func.sum(Order.total).label('total_spent'),
-            func.avg(Order.total).label('average_order'),
-            func.max(Order.total).label('highest_ticket'),
-            func.min(Order.total).label('lowest_ticket'),
-            func.min(Order.created_at).label('first_order_date'),
-            func.max(Order.created_at).label('last_order_date'),
-        ).first()
+        filters = CustomerOrderHistoryService.parse_filters(request.args)
 
-        # Calcular frecuencia (pedidos por mes)
-        freq_per_month = 0.0
-        if metrics and metrics.first_order_date and metrics.last_order_date and int(metrics.non_cancelled_count or 0) > 0:
-            first_dt = metrics.first_order_date
-            last_dt = metrics.last_order_date
-            months_diff = ((last_dt.year - first_dt.year) * 12 + (last_dt.month - first_dt.month)) or 1
-            freq_per_month = round(float(metrics.non_cancelled_count) / months_diff, 2)
-
-        # CA-2: Ordenar y paginar
-        ordered_query = query.order_by(Order.created_at.desc())
-        pagination = ordered_query.paginate(page=page, per_page=limit, error_out=False)
-
-        orders_data = []
-        for order in pagination.items:
-            orders_data.append({
-                'id': order.id,
-                'order_number': order.order_number,
-                'created_at': order.created_at.isoformat() if order.created_at else None,
-                'status': order.status,
-                'payment_status': order.payment_status,
-                'items_count': len(order.items),
-                'items': [item.to_dict() for item in order.items],
-                'subtotal': float(order.subtotal or 0),
-                'tax_percentage': float(order.tax_percentage or 0),
-                'tax_amount': float(order.tax_amount or 0),
-                'shipping_cost': float(order.shipping_cost or 0),
-                'discount_amount': float(order.discount_amount or 0),
-                'total': float(order.total or 0),
-                'notes': order.notes,
-            })
+        # CA-3, CA-8, CA-9: Métricas, top productos y gráfico en una consulta
+        summary = CustomerOrderHistoryService.get_summary(customer_id, filters)
 
-        # CA-8: Top 10 productos más comprados (sin filtros de fecha/estado)
-        top_products_query = db.session.query(
-            Product.id,
-            Product.name,
-            Product.sku,
-            Product.image_url,
-            func.sum(OrderItem.quantity).label('total_qty'),
-            func.count(func.distinct(Order.id)).label('times_ordered'),
-            func.max(Order.created_at).label('last_ordered'),
-        ).join(OrderItem, OrderItem.product_id == Product.id)\
-         .join(Order, Order.id == OrderItem.order_id)\
-         .filter(
-             Order.customer_id == customer_id,
-             Order.status != 'Cancelado'
-         )\
-         .group_by(Product.id, Product.name, Product.sku, Product.image_url)\
-         .order_by(func.sum(OrderItem.quantity).desc())\
-         .limit(10).all()
-
-        top_products = [{
-            'id': p.id,
-            'name': p.name,
-            'sku': p.sku,
-            'image_url': p.image_url,
-            'total_qty': int(p.total_qty or 0),
-            'times_ordered': int(p.times_ordered or 0),
-            'last_ordered': p.last_ordered.isoformat() if p.last_ordered else None,
-        } for p in top_products_query]
-
-        # CA-9: Datos para gráfico mensual
-        year_col = extract('year', Order.created_at)
-        month_col = extract('month', Order.created_at)
-        chart_query = db.session.query(
-            year_col.label('year'),
-            month_col.label('month'),
-            func.sum(Order.total).label('total'),
-            func.count(Order.id).label('count'),
-        ).filter(Order.customer_id == customer_id)\
-         .group_by(year_col, month_col)\
-         .order_by(year_col, month_col).all()
-
-        MONTHS_ES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun',
-                     'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
-        chart_data = []
-        for row in chart_query:
-            month_idx = int(row.month) - 1
-            chart_data.append({
-                'period': f"{MONTHS_ES[month_idx]} {int(row.year)}",
-                'year': int(row.year),
-                'month': int(row.month),
-                'total': float(row.total or 0),
-                'count': int(row.count or 0),
-            })
+        # CA-2: Ordenar y paginar (total tomado de las métricas)
+        orders, pagination = CustomerOrderHistoryService.get_orders_page(
+            customer_id, filters, page, limit, summary['metrics']['total_orders']
+        )
 
-        return jsonify({
+        response = jsonify({
             'success': True,
             'data': {
                 'customer': {
-                    'id': customer.id,
-                    'nombre_razon_social': customer.nombre_razon_social,
-                },
-                'orders': orders_data,
-                'metrics': {
-                    'total_orders': total_orders_count,
-                    'non_cancelled_count': int(metrics.non_cancelled_count or 0) if metrics else 0,
-                    'total_spent': float(metrics.total_spent or 0) if metrics else 0.0,
-                    'average_order': float(metrics.average_order or 0) if metrics else 0.0,
-                    'highest_ticket': float(metrics.highest_ticket or 0) if metrics else 0.0,
-                    'lowest_ticket': float(metrics.lowest_ticket or 0) if metrics else 0.0,
-                    'frequency_per_month': freq_per_month,
+                    'id': customer_id,
+                    'nombre_razon_social': customer_name,
                 },
-                'top_products': top_products,
-                'chart_data': chart_data,
+                'orders': [CustomerOrderHistoryService.serialize_order(order) for order in orders],
+                'metrics': summary['metrics'],
+                'top_products': summary['top_products'],
+                'chart_data': summary['chart_data'],
             },
-            'pagination': {
-                'page': pagination.page,
-                'per_page': pagination.per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-            }
-        }), 200
+            'pagination': pagination
+        })
+        response.set_etag(etag, weak=True)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response, 200
 
     except Exception as e:
         return jsonify({
@@ -624,6 +511,8 @@ def get_customer_orders_history(customer_id):
 @customers_bp.route('/<customer_id>/orders-history/export', methods=['GET'])
 @jwt_required()
 @require_role(['Admin', 'Personal de Ventas', 'Gerente de Almacén'])
+@use_reporting_engine
+@timed_export
 def export_customer_orders_history(customer_id):
     """
     GET /api/customers/:id/orders-history/export
@@ -635,6 +524,7 @@ def export_customer_orders_history(customer_id):
     """
     try:
         from app.models.order import Order
+        from app.services.customer_order_history_service import CustomerOrderHistoryService
         from app.utils.export_helper import ExportHelper
 
         customer = Customer.query.get(customer_id)
@@ -645,34 +535,12 @@ def export_customer_orders_history(customer_id):
             }), 404
 
         format_type = request.args.get('format', 'csv').lower()
-        date_from = request.args.get('date_from', '').strip()
-        date_to = request.args.get('date_to', '').strip()
-        status_filter = request.args.get('status', '').strip()
-        payment_filter = request.args.get('payment_status', '').strip()
-
-        query = Order.query.filter(Order.customer_id == customer_id)
-
-        if date_from:
-            try:
-                query = query.filter(Order.created_at >= datetime.fromisoformat(date_from))
-            except ValueError:
-                pass
-
-        if date_to:
-            try:
-                query = query.filter(Order.created_at <= datetime.fromisoformat(date_to + 'T23:59:59'))
-            except ValueError:
-                pass
+        filters = CustomerOrderHistoryService.parse_filters(request.args)
 
-        if status_filter:
-            statuses = [s.strip() for s in status_filter.split(',') if s.strip()]
-            if statuses:
-                query = query.filter(Order.status.in_(statuses))
-
-        if payment_filter:
-            payment_statuses = [s.strip() for s in payment_filter.split(',') if s.strip()]
-            if payment_statuses:
-                query = query.filter(Order.payment_status.in_(payment_statuses))
+        query = Order.query.filter(
+            Order.customer_id == customer_id,
+            *CustomerOrderHistoryService.build_conditions(filters)
+        )
 
         orders = query.order_by(Order.created_at.desc()).limit(10000).all()
 
@@ -1148,7 +1016,9 @@ def delete_customer(customer_id):
                 }
             }), 404
 
-        orders_count = customer.to_dict().get('order_count', 0)
+        # Todos los pedidos, cancelados incluidos (orders.customer_id no admite NULL)
+        from app.models.order import Order
+        orders_count = Order.query.filter(Order.customer_id == customer_id).count()
         if orders_count > 0:
             return jsonify({
                 'success': False,
@@ -1384,7 +1254,9 @@ def can_delete_customer(customer_id):
                 }
             }), 404
 
-        orders_count = customer.to_dict().get('order_count', 0)
+        # Todos los pedidos, cancelados incluidos (orders.customer_id no admite NULL)
+        from app.models.order import Order
+        orders_count = Order.query.filter(Order.customer_id == customer_id).count()
         can_delete = orders_count == 0
 
         return jsonify({
@@ -1533,9 +1405,93 @@ def update_segmentation_config():
 # US-CUST-012: Exportar Lista de Clientes
 # ---------------------------------------------------------------------------
 
+# Columnas de la exportación de clientes — CA-3, CA-6
+CUSTOMER_EXPORT_COLUMNS = [
+    ('nombre_razon_social', 'Nombre / Razón Social'),
+    ('correo', 'Correo Electrónico'),
+    ('telefono_movil', 'Teléfono'),
+    ('direccion', 'Dirección'),
+    ('municipio_ciudad', 'Ciudad'),
+    ('departamento', 'Departamento'),
+    ('pais', 'País'),
+    ('tipo_documento', 'Tipo Documento'),
+    ('numero_documento', 'Número Documento'),
+    ('tipo_contribuyente', 'Tipo Contribuyente'),
+    ('fecha_registro', 'Fecha de Registro'),
+    ('estado', 'Estado'),
+    ('categoria', 'Categoría'),
+    ('total_compras', 'Total Compras (COP)'),
+    ('num_pedidos', 'Número de Pedidos'),
+    ('ultima_compra', 'Última Compra'),
+]
+
+# Filas por lote leídas del cursor del servidor
+CUSTOMER_EXPORT_YIELD_PER = 1000
+
+
+def _iter_customer_export_rows(conditions):
+    """
+    Filas de exportación leídas en streaming (cursor del servidor en PostgreSQL)
+
+    Un solo SELECT de customers LEFT JOIN customer_stats (acumulados de pedidos
+    ya agregados por cliente); no se materializan objetos ORM.
+    """
+    from app.models.customer_stats import CustomerStats
+
+    stmt = select(
+        Customer.nombre_razon_social,
+        Customer.correo,
+        Customer.telefono_movil,
+        Customer.direccion,
+        Customer.municipio_ciudad,
+        Customer.departamento,
+        Customer.pais,
+        Customer.tipo_documento,
+        Customer.numero_documento,
+        Customer.tipo_contribuyente,
+        Customer.created_at,
+        Customer.is_active,
+        Customer.customer_category,
+        CustomerStats.total_spent,
+        CustomerStats.order_count,
+        CustomerStats.last_order_at,
+    ).outerjoin(
+        CustomerStats, CustomerStats.customer_id == Customer.id
+    ).where(*conditions).order_by(
+        Customer.nombre_razon_social.asc(), Customer.id.asc()
+    ).execution_options(stream_results=True, yield_per=CUSTOMER_EXPORT_YIELD_PER)
+
+    # Se ejecuta ya (errores de SQL responden 500); las filas se leen al enviar
+    result = db.session.execute(stmt)
+    return (_customer_export_row(row) for row in result)
+
+
+def _customer_export_row(row):
+    """Fila de la exportación de clientes — CA-3, CA-6"""
+    return {
+        'nombre_razon_social': row.nombre_razon_social,
+        'correo': row.correo,
+        'telefono_movil': row.telefono_movil or '',
+        'direccion': row.direccion or '',
+        'municipio_ciudad': row.municipio_ciudad or '',
+        'departamento': row.departamento or '',
+        'pais': row.pais or '',
+        'tipo_documento': row.tipo_documento,
+        'numero_documento': row.numero_documento,
+        'tipo_contribuyente': row.tipo_contribuyente,
+        'fecha_registro': row.created_at.strftime('%Y-%m-%d') if row.created_at else '',
+        'estado': 'Activo' if row.is_active else 'Inactivo',  # CA-6
+        'categoria': row.customer_category,                    # CA-3 (US-CUST-011)
+        'total_compras': float(row.total_spent or 0),
+        'num_pedidos': row.order_count or 0,
+        'ultima_compra': row.last_order_at.strftime('%Y-%m-%d') if row.last_order_at else '',
+    }
+
+
 @customers_bp.route('/export', methods=['GET'])
 @jwt_required()
 @require_role(['Admin', 'Personal de Ventas', 'Gerente de Almacén'])
+@use_reporting_engine
 def export_customers():
     """
     GET /api/customers/export
@@ -1549,11 +1505,10 @@ def export_customers():
 
     Respeta los mismos filtros que GET /api/customers.
     Incluye estadísticas de pedidos por cliente.         — CA-3
-    Máximo 10 000 clientes por exportación.              — CA-9
+    Sin límite de filas: se exporta en streaming con memoria constante.
     """
     try:
         from app.utils.export_helper import ExportHelper
-        from app.models.order import Order
 
         format_type = request.args.get('format', 'csv').lower()
         if format_type not in ('csv', 'excel'):
@@ -1564,111 +1519,34 @@ def export_customers():
         category_filter = request.args.get('category', '').strip()
 
         # Aplicar mismos filtros que get_customers() — CA-4
-        query = Customer.query
+        conditions = []
 
         if search:
-            search_filter = f'%{search}%'
-            query = query.filter(
-                db.or_(
-                    Customer.nombre_razon_social.ilike(search_filter),
-                    Customer.correo.ilike(search_filter),
-                    Customer.numero_documento.ilike(search_filter),
-                    Customer.telefono_movil.ilike(search_filter),
-                )
-            )
+            conditions.append(CustomerSearchService.build_filter(search))
 
         if is_active is not None:
-            query = query.filter(Customer.is_active == (is_active.lower() == 'true'))
+            conditions.append(Customer.is_active == (is_active.lower() == 'true'))
 
         if category_filter:
             categories = [c.strip() for c in category_filter.split(',') if c.strip()]
             valid_cats = ['VIP', 'Frecuente', 'Regular']
             categories = [c for c in categories if c in valid_cats]
             if categories:
-                query = query.filter(Customer.customer_category.in_(categories))
-
-        customers = query.order_by(Customer.nombre_razon_social.asc()).limit(10000).all()
-
-        # Obtener estadísticas de pedidos en lote (una sola query) — CA-3
-        customer_ids = [c.id for c in customers]
-        order_stats = {}
-        if customer_ids:
-            stats_rows = db.session.query(
-                Order.customer_id,
-                func.count(Order.id).label('order_count'),
-                func.sum(Order.total).label('total_spent'),
-                func.max(Order.created_at).label('last_purchase'),
-            ).filter(
-                Order.customer_id.in_(customer_ids),
-                Order.status != 'Cancelado'
-            ).group_by(Order.customer_id).all()
-
-            for row in stats_rows:
-                order_stats[row.customer_id] = {
-                    'order_count': int(row.order_count or 0),
-                    'total_spent': float(row.total_spent or 0),
-                    'last_purchase': (
-                        row.last_purchase.strftime('%Y-%m-%d') if row.last_purchase else ''
-                    ),
-                }
-
-        # Construir datos de exportación — CA-3, CA-6
-        export_data = []
-        for customer in customers:
-            stats = order_stats.get(
-                customer.id, {'order_count': 0, 'total_spent': 0.0, 'last_purchase': ''}
-            )
-            export_data.append({
-                'nombre_razon_social': customer.nombre_razon_social,
-                'correo': customer.correo,
-                'telefono_movil': customer.telefono_movil or '',
-                'direccion': customer.direccion or '',
-                'municipio_ciudad': customer.municipio_ciudad or '',
-                'departamento': customer.departamento or '',
-                'pais': customer.pais or '',
-                'tipo_documento': customer.tipo_documento,
-                'numero_documento': customer.numero_documento,
-                'tipo_contribuyente': customer.tipo_contribuyente,
-                'fecha_registro': (
-                    customer.created_at.strftime('%Y-%m-%d') if customer.created_at else ''
-                ),
-                'estado': 'Activo' if customer.is_active else 'Inactivo',  # CA-6
-                'categoria': customer.customer_category,                     # CA-3 (US-CUST-011)
-                'total_compras': stats['total_spent'],
-                'num_pedidos': stats['order_count'],
-                'ultima_compra': stats['last_purchase'],
-            })
+                conditions.append(Customer.customer_category.in_(categories))
 
-        columns = [
-            ('nombre_razon_social', 'Nombre / Razón Social'),
-            ('correo', 'Correo Electrónico'),
-            ('telefono_movil', 'Teléfono'),
-            ('direccion', 'Dirección'),
-            ('municipio_ciudad', 'Ciudad'),
-            ('departamento', 'Departamento'),
-            ('pais', 'País'),
-            ('tipo_documento', 'Tipo Documento'),
-            ('numero_documento', 'Número Documento'),
-            ('tipo_contribuyente', 'Tipo Contribuyente'),
-            ('fecha_registro', 'Fecha de Registro'),
-            ('estado', 'Estado'),
-            ('categoria', 'Categoría'),
-            ('total_compras', 'Total Compras (COP)'),
-            ('num_pedidos', 'Número de Pedidos'),
-            ('ultima_compra', 'Última Compra'),
-        ]
+        rows = _iter_customer_export_rows(conditions)
 
         if format_type == 'excel':
-            return ExportHelper.export_to_excel(
-                data=export_data,
-                columns=columns,
+            return ExportHelper.stream_excel(
+                rows=rows,
+                columns=CUSTOMER_EXPORT_COLUMNS,
                 filename_prefix='clientes',
                 sheet_name='Clientes',
             )
         else:
-            return ExportHelper.export_to_csv(
-                data=export_data,
-                columns=columns,
+            return ExportHelper.stream_csv(
+                rows=rows,
+                columns=CUSTOMER_EXPORT_COLUMNS,
                 filename_prefix='clientes',
             )
 
@@ -1690,9 +1568,38 @@ def recalculate_all_categories():
     """
     POST /api/customers/segmentation/recalculate
     US-CUST-011 CA-7: Recalcular categorías de todos los clientes (Admin only).
+
+    Query params:
+        - async: true para ejecutar en segundo plano (202 + trabajo). El progreso
+          se consulta en /segmentation/recalculate/<job_id> o en el evento 'job_progress'
+
+    El recálculo es exclusivo entre workers (lock de base de datos): en modo
+    síncrono responde 409 si otro proceso lo está ejecutando; en segundo plano
+    el trabajo termina en 'failed' con ese motivo.
     """
     try:
-        from app.services.customer_segmentation_service import recalculate_all_categories
+        from app.services.customer_segmentation_service import (
+            recalculate_all_categories, SegmentationRecalculationInProgress
+        )
+
+        if request.args.get('async', 'false').lower() == 'true':
+            from app.utils.background_jobs import start_job, find_running_job
+
+            job = find_running_job(SEGMENTATION_RECALCULATE_JOB)
+            if job:
+                return jsonify({
+                    'success': True,
+                    'data': job,
+                    'message': 'Ya hay un recálculo de categorías en curso'
+                }), 202
+
+            job = start_job(SEGMENTATION_RECALCULATE_JOB, recalculate_all_categories)
+            return jsonify({
+                'success': True,
+                'data': job,
+                'message': 'Recálculo de categorías iniciado'
+            }), 202
+
         result = recalculate_all_categories()
         return jsonify({
             'success': True,
@@ -1700,8 +1607,38 @@ def recalculate_all_categories():
             'message': f"Recálculo completado: {result['updated']} clientes procesados, {result['changed']} categorías actualizadas"
         }), 200
 
+    except SegmentationRecalculationInProgress as e:
+        return jsonify({
+            'success': False,
+            'error': {'code': 'RECALCULATION_IN_PROGRESS', 'message': str(e)}
+        }), 409
+
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'error': {'code': 'SERVER_ERROR', 'message': 'Error al recalcular categorías', 'details': str(e)}
         }), 500
+
+
+@customers_bp.route('/segmentation/recalculate/<job_id>', methods=['GET'])
+@jwt_required()
+@require_role(['Admin'])
+def get_recalculate_job(job_id):
+    """
+    GET /api/customers/segmentation/recalculate/<job_id>
+    US-CUST-011 CA-7: Estado y progreso de un recálculo en segundo plano.
+
+    El estado vive en memoria del worker que inició el trabajo: consultado
+    desde otro worker responde 404 (ver app.utils.background_jobs).
+    """
+    from app.utils.background_jobs import get_job
+
+    job = get_job(job_id)
+    if not job or job['name'] != SEGMENTATION_RECALCULATE_JOB:
+        return jsonify({
+            'success': False,
+            'error': {'code': 'NOT_FOUND', 'message': 'Trabajo de recálculo no encontrado'}
+        }), 404
+
+    return jsonify({'success': True, 'data': job}), 200
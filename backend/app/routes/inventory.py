@@ -21,9 +21,12 @@ from app.services.reorder_point_service import ReorderPointService
 from app.services.inventory_value_service import InventoryValueService
 from app.services.inventory_category_service import InventoryCategoryService
 from app.services.inventory_dashboard_service import InventoryDashboardService
+from app.services.product_search_service import ProductSearchService
 from app.utils.export_helper import ExportHelper
 from app.utils.constants import ADJUSTMENT_REASONS, ADJUSTMENT_TYPES
 from app.utils.decorators import warehouse_manager_or_admin
+from app.utils.db_engines import use_reporting_engine
+from app.utils.metrics import timed_export
 
 inventory_bp = Blueprint('inventory', __name__, url_prefix='/api/inventory')
 
@@ -368,6 +371,7 @@ def get_movement_details(movement_id):
 
 @inventory_bp.route('/movements/stock-evolution/<product_id>', methods=['GET'])
 @jwt_required()
+@use_reporting_engine
 def get_stock_evolution(product_id):
     """
     Obtiene la evolución del stock de un producto para graficar (CA-4)
@@ -378,7 +382,8 @@ def get_stock_evolution(product_id):
     Query params:
         date_from: Fecha inicial (opcional)
         date_to: Fecha final (opcional)
-        limit: Máximo de puntos (default: 100)
+        limit: Máximo de puntos (default: 100, máximo: 1000). Con más
+               movimientos en el rango se agrupan en intervalos de tiempo
 
     Returns:
         {
@@ -386,12 +391,24 @@ def get_stock_evolution(product_id):
             "data": [
                 {
                     "date": "2025-11-01T10:00:00",
+                    "bucket_start": "2025-11-01T00:00:00",
                     "stock": 50,
+                    "min_stock": 30,
+                    "max_stock": 50,
                     "movement_type": "Entrada",
-                    "quantity": 20
+                    "quantity": 20,
+                    "movements": 3
                 },
                 ...
-            ]
+            ],
+            "resolution": {
+                "bucket_seconds": 86400,
+                "downsampled": true,
+                "total_movements": 5400,
+                "points": 100,
+                "range_start": "2023-01-01T00:00:00",
+                "range_end": "2025-11-30T23:59:59"
+            }
         }
     """
     try:
@@ -408,7 +425,8 @@ def get_stock_evolution(product_id):
 
         return jsonify({
             'success': True,
-            'data': evolution
+            'data': evolution['points'],
+            'resolution': evolution['resolution']
         }), 200
 
     except Exception as e:
@@ -423,6 +441,8 @@ def get_stock_evolution(product_id):
 
 @inventory_bp.route('/movements/export', methods=['GET'])
 @jwt_required()
+@use_reporting_engine
+@timed_export
 def export_movements():
     """
     Exporta movimientos de inventario a CSV o Excel (CA-6)
@@ -941,6 +961,7 @@ def get_value_by_category():
 
 @inventory_bp.route('/value/evolution', methods=['GET'])
 @jwt_required()
+@use_reporting_engine
 def get_value_evolution():
     """
     US-INV-005 CA-4: Obtener evolución temporal del valor del inventario
@@ -1001,8 +1022,10 @@ def get_inventory_metrics():
         {
             "success": true,
             "data": {
-                "inventory_turnover": null,
-                "days_of_inventory": null,
+                "inventory_turnover": 4.2,
+                "days_of_inventory": 86.9,
+                "sell_through": 61.5,
+                "abc_counts": {"A": 12, "B": 20, "C": 118},
                 "top_categories": [...],
                 "stock_distribution": {
                     "out_of_stock": 10,
@@ -1031,6 +1054,129 @@ def get_inventory_metrics():
         }), 500
 
 
+@inventory_bp.route('/value/analytics', methods=['GET'])
+@jwt_required()
+@use_reporting_engine
+def get_inventory_analytics():
+    """
+    US-INV-005 CA-5: Rotación, días de inventario, sell-through y clases ABC
+
+    Resultado en caché (INVENTORY_ANALYTICS_CACHE_TTL); se recalcula con
+    POST /value/analytics/refresh.
+
+    Query params:
+        include_products: true para incluir las métricas por producto
+
+    Returns:
+        {
+            "success": true,
+            "data": {
+                "window_days": 365,
+                "computed_at": "2026-10-19T12:00:00",
+                "summary": {"cogs": 1200000.0, "inventory_turnover": 4.2, "days_of_inventory": 86.9,
+                            "sell_through": 61.5, "abc_counts": {"A": 12, "B": 20, "C": 118}, ...},
+                "categories": [...],
+                "products": [...]
+            }
+        }
+    """
+    try:
+        from app.services.inventory_analytics_service import InventoryAnalyticsService
+
+        analytics = InventoryAnalyticsService.get_analytics(
+            include_products=request.args.get('include_products', 'false').lower() == 'true'
+        )
+
+        return jsonify({
+            'success': True,
+            'data': analytics
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'INTERNAL_ERROR',
+                'message': f'Error al calcular analítica de inventario: {str(e)}'
+            }
+        }), 500
+
+
+@inventory_bp.route('/value/analytics/refresh', methods=['POST'])
+@jwt_required()
+@warehouse_manager_or_admin
+def refresh_inventory_analytics():
+    """
+    US-INV-005 CA-5: Recalcular la analítica de inventario
+
+    La caché es por proceso: solo se renueva en el worker que atiende la
+    petición (o el trabajo); los demás siguen sirviendo su copia hasta que
+    venza INVENTORY_ANALYTICS_CACHE_TTL.
+
+    Query params:
+        async: true para ejecutar en segundo plano (202 + trabajo). El estado
+            se consulta en /value/analytics/refresh/<job_id> o en el evento 'job_progress'
+    """
+    try:
+        from app.services.inventory_analytics_service import InventoryAnalyticsService, REFRESH_JOB
+
+        if request.args.get('async', 'false').lower() == 'true':
+            from app.utils.background_jobs import start_job, find_running_job
+
+            job = find_running_job(REFRESH_JOB)
+            if job:
+                return jsonify({
+                    'success': True,
+                    'data': job,
+                    'message': 'Ya hay un recálculo de analítica en curso'
+                }), 202
+
+            job = start_job(REFRESH_JOB, InventoryAnalyticsService.refresh)
+            return jsonify({
+                'success': True,
+                'data': job,
+                'message': 'Recálculo de analítica iniciado'
+            }), 202
+
+        result = InventoryAnalyticsService.refresh()
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': 'Analítica de inventario recalculada'
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'INTERNAL_ERROR',
+                'message': f'Error al recalcular analítica de inventario: {str(e)}'
+            }
+        }), 500
+
+
+@inventory_bp.route('/value/analytics/refresh/<job_id>', methods=['GET'])
+@jwt_required()
+@warehouse_manager_or_admin
+def get_inventory_analytics_job(job_id):
+    """US-INV-005 CA-5: Estado de un recálculo de analítica en segundo plano"""
+    from app.services.inventory_analytics_service import REFRESH_JOB
+    from app.utils.background_jobs import get_job
+
+    job = get_job(job_id)
+    if not job or job['name'] != REFRESH_JOB:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'NOT_FOUND',
+                'message': 'Trabajo de recálculo no encontrado'
+            }
+        }), 404
+
+    return jsonify({'success': True, 'data': job}), 200
+
+
 @inventory_bp.route('/value/top-products', methods=['GET'])
 @jwt_required()
 def get_top_products_by_value():
@@ -1171,6 +1317,8 @@ def create_value_snapshot():
 
 @inventory_bp.route('/value/export', methods=['GET'])
 @jwt_required()
+@use_reporting_engine
+@timed_export
 def export_value_report():
     """
     US-INV-005 CA-7: Exporta reporte de valor del inventario a Excel
@@ -1301,6 +1449,9 @@ def get_category_products(category_id):
     Path params:
         category_id: ID de la categoría
 
+    Query params:
+        search: Búsqueda por nombre, descripción o SKU (opcional)
+
     Returns:
         {
             "success": true,
@@ -1321,7 +1472,10 @@ def get_category_products(category_id):
         }
     """
     try:
-        products = InventoryCategoryService.get_category_products(category_id)
+        products = InventoryCategoryService.get_category_products(
+            category_id,
+            search=request.args.get('search', '').strip() or None
+        )
 
         return jsonify({
             'success': True,
@@ -1388,6 +1542,8 @@ def get_category_inventory_metrics():
 @inventory_bp.route('/by-category/<category_id>/export', methods=['GET'])
 @jwt_required()
 @warehouse_manager_or_admin
+@use_reporting_engine
+@timed_export
 def export_category_products(category_id):
     """
     US-INV-006 CA-7: Exporta productos de una categoría a Excel/CSV
@@ -1397,12 +1553,14 @@ def export_category_products(category_id):
 
     Query params:
         format: 'excel' o 'csv' (default: 'excel')
+        search: Búsqueda por nombre, descripción o SKU (opcional)
 
     Returns:
         Archivo Excel o CSV para descargar
     """
     try:
         export_format = request.args.get('format', 'excel').lower()
+        search = request.args.get('search', '').strip() or None
 
         # Verificar que la categoría existe
         category = Category.query.get(category_id)
@@ -1416,7 +1574,7 @@ def export_category_products(category_id):
             }), 404
 
         # Obtener productos usando el servicio existente
-        products = InventoryCategoryService.get_category_products(category_id)
+        products = InventoryCategoryService.get_category_products(category_id, search=search)
 
         # Definir columnas para exportación
         columns = [
@@ -1478,6 +1636,8 @@ def get_out_of_stock_products():
         per_page: Productos por página (default: 20)
         sort_by: Campo de ordenamiento (created_at, product_name, category, sku)
         sort_order: Orden (asc, desc)
+        cursor: Paginación por keyset ('' = primera página, luego next_cursor).
+                Sin COUNT ni OFFSET; ignora `page`
 
     Returns:
         {
@@ -1492,6 +1652,8 @@ def get_out_of_stock_products():
                 }
             }
         }
+
+        Con cursor, pagination = {"per_page": 20, "has_more": true, "next_cursor": "..."}
     """
     try:
         from app.services.critical_stock_alert_service import CriticalStockAlertService
@@ -1500,12 +1662,14 @@ def get_out_of_stock_products():
         per_page = request.args.get('per_page', 20, type=int)
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'asc')
+        cursor = request.args.get('cursor')
 
         result = CriticalStockAlertService.get_out_of_stock_products(
             page=page,
             per_page=per_page,
             sort_by=sort_by,
-            sort_order=sort_order
+            sort_order=sort_order,
+            cursor=cursor
         )
 
         return jsonify({
@@ -1513,6 +1677,15 @@ def get_out_of_stock_products():
             'data': result
         }), 200
 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'VALIDATION_ERROR',
+                'message': str(e)
+            }
+        }), 400
+
     except Exception as e:
         return jsonify({
             'success': False,
@@ -1654,34 +1827,38 @@ def get_critical_alerts_history():
 @warehouse_manager_or_admin
 def sync_out_of_stock_alerts():
     """
-    US-INV-007: Sincroniza alertas para productos existentes sin stock
+    US-INV-007: Sincroniza alertas con el stock actual de todos los productos
 
-    Útil para crear alertas para productos que ya estaban sin stock
-    antes de implementar esta funcionalidad.
+    Crea las alertas faltantes de productos sin stock o bajo el punto de
+    reorden (por ejemplo, previos a esta funcionalidad) y resuelve las que
+    siguen activas con stock recuperado.
 
     Returns:
         {
             "success": true,
             "data": {
-                "alerts_created": 5
+                "alerts_created": 5,
+                "alerts_resolved": 1
             },
-            "message": "Se crearon 5 alertas para productos sin stock existentes"
+            "message": "Se crearon 5 alertas y se resolvieron 1"
         }
     """
     try:
         from app.services.critical_stock_alert_service import CriticalStockAlertService
 
-        alerts_created = CriticalStockAlertService.sync_existing_out_of_stock_products()
+        result = CriticalStockAlertService.sync_alerts()
 
         return jsonify({
             'success': True,
             'data': {
-                'alerts_created': alerts_created
+                'alerts_created': result['created'],
+                'alerts_resolved': result['resolved']
             },
-            'message': f'Se crearon {alerts_created} alertas para productos sin stock existentes'
+            'message': f"Se crearon {result['created']} alertas y se resolvieron {result['resolved']}"
         }), 200
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'error': {
@@ -1698,6 +1875,8 @@ def sync_out_of_stock_alerts():
 @inventory_bp.route('/export', methods=['GET'])
 @jwt_required()
 @warehouse_manager_or_admin
+@use_reporting_engine
+@timed_export
 def export_inventory_data():
     """
     US-INV-009: Exporta datos completos del inventario a CSV o Excel
@@ -1706,7 +1885,7 @@ def export_inventory_data():
         format: 'csv' o 'excel' (default: 'excel')
         stock_filter: 'all', 'in_stock', 'active' (default: 'all')
         category_id: Filtrar por categoría (opcional)
-        search: Búsqueda por nombre o SKU (opcional)
+        search: Búsqueda por nombre, descripción o SKU sin distinguir acentos (opcional)
         limit: Máximo de registros (default: 50000, max: 50000)
 
     Returns:
@@ -1735,13 +1914,7 @@ def export_inventory_data():
             query = query.filter(Product.category_id == category_id)
 
         if search:
-            search_term = f'%{search}%'
-            query = query.filter(
-                db.or_(
-                    Product.name.ilike(search_term),
-                    Product.sku.ilike(search_term)
-                )
-            )
+            query = ProductSearchService.apply(query, search)
 
         # Ejecutar query con join a categoría
         from sqlalchemy.orm import joinedload
@@ -1749,7 +1922,7 @@ def export_inventory_data():
             joinedload(Product.category)
         ).limit(limit).all()
 
-        # Mapear datos a formato de exportación (CA-3: 13 columnas)
+        # Mapear datos a formato de exportación (CA-3: 13 columnas + analítica US-INV-005)
         status_labels = {
             'out_of_stock': 'Sin Stock',
             'low_stock': 'Stock Bajo',
@@ -1766,6 +1939,10 @@ def export_inventory_data():
         total_value = 0
         products_data = []
 
+        # US-INV-005 CA-5: Rotación, DIO, sell-through y ABC (analítica en caché)
+        from app.services.inventory_analytics_service import InventoryAnalyticsService
+        analytics = InventoryAnalyticsService.get_product_metrics()
+
         for p in products:
             stock_status = p.get_stock_status()
             status_counts[stock_status] = status_counts.get(stock_status, 0) + 1
@@ -1773,6 +1950,7 @@ def export_inventory_data():
             sale = float(p.sale_price) if p.sale_price else 0
             item_value = cost * p.stock_quantity
             total_value += item_value
+            product_analytics = analytics.get(p.id, {})
 
             products_data.append({
                 'sku': p.sku,
@@ -1787,7 +1965,11 @@ def export_inventory_data():
                 'valor_total': item_value,
                 'estado': status_labels.get(stock_status, stock_status),
                 'ultima_actualizacion': p.updated_at.strftime('%Y-%m-%d %H:%M:%S') if p.updated_at else '',
-                'proveedor': ''
+                'proveedor': '',
+                'rotacion': product_analytics.get('inventory_turnover'),
+                'dias_inventario': product_analytics.get('days_of_inventory'),
+                'sell_through': product_analytics.get('sell_through'),
+                'clase_abc': product_analytics.get('abc_class', '')
             })
 
         # CA-8: Audit log
@@ -9,10 +9,13 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app import db
 from app.services.order_service import OrderService, OrderConflictError, DiscountAuthorizationError
 from app.services.order_pdf_service import OrderPdfService
+from app.services.customer_search_service import CustomerSearchService
 from app.services.stock_service import InsufficientStockError, StockUpdateError
 from app.schemas.order_schema import order_create_schema, order_update_schema, order_cancel_schema
 from app.schemas.payment_schema import payment_create_schema
 from app.utils.decorators import require_role
+from app.utils.metrics import timed_export
+from app.utils.search import escape_like
 from app.models.order import Order, OrderStatusHistory
 from marshmallow import ValidationError
 
@@ -33,7 +36,7 @@ def list_orders():
         - status: Filtrar por estado
         - payment_status: Filtrar por estado de pago
         - customer_id: Filtrar por cliente
-        - search: Búsqueda por número de pedido o nombre de cliente
+        - search: Búsqueda por número de pedido o cliente (nombre, correo, documento, teléfono)
         - sort_by: Columna de ordenamiento (order_number, customer_name, created_at, total, status)
         - sort_order: Dirección (asc, desc) - default desc
     """
@@ -95,18 +98,14 @@ def list_orders():
             query = query.filter(Order.created_at >= date_from)
         if date_to:
             query = query.filter(Order.created_at <= date_to)
-        # CA-1: Búsqueda por texto en número de pedido, nombre e email de cliente
+        # CA-1: Búsqueda por número de pedido o por cliente (nombre, correo, documento, teléfono)
         if search:
-            if needs_customer:
-                query = query.filter(
-                    db.or_(
-                        Order.order_number.ilike(f'%{search}%'),
-                        Customer.nombre_razon_social.ilike(f'%{search}%'),
-                        Customer.email.ilike(f'%{search}%'),
-                    )
+            query = query.filter(
+                db.or_(
+                    Order.order_number.ilike(f'%{escape_like(search)}%', escape='\\'),
+                    CustomerSearchService.build_filter(search),
                 )
-            else:
-                query = query.filter(Order.order_number.ilike(f'%{search}%'))
+            )
 
         # CA-6: Calcular total de ventas sobre datos filtrados (antes de paginar)
         total_amount = query.with_entities(
@@ -235,6 +234,7 @@ def get_order(order_id):
 @orders_bp.route('/<string:order_id>/pdf', methods=['GET'])
 @jwt_required()
 @require_role(['Admin', 'Personal de Ventas', 'Gerente de Almacén'])
+@timed_export
 def export_order_pdf(order_id):
     """
     GET /api/orders/:id/pdf
@@ -16,6 +16,8 @@ from app.schemas.product_schema import (
     product_response_schema,
     products_response_schema
 )
+from app.services.product_search_service import ProductSearchService
+from app.services.product_listing_service import ProductListingService
 from app.utils.decorators import require_role
 from app.utils.image_handler import (
     save_product_image,
@@ -24,7 +26,6 @@ from app.utils.image_handler import (
 )
 from marshmallow import ValidationError
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func, case
 
 products_bp = Blueprint('products', __name__, url_prefix='/api/products')
 
@@ -259,12 +260,15 @@ def get_products():
     Query params:
         - page: Número de página (default: 1)
         - limit: Productos por página (default: 20, opciones: 10, 20, 50, 100)
-        - sort: Campo para ordenar (name, sku, category, sale_price, stock_quantity)
+        - sort: Campo para ordenar (relevance, name, sku, category, sale_price, stock_quantity)
         - order: Orden (asc, desc) - default: asc
-        - search: Buscar por nombre o SKU (opcional)
+        - search: Buscar por nombre, descripción o SKU sin distinguir acentos (opcional).
+          Sin `sort` explícito los resultados se ordenan por relevancia
         - category_id: Filtrar por categoría (opcional)
         - stock_status: Estado de stock (all, normal, low, out) (opcional)
         - low_stock_only: [DEPRECATED] Filtrar solo productos con stock bajo (opcional)
+        - with_count: false para omitir total/estadísticas (scroll infinito);
+          pagination.total/pages y statistics se devuelven como null
     """
     try:
         # CA-2: Parámetros de paginación
@@ -275,101 +279,43 @@ def get_products():
         if limit not in [10, 20, 50, 100]:
             limit = 20
 
-        # CA-4: Parámetros de ordenamiento
-        sort_field = request.args.get('sort', 'name')  # Default: Nombre A-Z
-        order = request.args.get('order', 'asc')
-
         # Filtros opcionales
         search = request.args.get('search', '').strip()
         category_id = request.args.get('category_id')
         low_stock_only = request.args.get('low_stock_only', 'false').lower() == 'true'
         stock_status = request.args.get('stock_status', '').strip().lower()  # US-PROD-003
+        with_count = request.args.get('with_count', 'true').lower() != 'false'
 
-        # Query base - productos activos y no eliminados (US-PROD-006 CA-9)
-        query = Product.query.filter(
-            Product.is_active == True,
-            Product.deleted_at == None
-        )
+        # CA-4: Parámetros de ordenamiento (con búsqueda, el default es relevancia)
+        sort_field = request.args.get('sort', 'relevance' if search else 'name')  # Default: Nombre A-Z
+        order = request.args.get('order', 'asc')
 
-        # Aplicar búsqueda
-        if search:
-            query = query.filter(
-                db.or_(
-                    Product.name.ilike(f'%{search}%'),
-                    Product.sku.ilike(f'%{search}%')
-                )
-            )
-
-        # Filtrar por categoría
-        if category_id:
-            query = query.filter(Product.category_id == category_id)
-
-        # US-PROD-003 CA-4: Filtrar por estado de stock
-        if stock_status == 'normal':
-            query = query.filter(Product.stock_quantity > Product.min_stock_level)
-        elif stock_status == 'low':
-            query = query.filter(
-                Product.stock_quantity <= Product.min_stock_level,
-                Product.stock_quantity > 0
-            )
-        elif stock_status == 'out':
-            query = query.filter(Product.stock_quantity == 0)
-        # CA-3: Mantener compatibilidad con low_stock_only (legacy)
-        elif low_stock_only:
-            query = query.filter(Product.stock_quantity <= Product.min_stock_level)
-
-        # CA-6: Calcular estadísticas ANTES de aplicar paginación
-        # OPTIMIZADO: Usar queries agregadas SQL en lugar de cargar todos en memoria
-        total_products = query.count()
-
-        # Estadísticas de stock usando SQL agregadas (más eficiente)
-        # US-PROD-006 CA-9: Excluir productos eliminados
-        stock_stats = db.session.query(
-            func.count(case((Product.stock_quantity > Product.min_stock_level, 1))).label('normal_stock'),
-            func.count(case(
-                ((Product.stock_quantity > 0) & (Product.stock_quantity <= Product.min_stock_level), 1)
-            )).label('low_stock'),
-            func.count(case((Product.stock_quantity == 0, 1))).label('out_of_stock')
-        ).filter(
-            Product.is_active == True,
-            Product.deleted_at == None
+        # Query base - productos activos y no eliminados (US-PROD-006 CA-9)
+        # Mismas condiciones para la página y para las estadísticas
+        conditions = ProductListingService.build_conditions(
+            search=search,
+            category_id=category_id,
+            stock_status=stock_status,
+            low_stock_only=low_stock_only
         )
+        query = Product.query.filter(*conditions)
 
-        # Aplicar los mismos filtros que la query principal
-        if search:
-            stock_stats = stock_stats.filter(
-                (Product.name.ilike(f'%{search}%')) | (Product.sku.ilike(f'%{search}%'))
-            )
-        if category_id:
-            stock_stats = stock_stats.filter(Product.category_id == category_id)
-
-        # US-PROD-003: Aplicar filtro de stock status
-        if stock_status == 'normal':
-            stock_stats = stock_stats.filter(Product.stock_quantity > Product.min_stock_level)
-        elif stock_status == 'low':
-            stock_stats = stock_stats.filter(
-                Product.stock_quantity <= Product.min_stock_level,
-                Product.stock_quantity > 0
-            )
-        elif stock_status == 'out':
-            stock_stats = stock_stats.filter(Product.stock_quantity == 0)
-        elif low_stock_only:
-            stock_stats = stock_stats.filter(Product.stock_quantity <= Product.min_stock_level)
-
-        stock_counts = stock_stats.first()
-
-        stats = {
-            'total': total_products,
-            'normal_stock': stock_counts.normal_stock or 0,
-            'low_stock': stock_counts.low_stock or 0,
-            'out_of_stock': stock_counts.out_of_stock or 0
-        }
+        # CA-6: Total y estadísticas de stock en un solo agregado
+        # (omitibles con with_count=false para scroll infinito)
+        stats = ProductListingService.get_statistics(conditions) if with_count else None
 
         # CA-4: Aplicar ordenamiento
         # Join con Category para poder ordenar por nombre de categoría
-        query = query.outerjoin(Category)
+        # (el mismo join carga la categoría de cada fila, sin lazy loads)
+        query = query.outerjoin(Category).options(
+            *ProductListingService.eager_options(category_joined=True)
+        )
 
-        if sort_field == 'name':
+        search_rank = ProductSearchService.rank_expression(search) if search else None
+
+        if sort_field == 'relevance' and search_rank is not None:
+            query = query.order_by(search_rank.desc(), Product.name.asc())
+        elif sort_field == 'name':
             query = query.order_by(Product.name.desc() if order == 'desc' else Product.name.asc())
         elif sort_field == 'sku':
             query = query.order_by(Product.sku.desc() if order == 'desc' else Product.sku.asc())
@@ -383,31 +329,19 @@ def get_products():
             # Default: ordenar por nombre
             query = query.order_by(Product.name.asc())
 
-        # CA-2: Aplicar paginación
-        pagination = query.paginate(
+        # CA-2: Aplicar paginación (reutiliza el total del agregado, sin COUNT extra)
+        items, pagination = ProductListingService.paginate(
+            query,
             page=page,
             per_page=limit,
-            error_out=False
+            total=stats['total'] if stats else None
         )
 
         # CA-1 & CA-3: Convertir productos a diccionarios con info completa
         products_data = []
-        for product in pagination.items:
-            product_dict = product.to_dict()
-
-            # CA-4: Margen de ganancia
-            product_dict['profit_margin'] = product.calculate_profit_margin()
-
-            # CA-1: Información de categoría
-            if product.category:
-                product_dict['category'] = {
-                    'id': product.category.id,
-                    'name': product.category.name,
-                    'color': product.category.color,
-                    'icon': product.category.icon
-                }
-            else:
-                product_dict['category'] = None
+        for product in items:
+            # CA-1 & CA-4: Datos, margen y categoría (cargada en la misma query)
+            product_dict = ProductListingService.serialize(product)
 
             # CA-3: Indicadores de stock bajo
             product_dict['stock_status'] = {
@@ -422,16 +356,7 @@ def get_products():
         return jsonify({
             'success': True,
             'data': products_data,
-            'pagination': {
-                'page': pagination.page,
-                'per_page': pagination.per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_prev': pagination.has_prev,
-                'has_next': pagination.has_next,
-                'prev_page': pagination.prev_num if pagination.has_prev else None,
-                'next_page': pagination.next_num if pagination.has_next else None
-            },
+            'pagination': pagination,
             'statistics': stats
         }), 200
 
@@ -472,11 +397,11 @@ def get_low_stock_products():
 
         # US-PROD-008 CA-2: Query para productos con stock bajo
         # stock_quantity <= reorder_point AND stock_quantity > 0 OR stock_quantity = 0
-        query = Product.query.filter(
-            Product.is_active == True,
-            Product.deleted_at == None,
-            Product.stock_quantity <= Product.reorder_point
-        )
+        conditions = ProductListingService.build_conditions(below_reorder_point=True)
+        query = Product.query.filter(*conditions).options(*ProductListingService.eager_options())
+
+        # Estadísticas en un solo agregado (stock 0 siempre está bajo el punto de reorden)
+        stats = ProductListingService.get_statistics(conditions, threshold=Product.reorder_point)
 
         # Ordenamiento
         if hasattr(Product, sort_by):
@@ -490,55 +415,31 @@ def get_low_stock_products():
             query = query.order_by(Product.stock_quantity.asc())
 
         # Paginación
-        pagination = query.paginate(
+        products, pagination = ProductListingService.paginate(
+            query,
             page=page,
             per_page=per_page,
-            error_out=False
+            total=stats['total']
         )
 
-        products = pagination.items
-
         # Serializar productos con información adicional
         products_data = []
         for product in products:
-            product_dict = product.to_dict()
-            product_dict['profit_margin'] = product.calculate_profit_margin()
+            product_dict = ProductListingService.serialize(product)
             product_dict['stock_status'] = product.get_stock_status()
 
             # CA-4: Información adicional para vista de stock bajo
             product_dict['difference'] = product.reorder_point - product.stock_quantity
 
-            # Información de categoría
-            if product.category:
-                product_dict['category'] = {
-                    'id': product.category.id,
-                    'name': product.category.name,
-                    'color': product.category.color,
-                    'icon': product.category.icon
-                }
-
             products_data.append(product_dict)
 
-        # Estadísticas adicionales
-        total_low_stock = query.count()
-        out_of_stock_count = Product.query.filter(
-            Product.is_active == True,
-            Product.deleted_at == None,
-            Product.stock_quantity == 0
-        ).count()
-
         return jsonify({
             'success': True,
             'data': products_data,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'pages': pagination.pages
-            },
+            'pagination': pagination,
             'stats': {
-                'total_low_stock': total_low_stock,
-                'out_of_stock': out_of_stock_count
+                'total_low_stock': stats['total'],
+                'out_of_stock': stats['out_of_stock']
             }
         }), 200
 
@@ -798,7 +699,9 @@ def update_product(product_id):
                 if success:
                     new_image_url = result
                     # Eliminar imagen anterior si existe y no es la default
-                    if product.image_url and product.image_url != get_default_product_image():
+                    # (con nombres por hash, la misma imagen produce la misma URL)
+                    if (product.image_url and product.image_url != get_default_product_image()
+                            and product.image_url != new_image_url):
                         delete_product_image(product.image_url, current_app.config['UPLOAD_FOLDER'])
                 else:
                     # Error al guardar imagen
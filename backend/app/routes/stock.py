@@ -13,6 +13,7 @@ from app import db, socketio
 from app.models.product import Product
 from app.services.stock_service import StockService, StockUpdateError, ConcurrencyError, InsufficientStockError
 from flask_socketio import emit
+from app.utils.metrics import SOCKETIO_CONNECTIONS
 
 stock_bp = Blueprint('stock', __name__, url_prefix='/api/stock')
 
@@ -346,6 +347,7 @@ def handle_connect():
     """
     Maneja la conexión de un cliente WebSocket
     """
+    SOCKETIO_CONNECTIONS.inc()
     emit('connected', {'message': 'Conectado al sistema de actualizaciones de stock en tiempo real'})
 
 
@@ -354,7 +356,7 @@ def handle_disconnect():
     """
     Maneja la desconexión de un cliente WebSocket
     """
-    pass
+    SOCKETIO_CONNECTIONS.dec()
 
 
 @socketio.on('subscribe_product')
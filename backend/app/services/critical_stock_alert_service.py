@@ -4,13 +4,23 @@ Servicio de Alertas de Stock Crítico
 US-INV-007: Alerta de Stock Crítico
 - CA-1: Detección automática de stock cero
 - CA-8: Resolución automática de alertas
+
+Este servicio es el único que escribe alertas: los triggers de punto de
+reorden de 3e515d718137 se eliminan en a9b0c1d2e3f4.
 """
+import base64
+import binascii
+import json
 from app import db
 from app.models.inventory_alert import InventoryAlert
 from app.models.product import Product
 from app.models.inventory_movement import InventoryMovement
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import case, exists, func, literal, null, select, text, true, update
+from app.utils.sql import upsert_insert, uuid_expression
+
+# Orden de productos sin alerta activa (p. ej. previos a la sincronización)
+OUT_OF_STOCK_SINCE_FLOOR = datetime(1970, 1, 1)
 
 
 class CriticalStockAlertService:
@@ -18,122 +28,213 @@ class CriticalStockAlertService:
     Servicio para gestionar alertas de stock crítico (stock = 0)
 
     Funcionalidades:
-    - Crear alertas automáticamente cuando stock llega a 0
-    - Resolver alertas cuando stock se recupera
+    - Crear alertas automáticamente cuando stock llega a 0 o al punto de reorden
+    - Resolver alertas cuando stock se recupera (misma transacción que el cambio)
     - Obtener productos sin stock con información relevante
     - Métricas de alertas activas
     """
 
     ALERT_TYPE_OUT_OF_STOCK = 'out_of_stock'
+    ALERT_TYPE_REORDER_POINT = 'reorder_point'
+
+    @staticmethod
+    def _expected_alert_type(products):
+        """Tipo de alerta que corresponde al stock actual (NULL si no corresponde ninguna)"""
+        return case(
+            (products.c.stock_quantity == 0, CriticalStockAlertService.ALERT_TYPE_OUT_OF_STOCK),
+            (products.c.stock_quantity <= products.c.reorder_point, CriticalStockAlertService.ALERT_TYPE_REORDER_POINT),
+            else_=null()
+        )
 
     @staticmethod
-    def check_and_create_alert(product_id, previous_stock, new_stock, user_id=None):
+    def evaluate_stock_alerts(product_ids):
         """
-        Verifica si se debe crear una alerta de stock cero (CA-1)
+        Motor de alertas: alinea las alertas activas con el stock actual (CA-1, CA-8)
+
+        Se invoca desde todas las rutas que modifican stock (ajustes, pedidos,
+        cancelaciones y devoluciones) con los productos tocados, dentro de la
+        misma transacción y antes del commit del llamador: no hace commit, y un
+        rollback descarta también las alertas. Son dos sentencias para todo el
+        conjunto de productos, sin importar cuántos sean:
 
-        Se crea una alerta cuando:
-        - El stock anterior era > 0 Y el nuevo stock es 0
+        - UPDATE que resuelve las alertas activas cuya condición ya no se
+          cumple (el stock se recuperó o superó el punto de reorden)
+        - INSERT ... SELECT que crea las alertas que faltan: 'out_of_stock'
+          con stock 0 y 'reorder_point' con 0 < stock <= punto de reorden,
+          omitiendo productos que ya tienen esa alerta activa (anti-join)
+
+        Los llamadores bloquean las filas de productos (FOR UPDATE), así que
+        dos transacciones no evalúan el mismo producto a la vez; además el
+        índice único parcial ux_inventory_alerts_active impide duplicados.
 
         Args:
-            product_id: ID del producto
-            previous_stock: Stock antes del cambio
-            new_stock: Stock después del cambio
-            user_id: ID del usuario que causó el cambio (opcional)
+            product_ids: IDs de los productos cuyo stock cambió
 
         Returns:
-            InventoryAlert o None: La alerta creada o None si no aplica
+            dict: {'created': alertas creadas, 'resolved': alertas resueltas}
         """
-        # Solo crear alerta si el stock llega a 0 desde un valor positivo
-        if previous_stock > 0 and new_stock == 0:
-            product = Product.query.get(product_id)
-            if not product:
-                return None
-
-            # Verificar si ya existe una alerta activa para este producto
-            existing_alert = InventoryAlert.query.filter_by(
-                product_id=product_id,
-                alert_type=CriticalStockAlertService.ALERT_TYPE_OUT_OF_STOCK,
-                is_active=True
-            ).first()
-
-            if existing_alert:
-                return existing_alert
-
-            # Crear nueva alerta
-            alert = InventoryAlert(
-                product_id=product_id,
-                alert_type=CriticalStockAlertService.ALERT_TYPE_OUT_OF_STOCK,
-                current_stock=0,
-                reorder_point=product.reorder_point,
-                is_active=True
-            )
+        product_ids = list({product_id for product_id in product_ids if product_id})
+        if not product_ids:
+            return {'created': 0, 'resolved': 0}
 
-            db.session.add(alert)
-            db.session.commit()
-
-            return alert
-
-        return None
+        return CriticalStockAlertService._sync_alerts(product_ids)
 
     @staticmethod
-    def check_and_resolve_alert(product_id, previous_stock, new_stock):
+    def _sync_alerts(product_ids=None):
         """
-        Verifica si se debe resolver una alerta de stock cero (CA-8)
-
-        Se resuelve una alerta cuando:
-        - El stock anterior era 0 Y el nuevo stock es > 0
+        Resolver y crear alertas en bloque (sin commit)
 
         Args:
-            product_id: ID del producto
-            previous_stock: Stock antes del cambio
-            new_stock: Stock después del cambio
+            product_ids: Productos a evaluar, o None para todo el catálogo
 
         Returns:
-            int: Número de alertas resueltas
+            dict: {'created': alertas creadas, 'resolved': alertas resueltas}
         """
-        # Solo resolver si el stock se recupera desde 0
-        if previous_stock == 0 and new_stock > 0:
-            alerts = InventoryAlert.query.filter_by(
-                product_id=product_id,
-                alert_type=CriticalStockAlertService.ALERT_TYPE_OUT_OF_STOCK,
-                is_active=True
-            ).all()
+        # El stock nuevo debe estar en la base antes de evaluarlo
+        db.session.flush()
+
+        now = datetime.utcnow()
+        alerts = InventoryAlert.__table__
+        products = Product.__table__
+        expected_type = CriticalStockAlertService._expected_alert_type(products)
+        managed_types = (
+            CriticalStockAlertService.ALERT_TYPE_OUT_OF_STOCK,
+            CriticalStockAlertService.ALERT_TYPE_REORDER_POINT,
+        )
 
-            resolved_count = 0
-            for alert in alerts:
-                alert.is_active = False
-                alert.resolved_at = datetime.utcnow()
-                resolved_count += 1
+        # CA-8: Resolver alertas cuya condición dejó de cumplirse
+        still_applies = select(products.c.id).where(
+            products.c.id == alerts.c.product_id,
+            expected_type == alerts.c.alert_type
+        )
+        resolve_conditions = [
+            alerts.c.alert_type.in_(managed_types),
+            alerts.c.is_active == True,
+            ~exists(still_applies),
+        ]
+        if product_ids is not None:
+            resolve_conditions.append(alerts.c.product_id.in_(product_ids))
+        resolved = db.session.execute(
+            update(alerts).where(*resolve_conditions).values(is_active=False, resolved_at=now)
+        ).rowcount or 0
+
+        # CA-1: Crear las alertas que faltan
+        already_active = select(alerts.c.id).where(
+            alerts.c.product_id == products.c.id,
+            alerts.c.alert_type == expected_type,
+            alerts.c.is_active == True
+        )
+        create_conditions = [
+            products.c.is_active == True,
+            expected_type.isnot(None),
+            ~exists(already_active),
+        ]
+        if product_ids is not None:
+            create_conditions.append(products.c.id.in_(product_ids))
+
+        statement, supports_on_conflict = upsert_insert(alerts)
+        statement = statement.from_select(
+            ['id', 'product_id', 'alert_type', 'current_stock', 'reorder_point',
+             'is_active', 'created_at'],
+            select(
+                uuid_expression(),
+                products.c.id,
+                expected_type,
+                products.c.stock_quantity,
+                products.c.reorder_point,
+                true(),
+                literal(now, type_=db.DateTime),
+            ).where(*create_conditions)
+        )
+        if supports_on_conflict:
+            # Una sincronización concurrente que ya insertó la alerta no es un error
+            statement = statement.on_conflict_do_nothing(
+                index_elements=['product_id', 'alert_type'],
+                index_where=text('is_active')
+            )
+        created = db.session.execute(statement).rowcount or 0
 
-            if resolved_count > 0:
-                db.session.commit()
+        return {'created': created, 'resolved': resolved}
 
-            return resolved_count
+    @staticmethod
+    def _encode_cursor(sort_value, product_id):
+        """Cursor opaco con la clave de orden y el ID del último producto de la página"""
+        if isinstance(sort_value, datetime):
+            sort_value = sort_value.isoformat()
+        raw = json.dumps([sort_value, product_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
 
-        return 0
+    @staticmethod
+    def _decode_cursor(cursor, is_datetime):
+        """
+        Returns:
+            tuple: (valor de orden, product_id)
+
+        Raises:
+            ValueError: Si el cursor no es válido
+        """
+        try:
+            sort_value, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if is_datetime:
+                sort_value = datetime.fromisoformat(sort_value)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise ValueError('Cursor de paginación inválido')
+        return sort_value, product_id
 
     @staticmethod
-    def get_out_of_stock_products(page=1, per_page=20, sort_by='created_at', sort_order='asc'):
+    def get_out_of_stock_products(page=1, per_page=20, sort_by='created_at', sort_order='asc', cursor=None):
         """
         Obtiene todos los productos sin stock con información relevante (CA-4)
 
+        Una sola consulta: la página (con LIMIT) calcula en una subconsulta
+        correlacionada el último movimiento que dejó el producto en 0 (índice
+        parcial ix_inventory_movements_zero_stock) y luego se une a productos
+        y movimientos. Con `cursor` la paginación es por keyset sobre la clave
+        de orden + ID (sin COUNT ni OFFSET); `cursor=''` pide la primera página.
+
         Args:
-            page: Número de página
+            page: Número de página (paginación por offset)
             per_page: Productos por página
-            sort_by: Campo para ordenar ('created_at', 'product_name', 'category')
+            sort_by: Campo para ordenar ('created_at', 'product_name', 'category', 'sku')
             sort_order: Dirección ('asc', 'desc')
+            cursor: Cursor de la página anterior (next_cursor) o '' para empezar
 
         Returns:
             dict: Datos paginados de productos sin stock
+
+        Raises:
+            ValueError: Si el cursor no es válido
         """
         from app.models.category import Category
 
-        # Query base: productos activos con stock = 0
-        query = db.session.query(
-            Product,
+        descending = sort_order == 'desc'
+        keyset = cursor is not None
+
+        # created_at: fecha de la alerta activa; sin alerta cuenta como la más antigua
+        sort_columns = {
+            'product_name': Product.name,
+            'category': Category.name,
+            'sku': Product.sku,
+        }
+        sort_col = sort_columns.get(
+            sort_by, func.coalesce(InventoryAlert.created_at, OUT_OF_STOCK_SINCE_FLOOR)
+        )
+
+        # Último movimiento con new_stock = 0 (uno por fila de la página)
+        last_zero_movement_id = select(InventoryMovement.id).where(
+            InventoryMovement.product_id == Product.id,
+            InventoryMovement.new_stock == 0
+        ).order_by(InventoryMovement.created_at.desc()).limit(1).correlate(Product).scalar_subquery()
+
+        conditions = [Product.stock_quantity == 0, Product.is_active == True]
+
+        page_query = select(
+            Product.id.label('product_id'),
+            Category.name.label('category_name'),
             InventoryAlert.created_at.label('out_of_stock_since'),
-            Category.name.label('category_name')
-        ).outerjoin(
+            sort_col.label('sort_key'),
+            last_zero_movement_id.label('last_movement_id'),
+        ).select_from(Product).outerjoin(
             InventoryAlert,
             db.and_(
                 InventoryAlert.product_id == Product.id,
@@ -142,42 +243,56 @@ class CriticalStockAlertService:
             )
         ).join(
             Category, Product.category_id == Category.id
-        ).filter(
-            Product.stock_quantity == 0,
-            Product.is_active == True
-        )
+        ).where(*conditions)
 
-        # Aplicar ordenamiento
-        if sort_by == 'product_name':
-            order_col = Product.name
-        elif sort_by == 'category':
-            order_col = Category.name
-        elif sort_by == 'sku':
-            order_col = Product.sku
-        else:  # created_at por defecto
-            order_col = InventoryAlert.created_at
-
-        if sort_order == 'desc':
-            query = query.order_by(order_col.desc().nullslast())
+        if keyset and cursor:
+            after_value, after_id = CriticalStockAlertService._decode_cursor(
+                cursor, is_datetime=sort_by not in sort_columns
+            )
+            if descending:
+                page_query = page_query.where(db.or_(
+                    sort_col < after_value, db.and_(sort_col == after_value, Product.id < after_id)
+                ))
+            else:
+                page_query = page_query.where(db.or_(
+                    sort_col > after_value, db.and_(sort_col == after_value, Product.id > after_id)
+                ))
+
+        if descending:
+            page_query = page_query.order_by(sort_col.desc(), Product.id.desc())
         else:
-            query = query.order_by(order_col.asc().nullsfirst())
+            page_query = page_query.order_by(sort_col.asc(), Product.id.asc())
 
-        # Paginación
-        total = query.count()
-        products_data = query.offset((page - 1) * per_page).limit(per_page).all()
+        if keyset:
+            # Una fila extra indica si hay más páginas
+            page_query = page_query.limit(per_page + 1)
+        else:
+            page_query = page_query.offset((page - 1) * per_page).limit(per_page)
+
+        page_rows = page_query.subquery('out_of_stock_page')
+        rows = db.session.execute(
+            select(
+                Product,
+                InventoryMovement,
+                page_rows.c.category_name,
+                page_rows.c.out_of_stock_since,
+                page_rows.c.sort_key,
+            ).join(
+                page_rows, Product.id == page_rows.c.product_id
+            ).outerjoin(
+                InventoryMovement, InventoryMovement.id == page_rows.c.last_movement_id
+            ).order_by(
+                page_rows.c.sort_key.desc() if descending else page_rows.c.sort_key.asc(),
+                Product.id.desc() if descending else Product.id.asc()
+            )
+        ).all()
+
+        has_more = keyset and len(rows) > per_page
+        rows = rows[:per_page]
 
         # Formatear resultados
         results = []
-        for product, out_of_stock_since, category_name in products_data:
-            # Obtener último movimiento que causó stock 0
-            last_movement = InventoryMovement.query.filter_by(
-                product_id=product.id
-            ).filter(
-                InventoryMovement.new_stock == 0
-            ).order_by(
-                InventoryMovement.created_at.desc()
-            ).first()
-
+        for product, last_movement, category_name, out_of_stock_since, _ in rows:
             product_data = {
                 'id': product.id,
                 'sku': product.sku,
@@ -193,6 +308,24 @@ class CriticalStockAlertService:
             }
             results.append(product_data)
 
+        if keyset:
+            last = rows[-1] if rows else None
+            return {
+                'products': results,
+                'pagination': {
+                    'per_page': per_page,
+                    'has_more': has_more,
+                    'next_cursor': (
+                        CriticalStockAlertService._encode_cursor(last.sort_key, last[0].id)
+                        if has_more else None
+                    ),
+                }
+            }
+
+        total = db.session.execute(
+            select(func.count(Product.id)).where(*conditions)
+        ).scalar() or 0
+
         return {
             'products': results,
             'pagination': {
@@ -311,43 +444,18 @@ class CriticalStockAlertService:
         }
 
     @staticmethod
-    def sync_existing_out_of_stock_products():
+    def sync_alerts():
         """
-        Sincroniza productos existentes sin stock que no tienen alerta (migración)
+        Sincroniza las alertas de todo el catálogo con el stock actual
 
-        Útil para crear alertas para productos que ya estaban en stock 0
-        antes de implementar esta funcionalidad.
+        Útil para crear alertas para productos que ya estaban sin stock (o
+        bajo el punto de reorden) antes de implementar esta funcionalidad, y
+        para resolver las que quedaron activas con stock recuperado. Un
+        UPDATE y un INSERT ... SELECT, sin cargar productos en memoria.
 
         Returns:
-            int: Número de alertas creadas
+            dict: {'created': alertas creadas, 'resolved': alertas resueltas}
         """
-        # Obtener productos sin stock que no tienen alerta activa
-        products_without_alerts = db.session.query(Product).outerjoin(
-            InventoryAlert,
-            db.and_(
-                InventoryAlert.product_id == Product.id,
-                InventoryAlert.alert_type == CriticalStockAlertService.ALERT_TYPE_OUT_OF_STOCK,
-                InventoryAlert.is_active == True
-            )
-        ).filter(
-            Product.stock_quantity == 0,
-            Product.is_active == True,
-            InventoryAlert.id.is_(None)
-        ).all()
-
-        alerts_created = 0
-        for product in products_without_alerts:
-            alert = InventoryAlert(
-                product_id=product.id,
-                alert_type=CriticalStockAlertService.ALERT_TYPE_OUT_OF_STOCK,
-                current_stock=0,
-                reorder_point=product.reorder_point,
-                is_active=True
-            )
-            db.session.add(alert)
-            alerts_created += 1
-
-        if alerts_created > 0:
-            db.session.commit()
-
-        return alerts_created
+        result = CriticalStockAlertService._sync_alerts()
+        db.session.commit()
+        return result
@@ -0,0 +1,348 @@
+"""
+Servicio del historial de compras de un cliente
+
+US-CUST-007: Historial de compras del cliente con filtros y métricas
+
+Métricas (CA-3), top de productos (CA-8) y gráfico mensual (CA-9) salen de
+una sola consulta: un CTE con los pedidos del cliente reutilizado por los
+tres agregados y combinado con UNION ALL. La página de pedidos (CA-2) carga
+items y productos en la misma query y usa el total del CTE (sin COUNT extra).
+"""
+import hashlib
+import math
+from datetime import datetime
+from sqlalchemy import func, case, cast, select, union_all, literal, null, and_, true, extract
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models.customer import Customer
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+
+ORDER_STATUS_CANCELLED = 'Cancelado'
+TOP_PRODUCTS_LIMIT = 10
+MONTHS_ES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun',
+             'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+
+# Columnas del UNION ALL de get_summary: cada rama (columna 'kind') llena las
+# suyas y deja NULL tipado en las demás
+SUMMARY_COLUMNS = (
+    # 'metrics'
+    ('total_orders', db.Integer),
+    ('non_cancelled_count', db.Integer),
+    ('total_spent', db.Numeric),
+    ('highest_ticket', db.Numeric),
+    ('lowest_ticket', db.Numeric),
+    ('first_order_at', db.DateTime),
+    ('last_order_at', db.DateTime),
+    # 'chart'
+    ('year', db.Integer),
+    ('month', db.Integer),
+    ('month_orders', db.Integer),
+    ('month_total', db.Numeric),
+    # 'top_product'
+    ('product_id', db.String),
+    ('name', db.String),
+    ('sku', db.String),
+    ('image_url', db.String),
+    ('times_ordered', db.Integer),
+    ('total_qty', db.Integer),
+    ('last_ordered', db.DateTime),
+)
+
+
+def _summary_branch(kind, **columns):
+    """Rama del UNION ALL con las columnas de SUMMARY_COLUMNS, en ese orden"""
+    return select(literal(kind).label('kind'), *(
+        columns[name].label(name) if name in columns else cast(null(), column_type).label(name)
+        for name, column_type in SUMMARY_COLUMNS
+    ))
+
+
+class CustomerOrderHistoryService:
+    """Consultas del historial de compras compartidas por el detalle y la exportación"""
+
+    @staticmethod
+    def parse_filters(args):
+        """
+        Leer los filtros del historial desde los query params
+
+        Args:
+            args: request.args (date_from, date_to, status, payment_status)
+
+        Returns:
+            dict: {date_from, date_to, statuses, payment_statuses}
+        """
+        date_from = None
+        date_to = None
+
+        # CA-4: Filtro por rango de fechas (fechas inválidas se ignoran)
+        raw_from = args.get('date_from', '').strip()
+        if raw_from:
+            try:
+                date_from = datetime.fromisoformat(raw_from)
+            except ValueError:
+                pass
+
+        raw_to = args.get('date_to', '').strip()
+        if raw_to:
+            try:
+                date_to = datetime.fromisoformat(raw_to + 'T23:59:59')
+            except ValueError:
+                pass
+
+        def _split(value):
+            return [s.strip() for s in value.split(',') if s.strip()]
+
+        return {
+            'date_from': date_from,
+            'date_to': date_to,
+            'statuses': _split(args.get('status', '').strip()),              # CA-5
+            'payment_statuses': _split(args.get('payment_status', '').strip()),  # CA-6
+        }
+
+    @staticmethod
+    def build_conditions(filters, columns=Order):
+        """
+        Condiciones de filtro sobre `columns` (el modelo Order o el CTE)
+
+        Args:
+            filters: dict de parse_filters()
+            columns: Objeto con created_at, status y payment_status
+
+        Returns:
+            list: Condiciones para filter()/where()
+        """
+        conditions = []
+        if filters['date_from']:
+            conditions.append(columns.created_at >= filters['date_from'])
+        if filters['date_to']:
+            conditions.append(columns.created_at <= filters['date_to'])
+        if filters['statuses']:
+            conditions.append(columns.status.in_(filters['statuses']))
+        if filters['payment_statuses']:
+            conditions.append(columns.payment_status.in_(filters['payment_statuses']))
+        return conditions
+
+    @staticmethod
+    def get_version(customer_id):
+        """
+        Huella barata del historial para ETag: cambia si cambia el cliente,
+        alguno de sus pedidos o un producto comprado.
+
+        Returns:
+            Row | None: (nombre_razon_social, version) o None si el cliente no existe
+        """
+        customer_orders = Order.customer_id == Customer.id
+        row = db.session.execute(
+            select(
+                Customer.nombre_razon_social,
+                Customer.updated_at,
+                select(func.count(Order.id)).where(customer_orders).scalar_subquery(),
+                select(func.max(Order.updated_at)).where(customer_orders).scalar_subquery(),
+                select(func.sum(Order.total)).where(customer_orders).scalar_subquery(),
+                select(func.max(Product.updated_at)).select_from(Order).join(
+                    OrderItem, OrderItem.order_id == Order.id
+                ).join(
+                    Product, Product.id == OrderItem.product_id
+                ).where(customer_orders).scalar_subquery(),
+            ).where(Customer.id == customer_id)
+        ).first()
+
+        if row is None:
+            return None
+        return row[0], '|'.join(str(value) for value in row[1:])
+
+    @staticmethod
+    def build_etag(customer_id, version, args):
+        """ETag débil a partir de la huella y de los query params de la vista"""
+        params = '&'.join(f'{key}={value}' for key, value in sorted(args.items(multi=True)))
+        raw = f'{customer_id}|{version}|{params}'
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_summary(customer_id, filters):
+        """
+        Métricas (CA-3), top productos (CA-8) y gráfico mensual (CA-9) en una consulta
+
+        Las métricas respetan los filtros; top productos y gráfico cubren
+        todo el historial del cliente, como en la vista original.
+
+        Returns:
+            dict: {metrics, top_products, chart_data}
+        """
+        orders = select(
+            Order.id,
+            Order.created_at,
+            Order.status,
+            Order.payment_status,
+            Order.total,
+        ).where(Order.customer_id == customer_id).cte('customer_orders')
+
+        conditions = CustomerOrderHistoryService.build_conditions(filters, orders.c)
+        filtered = and_(*conditions) if conditions else true()
+        non_cancelled = and_(filtered, orders.c.status != ORDER_STATUS_CANCELLED)
+
+        # CA-3: Métricas (los pedidos cancelados solo cuentan en total_orders)
+        metrics = _summary_branch(
+            'metrics',
+            total_orders=func.count(case((filtered, 1))),
+            non_cancelled_count=func.count(case((non_cancelled, 1))),
+            total_spent=func.sum(case((non_cancelled, orders.c.total))),
+            highest_ticket=func.max(case((non_cancelled, orders.c.total))),
+            lowest_ticket=func.min(case((non_cancelled, orders.c.total))),
+            first_order_at=func.min(case((non_cancelled, orders.c.created_at))),
+            last_order_at=func.max(case((non_cancelled, orders.c.created_at))),
+        ).select_from(orders)
+
+        # CA-9: Gráfico mensual (todos los pedidos del cliente)
+        year_col = extract('year', orders.c.created_at)
+        month_col = extract('month', orders.c.created_at)
+        chart = _summary_branch(
+            'chart',
+            year=year_col,
+            month=month_col,
+            month_orders=func.count(orders.c.id),
+            month_total=func.sum(orders.c.total),
+        ).select_from(orders).group_by(year_col, month_col)
+
+        # CA-8: Top productos más comprados (sin filtros de fecha/estado)
+        top = select(
+            Product.id.label('product_id'),
+            Product.name,
+            Product.sku,
+            Product.image_url,
+            func.count(func.distinct(orders.c.id)).label('times_ordered'),
+            func.sum(OrderItem.quantity).label('total_qty'),
+            func.max(orders.c.created_at).label('last_ordered'),
+        ).select_from(orders).join(
+            OrderItem, OrderItem.order_id == orders.c.id
+        ).join(
+            Product, Product.id == OrderItem.product_id
+        ).where(
+            orders.c.status != ORDER_STATUS_CANCELLED
+        ).group_by(
+            Product.id, Product.name, Product.sku, Product.image_url
+        ).order_by(func.sum(OrderItem.quantity).desc()).limit(TOP_PRODUCTS_LIMIT).subquery('top_products')
+
+        top_rows = _summary_branch(
+            'top_product',
+            product_id=top.c.product_id,
+            name=top.c.name,
+            sku=top.c.sku,
+            image_url=top.c.image_url,
+            times_ordered=top.c.times_ordered,
+            total_qty=top.c.total_qty,
+            last_ordered=top.c.last_ordered,
+        )
+
+        rows = db.session.execute(union_all(metrics, chart, top_rows)).all()
+
+        metrics_row = None
+        chart_data = []
+        top_products = []
+        for row in rows:
+            if row.kind == 'metrics':
+                metrics_row = row
+            elif row.kind == 'chart':
+                month = int(row.month)
+                chart_data.append({
+                    'period': f"{MONTHS_ES[month - 1]} {int(row.year)}",
+                    'year': int(row.year),
+                    'month': month,
+                    'total': float(row.month_total or 0),
+                    'count': int(row.month_orders or 0),
+                })
+            else:
+                top_products.append({
+                    'id': row.product_id,
+                    'name': row.name,
+                    'sku': row.sku,
+                    'image_url': row.image_url,
+                    'total_qty': int(row.total_qty or 0),
+                    'times_ordered': int(row.times_ordered or 0),
+                    'last_ordered': row.last_ordered.isoformat() if row.last_ordered else None,
+                })
+
+        chart_data.sort(key=lambda point: (point['year'], point['month']))
+        top_products.sort(key=lambda product: product['total_qty'], reverse=True)
+
+        return {
+            'metrics': CustomerOrderHistoryService._build_metrics(metrics_row),
+            'top_products': top_products,
+            'chart_data': chart_data,
+        }
+
+    @staticmethod
+    def _build_metrics(row):
+        total_orders = int(row.total_orders or 0) if row else 0
+        non_cancelled = int(row.non_cancelled_count or 0) if row else 0
+        total_spent = float(row.total_spent or 0) if row else 0.0
+
+        # Frecuencia (pedidos por mes)
+        freq_per_month = 0.0
+        if row and row.first_order_at and row.last_order_at and non_cancelled > 0:
+            first_dt, last_dt = row.first_order_at, row.last_order_at
+            months_diff = ((last_dt.year - first_dt.year) * 12 + (last_dt.month - first_dt.month)) or 1
+            freq_per_month = round(float(non_cancelled) / months_diff, 2)
+
+        return {
+            'total_orders': total_orders,
+            'non_cancelled_count': non_cancelled,
+            'total_spent': total_spent,
+            'average_order': total_spent / non_cancelled if non_cancelled else 0.0,
+            'highest_ticket': float(row.highest_ticket or 0) if row else 0.0,
+            'lowest_ticket': float(row.lowest_ticket or 0) if row else 0.0,
+            'frequency_per_month': freq_per_month,
+        }
+
+    @staticmethod
+    def get_orders_page(customer_id, filters, page, per_page, total):
+        """
+        CA-2: Página de pedidos (más recientes primero) con items y productos
+
+        Args:
+            total: Total filtrado (metrics['total_orders']), evita un COUNT
+
+        Returns:
+            tuple: (orders, pagination_dict)
+        """
+        page = max(page or 1, 1)
+        per_page = max(per_page or 1, 1)
+        offset = (page - 1) * per_page
+
+        orders = []
+        if offset < total:
+            orders = Order.query.filter(
+                Order.customer_id == customer_id,
+                *CustomerOrderHistoryService.build_conditions(filters)
+            ).options(
+                joinedload(Order.items).joinedload(OrderItem.product).load_only(Product.id, Product.image_url)
+            ).order_by(Order.created_at.desc()).offset(offset).limit(per_page).all()
+
+        return orders, {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': math.ceil(total / per_page) if total else 0,
+        }
+
+    @staticmethod
+    def serialize_order(order):
+        """Pedido del historial con sus items (relaciones ya cargadas)"""
+        return {
+            'id': order.id,
+            'order_number': order.order_number,
+            'created_at': order.created_at.isoformat() if order.created_at else None,
+            'status': order.status,
+            'payment_status': order.payment_status,
+            'items_count': len(order.items),
+            'items': [item.to_dict() for item in order.items],
+            'subtotal': float(order.subtotal or 0),
+            'tax_percentage': float(order.tax_percentage or 0),
+            'tax_amount': float(order.tax_amount or 0),
+            'shipping_cost': float(order.shipping_cost or 0),
+            'discount_amount': float(order.discount_amount or 0),
+            'total': float(order.total or 0),
+            'notes': order.notes,
+        }
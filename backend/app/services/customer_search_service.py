@@ -0,0 +1,49 @@
+"""
+Servicio de búsqueda de clientes
+
+US-CUST-002: Listar Clientes (búsqueda por nombre, correo, documento o teléfono)
+US-ORD-005: Búsqueda de pedidos por cliente
+
+Busca sobre `customers.search_text` (nombre y correo sin acentos en minúsculas,
+documento y teléfono solo dígitos). En PostgreSQL la columna tiene un índice
+GIN pg_trgm, por lo que LIKE '%term%' no recorre toda la tabla.
+"""
+from sqlalchemy import or_
+from app.models.customer import Customer
+from app.utils.search import normalize_text, digits_only, escape_like
+
+
+class CustomerSearchService:
+    """Construye el filtro de búsqueda de clientes compartido por listados y pedidos"""
+
+    # Mínimo de dígitos para buscar documento/teléfono ignorando separadores
+    MIN_DIGITS = 3
+
+    @staticmethod
+    def build_filter(term):
+        """
+        Condición booleana para filtrar clientes por el término de búsqueda
+
+        Args:
+            term: Texto de búsqueda (nombre, correo, documento o teléfono)
+
+        Returns:
+            ClauseElement | None: None si el término está vacío
+        """
+        normalized = normalize_text(term)
+        if not normalized:
+            return None
+
+        conditions = [
+            Customer.search_text.like(f'%{escape_like(normalized)}%', escape='\\')
+        ]
+
+        # '300 123-4567' debe encontrar el teléfono almacenado como '3001234567'.
+        # Solo aplica a términos numéricos: 'ab123' no debe buscar '123'
+        digits = digits_only(term)
+        is_numeric_term = not any(char.isalpha() for char in normalized)
+        if (is_numeric_term and len(digits) >= CustomerSearchService.MIN_DIGITS
+                and digits != normalized):
+            conditions.append(Customer.search_text.like(f'%{digits}%'))
+
+        return or_(*conditions)
@@ -3,10 +3,38 @@ CustomerSegmentationService - Lógica de segmentación de clientes
 US-CUST-011
 
 Calcula y persiste la categoría de cada cliente (VIP, Frecuente, Regular)
-basándose en el monto total gastado en pedidos no cancelados.
+basándose en el monto total gastado en pedidos no cancelados, leído de los
+acumulados precalculados en customer_stats (ver CustomerStatsService).
 """
+import copy
+import time
+from datetime import datetime
+from flask import current_app, has_app_context
 from app import db
-from sqlalchemy import func
+from sqlalchemy import (
+    func, case, cast, select, insert, update, union_all, literal, null, event, inspect
+)
+from sqlalchemy.orm import Session
+from app.utils.metrics import record_cache
+from app.utils.sql import uuid_expression, advisory_lock
+
+# Clientes por bloque en el recálculo masivo
+RECALCULATE_BATCH_SIZE = 5000
+
+# Lock de base de datos que hace exclusivo el recálculo entre workers
+RECALCULATE_LOCK_NAME = 'customer_segmentation_recalculate'
+
+CATEGORIES = ['VIP', 'Frecuente', 'Regular']
+TOP_VIP_LIMIT = 10
+
+# Caché del dashboard (por app) e indicador de sesión para invalidarla al confirmar
+_CACHE_KEY = 'segmentation_stats_cache'
+_STALE_FLAG = 'segmentation_stats_stale'
+
+
+class SegmentationRecalculationInProgress(Exception):
+    """Otro proceso ya está recalculando las categorías de clientes"""
+    pass
 
 
 def calculate_and_update_category(customer_id, order_id=None, commit=True):
@@ -23,7 +51,6 @@ def calculate_and_update_category(customer_id, order_id=None, commit=True):
         dict: { 'category': str, 'total_spent': float, 'changed': bool }
     """
     from app.models.customer import Customer
-    from app.models.order import Order
     from app.models.customer_segmentation_config import CustomerSegmentationConfig
     from app.models.customer_category_history import CustomerCategoryHistory
 
@@ -33,12 +60,8 @@ def calculate_and_update_category(customer_id, order_id=None, commit=True):
 
     config = CustomerSegmentationConfig.get_config()
 
-    # Sumar pedidos no cancelados
-    total_spent = db.session.query(func.sum(Order.total)).filter(
-        Order.customer_id == customer_id,
-        Order.status != 'Cancelado'
-    ).scalar() or 0
-    total_spent = float(total_spent)
+    # Gasto acumulado precalculado (customer_stats)
+    total_spent = float(customer.stats.total_spent or 0) if customer.stats else 0.0
 
     # Determinar nueva categoría
     if total_spent >= float(config.vip_threshold):
@@ -76,123 +99,308 @@ def calculate_and_update_category(customer_id, order_id=None, commit=True):
     }
 
 
-def recalculate_all_categories():
+def category_expression(total_spent, config):
     """
-    Recalcula la categoría de todos los clientes activos.
+    Expresión SQL CASE que asigna la categoría según los umbrales vigentes.
+    Misma regla que calculate_and_update_category().
+
+    Args:
+        total_spent: Columna/expresión con el monto gastado (no nula)
+        config: CustomerSegmentationConfig
+
+    Returns:
+        ColumnElement con 'VIP', 'Frecuente' o 'Regular'
+    """
+    return case(
+        (total_spent >= config.vip_threshold, 'VIP'),
+        (total_spent >= config.frequent_threshold, 'Frecuente'),
+        else_='Regular',
+    )
+
+
+def _chunk_upper_bound(lower_id, batch_size):
+    """Último id del siguiente bloque de clientes (keyset), None si es el último bloque"""
+    from app.models.customer import Customer
+
+    query = db.session.query(Customer.id)
+    if lower_id is not None:
+        query = query.filter(Customer.id > lower_id)
+    return query.order_by(Customer.id).offset(batch_size - 1).limit(1).scalar()
+
+
+def _recalculate_chunk(config, lower_id, upper_id, created_at):
+    """
+    Recalcula un bloque de clientes (lower_id, upper_id] con tres sentencias:
+    INSERT ... SELECT del historial, UPDATE ... FROM de la categoría y COUNT del bloque.
+
+    Returns:
+        tuple: (procesados, cambiados)
+    """
+    from app.models.customer import Customer
+    from app.models.customer_stats import CustomerStats
+    from app.models.customer_category_history import CustomerCategoryHistory
+
+    customer_range = []
+    if lower_id is not None:
+        customer_range.append(Customer.id > lower_id)
+    if upper_id is not None:
+        customer_range.append(Customer.id <= upper_id)
+
+    # Gasto acumulado precalculado (customer_stats)
+    total_spent = func.coalesce(CustomerStats.total_spent, 0)
+    new_category = category_expression(total_spent, config)
+
+    # Solo los clientes cuya categoría cambia
+    changes = select(
+        Customer.id.label('customer_id'),
+        Customer.customer_category.label('old_category'),
+        new_category.label('new_category'),
+        total_spent.label('total_spent'),
+    ).select_from(Customer).outerjoin(
+        CustomerStats, CustomerStats.customer_id == Customer.id
+    ).where(
+        Customer.customer_category != new_category,
+        *customer_range
+    )
+
+    # CA-8: historial solo de cambios, en un INSERT ... SELECT
+    history = CustomerCategoryHistory.__table__
+    changes_for_history = changes.subquery('changes')
+    inserted = db.session.execute(
+        insert(history).from_select(
+            ['id', 'customer_id', 'old_category', 'new_category', 'order_id', 'total_spent', 'created_at'],
+            select(
+                uuid_expression(),
+                changes_for_history.c.customer_id,
+                changes_for_history.c.old_category,
+                changes_for_history.c.new_category,
+                null(),
+                changes_for_history.c.total_spent,
+                literal(created_at, type_=db.DateTime),
+            )
+        )
+    )
+    changed = inserted.rowcount or 0
+
+    # Asignar categorías con un único UPDATE ... FROM
+    if changed:
+        mark_segmentation_stats_stale()
+        changes_for_update = changes.subquery('changes')
+        db.session.execute(
+            update(Customer.__table__).values(
+                customer_category=changes_for_update.c.new_category
+            ).where(
+                Customer.__table__.c.id == changes_for_update.c.customer_id
+            )
+        )
+
+    processed = db.session.query(func.count(Customer.id)).filter(*customer_range).scalar() or 0
+    return processed, changed
+
+
+def recalculate_all_categories(progress_callback=None, batch_size=RECALCULATE_BATCH_SIZE):
+    """
+    Recalcula la categoría de todos los clientes por bloques de `batch_size`.
     Usado cuando el Admin cambia los umbrales de segmentación.
 
+    Cada bloque lee el gasto de customer_stats, registra el historial
+    de los cambios con INSERT ... SELECT y actualiza con UPDATE ... FROM, y se
+    confirma por separado para no bloquear la tabla de clientes.
+
+    La corrida completa toma un lock de base de datos: dos workers que
+    recalculen a la vez duplicarían el historial de los mismos cambios.
+
+    Args:
+        progress_callback (callable|None): progress_callback(procesados, total)
+        batch_size (int): Clientes por bloque
+
     Returns:
         dict: { 'updated': int, 'changed': int }
+
+    Raises:
+        SegmentationRecalculationInProgress: Si otro proceso tiene el lock
     """
+    with advisory_lock(RECALCULATE_LOCK_NAME) as acquired:
+        if not acquired:
+            raise SegmentationRecalculationInProgress(
+                'Ya hay un recálculo de categorías en curso'
+            )
+        return _recalculate_all_chunks(progress_callback, batch_size)
+
+
+def _recalculate_all_chunks(progress_callback, batch_size):
+    """Recorrer todos los bloques de clientes (llamar con el lock tomado)"""
     from app.models.customer import Customer
+    from app.models.customer_segmentation_config import CustomerSegmentationConfig
+
+    config = CustomerSegmentationConfig.get_config()
+    total = db.session.query(func.count(Customer.id)).scalar() or 0
+    created_at = datetime.utcnow()
 
-    customers = Customer.query.all()
     updated = 0
     changed = 0
+    lower_id = None
+
+    if progress_callback:
+        progress_callback(0, total)
+
+    while True:
+        upper_id = _chunk_upper_bound(lower_id, batch_size)
+        processed, chunk_changed = _recalculate_chunk(config, lower_id, upper_id, created_at)
+        db.session.commit()
 
-    for customer in customers:
-        result = calculate_and_update_category(customer.id, commit=False)
-        if result:
-            updated += 1
-            if result['changed']:
-                changed += 1
+        updated += processed
+        changed += chunk_changed
+        if progress_callback:
+            progress_callback(updated, max(total, updated))
 
-    db.session.commit()
+        if upper_id is None:
+            break
+        lower_id = upper_id
+
+    # Los objetos Customer en sesión no ven el UPDATE masivo
+    db.session.expire_all()
     return {'updated': updated, 'changed': changed}
 
 
-def get_segmentation_stats():
+def mark_segmentation_stats_stale(session=None):
     """
-    Retorna estadísticas de segmentación para el dashboard.
-
-    Returns:
-        dict con distribución, métricas por categoría y top VIP clientes
+    Marcar la caché del dashboard como obsoleta al confirmar la transacción.
+    Llamar desde cualquier cambio de gasto, categorías o umbrales.
     """
+    (session or db.session).info[_STALE_FLAG] = True
+
+
+def invalidate_segmentation_stats_cache():
+    """Descartar de inmediato las estadísticas en caché de la app actual"""
+    if has_app_context():
+        current_app.extensions.pop(_CACHE_KEY, None)
+
+
+@event.listens_for(Session, 'before_flush')
+def _detect_customer_changes(session, flush_context, instances):
+    """Altas/bajas de clientes, cambios de categoría o de umbrales alteran el dashboard"""
     from app.models.customer import Customer
     from app.models.customer_segmentation_config import CustomerSegmentationConfig
 
-    config = CustomerSegmentationConfig.get_config()
+    for obj in session.new | session.deleted:
+        if isinstance(obj, (Customer, CustomerSegmentationConfig)):
+            mark_segmentation_stats_stale(session)
+            return
+    for obj in session.dirty:
+        if isinstance(obj, CustomerSegmentationConfig) or (
+            isinstance(obj, Customer) and inspect(obj).attrs.customer_category.history.has_changes()
+        ):
+            mark_segmentation_stats_stale(session)
+            return
 
-    # Distribución de categorías
-    distribution_query = db.session.query(
-        Customer.customer_category,
-        func.count(Customer.id).label('count')
-    ).group_by(Customer.customer_category).all()
 
-    distribution = {row.customer_category: row.count for row in distribution_query}
-    total_customers = sum(distribution.values())
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop(_STALE_FLAG, False):
+        invalidate_segmentation_stats_cache()
 
-    categories = ['VIP', 'Frecuente', 'Regular']
-    distribution_data = []
-    for cat in categories:
-        count = distribution.get(cat, 0)
-        distribution_data.append({
-            'category': cat,
-            'count': count,
-            'percentage': round(count / total_customers * 100, 1) if total_customers > 0 else 0,
-        })
 
-    # Métricas por categoría: total gastado y promedio (de customers con datos reales)
-    # Calculamos a partir del campo total_purchases sumado en la vista de lista
-    # Por eficiencia, lo leemos del customer_category_history o directamente de orders
-    from app.models.order import Order
+@event.listens_for(Session, 'after_rollback')
+def _discard_stale_flag(session):
+    session.info.pop(_STALE_FLAG, None)
 
-    metrics_query = db.session.query(
-        Customer.customer_category,
-        func.count(Customer.id).label('count'),
-        func.sum(Order.total).label('total_spent'),
-    ).outerjoin(
-        Order,
-        (Order.customer_id == Customer.id) & (Order.status != 'Cancelado')
-    ).group_by(Customer.customer_category).all()
+
+def _query_segmentation_rows():
+    """
+    Distribución, métricas y top VIP en una sola consulta (UNION ALL).
+    El gasto sale de customer_stats: una fila por cliente, sin fan-out de pedidos.
+    """
+    from app.models.customer import Customer
+    from app.models.customer_stats import CustomerStats
+
+    total_spent = func.coalesce(CustomerStats.total_spent, 0)
+
+    by_category = select(
+        literal('category').label('kind'),
+        Customer.customer_category.label('category'),
+        func.count(Customer.id).label('customer_count'),
+        func.sum(total_spent).label('total_spent'),
+        cast(null(), db.String).label('customer_id'),
+        cast(null(), db.String).label('nombre_razon_social'),
+        cast(null(), db.String).label('correo'),
+        cast(null(), db.Integer).label('order_count'),
+    ).select_from(Customer).outerjoin(
+        CustomerStats, CustomerStats.customer_id == Customer.id
+    ).group_by(Customer.customer_category)
+
+    top_vip = select(
+        Customer.id.label('customer_id'),
+        Customer.nombre_razon_social,
+        Customer.correo,
+        CustomerStats.total_spent,
+        CustomerStats.order_count,
+    ).join(
+        CustomerStats, CustomerStats.customer_id == Customer.id
+    ).where(
+        Customer.customer_category == 'VIP',
+        CustomerStats.order_count > 0
+    ).order_by(CustomerStats.total_spent.desc()).limit(TOP_VIP_LIMIT).subquery('top_vip')
+
+    top_vip_rows = select(
+        literal('top_vip'),
+        literal('VIP'),
+        cast(null(), db.Integer),
+        top_vip.c.total_spent,
+        top_vip.c.customer_id,
+        top_vip.c.nombre_razon_social,
+        top_vip.c.correo,
+        top_vip.c.order_count,
+    )
+
+    return db.session.execute(union_all(by_category, top_vip_rows)).all()
+
+
+def _build_segmentation_stats():
+    from app.models.customer_segmentation_config import CustomerSegmentationConfig
+
+    config = CustomerSegmentationConfig.get_config()
+    rows = _query_segmentation_rows()
 
     metrics = {}
-    for row in metrics_query:
-        cat = row.customer_category
-        count = int(row.count or 0)
-        total = float(row.total_spent or 0)
-        avg = round(total / count, 2) if count > 0 else 0.0
-        metrics[cat] = {
-            'count': count,
-            'total_spent': total,
-            'avg_spent': avg,
-        }
+    top_vip = []
+    for row in rows:
+        if row.kind == 'category':
+            count = int(row.customer_count or 0)
+            total = float(row.total_spent or 0)
+            metrics[row.category] = {
+                'count': count,
+                'total_spent': total,
+                'avg_spent': round(total / count, 2) if count > 0 else 0.0,
+            }
+        else:
+            top_vip.append({
+                'id': row.customer_id,
+                'nombre_razon_social': row.nombre_razon_social,
+                'correo': row.correo,
+                'total_spent': float(row.total_spent or 0),
+                'order_count': int(row.order_count or 0),
+            })
+
+    # El UNION no garantiza el orden del subquery
+    top_vip.sort(key=lambda customer: customer['total_spent'], reverse=True)
+
+    total_customers = sum(m['count'] for m in metrics.values())
 
+    distribution_data = []
     metrics_data = []
-    for cat in categories:
+    for cat in CATEGORIES:
         m = metrics.get(cat, {'count': 0, 'total_spent': 0.0, 'avg_spent': 0.0})
+        distribution_data.append({
+            'category': cat,
+            'count': m['count'],
+            'percentage': round(m['count'] / total_customers * 100, 1) if total_customers > 0 else 0,
+        })
         metrics_data.append({
             'category': cat,
             **m,
         })
 
-    # Top 10 clientes VIP por gasto total
-    top_vip_query = db.session.query(
-        Customer.id,
-        Customer.nombre_razon_social,
-        Customer.correo,
-        Customer.customer_category,
-        func.sum(Order.total).label('total_spent'),
-        func.count(Order.id).label('order_count'),
-    ).join(
-        Order,
-        (Order.customer_id == Customer.id) & (Order.status != 'Cancelado')
-    ).filter(
-        Customer.customer_category == 'VIP'
-    ).group_by(
-        Customer.id, Customer.nombre_razon_social, Customer.correo, Customer.customer_category
-    ).order_by(
-        func.sum(Order.total).desc()
-    ).limit(10).all()
-
-    top_vip = [{
-        'id': row.id,
-        'nombre_razon_social': row.nombre_razon_social,
-        'correo': row.correo,
-        'total_spent': float(row.total_spent or 0),
-        'order_count': int(row.order_count or 0),
-    } for row in top_vip_query]
-
     return {
         'distribution': distribution_data,
         'metrics': metrics_data,
@@ -200,3 +408,29 @@ def get_segmentation_stats():
         'total_customers': total_customers,
         'config': config.to_dict(),
     }
+
+
+def get_segmentation_stats():
+    """
+    Retorna estadísticas de segmentación para el dashboard.
+
+    Se calcula con una sola consulta y queda en caché hasta que cambian
+    pedidos, categorías o umbrales (o vence SEGMENTATION_STATS_CACHE_TTL).
+
+    Returns:
+        dict con distribución, métricas por categoría y top VIP clientes
+    """
+    cached = current_app.extensions.get(_CACHE_KEY)
+    hit = bool(cached and cached['expires_at'] > time.monotonic())
+    record_cache('segmentation_stats', hit)
+    if hit:
+        return copy.deepcopy(cached['value'])
+
+    stats = _build_segmentation_stats()
+    ttl = current_app.config.get('SEGMENTATION_STATS_CACHE_TTL', 300)
+    if ttl:
+        current_app.extensions[_CACHE_KEY] = {
+            'value': stats,
+            'expires_at': time.monotonic() + ttl,
+        }
+    return copy.deepcopy(stats)
@@ -0,0 +1,211 @@
+"""
+Servicio de acumulados de compra por cliente
+
+US-CUST-002: Listado de clientes con total de compras
+US-CUST-011: Segmentación por gasto total
+US-CUST-012: Exportación con estadísticas de pedidos
+
+OrderService y ReturnService llaman a los métodos record_* dentro de su
+transacción. Cada delta es un UPDATE atómico sobre customer_stats
+(total_spent = total_spent + :delta), sin leer-modificar-escribir en Python,
+por lo que pedidos concurrentes del mismo cliente no pierden actualizaciones.
+
+rebuild() recalcula desde pedidos y devoluciones (backfill o conciliación).
+"""
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import func, case, select, update, delete, insert, literal
+from app import db
+from app.models.customer import Customer
+from app.models.customer_stats import CustomerStats
+from app.models.order import Order
+from app.models.return_order import Return
+from app.services.customer_segmentation_service import mark_segmentation_stats_stale
+
+ORDER_STATUS_CANCELLED = 'Cancelado'
+RETURN_STATUS_APPROVED = 'Aprobada'
+
+
+def _to_decimal(value):
+    return Decimal(str(value)) if value is not None else Decimal('0')
+
+
+class CustomerStatsService:
+    """Mantenimiento por delta y reconstrucción de customer_stats"""
+
+    @staticmethod
+    def apply_delta(customer_id, spent_delta=0, count_delta=0, order_date=None, recompute_dates=False):
+        """
+        Aplicar un delta atómico a los acumulados de un cliente
+
+        Args:
+            customer_id: ID del cliente
+            spent_delta: Monto a sumar (negativo para restar)
+            count_delta: Pedidos a sumar (+1 creación, -1 cancelación)
+            order_date: Fecha del pedido agregado (amplía primera/última compra)
+            recompute_dates: Recalcular primera/última compra desde pedidos
+                (necesario al quitar un pedido)
+        """
+        # Los cambios pendientes del pedido deben ser visibles para las subconsultas
+        db.session.flush()
+        mark_segmentation_stats_stale()
+
+        table = CustomerStats.__table__
+        values = {
+            'total_spent': table.c.total_spent + _to_decimal(spent_delta),
+            'order_count': table.c.order_count + count_delta,
+            'updated_at': datetime.utcnow(),
+        }
+
+        if recompute_dates:
+            active_orders = (Order.customer_id == customer_id) & (Order.status != ORDER_STATUS_CANCELLED)
+            values['first_order_at'] = (
+                select(func.min(Order.created_at)).where(active_orders).scalar_subquery()
+            )
+            values['last_order_at'] = (
+                select(func.max(Order.created_at)).where(active_orders).scalar_subquery()
+            )
+        elif order_date is not None:
+            values['first_order_at'] = case(
+                ((table.c.first_order_at == None) | (table.c.first_order_at > order_date), order_date),
+                else_=table.c.first_order_at
+            )
+            values['last_order_at'] = case(
+                ((table.c.last_order_at == None) | (table.c.last_order_at < order_date), order_date),
+                else_=table.c.last_order_at
+            )
+
+        result = db.session.execute(
+            update(table).where(table.c.customer_id == customer_id).values(**values)
+        )
+
+        # Cliente sin fila (datos previos a la tabla): reconstruir desde pedidos,
+        # que ya incluyen el cambio actual
+        if result.rowcount == 0:
+            CustomerStatsService.rebuild([customer_id])
+
+    @staticmethod
+    def record_order_created(order):
+        """US-ORD-001: Pedido nuevo suma su total y un pedido"""
+        CustomerStatsService.apply_delta(
+            order.customer_id,
+            spent_delta=order.total,
+            count_delta=1,
+            order_date=order.created_at
+        )
+
+    @staticmethod
+    def record_order_updated(order, previous_customer_id, previous_total):
+        """
+        US-ORD-008: Edición de pedido (cambio de total y/o de cliente)
+
+        Args:
+            order: Pedido ya actualizado
+            previous_customer_id: Cliente antes de la edición
+            previous_total: Total antes de la edición
+        """
+        new_total = _to_decimal(order.total)
+        previous_total = _to_decimal(previous_total)
+
+        if previous_customer_id == order.customer_id:
+            if new_total != previous_total:
+                CustomerStatsService.apply_delta(order.customer_id, spent_delta=new_total - previous_total)
+            return
+
+        CustomerStatsService.apply_delta(
+            previous_customer_id,
+            spent_delta=-previous_total,
+            count_delta=-1,
+            recompute_dates=True
+        )
+        CustomerStatsService.apply_delta(
+            order.customer_id,
+            spent_delta=new_total,
+            count_delta=1,
+            order_date=order.created_at
+        )
+
+    @staticmethod
+    def record_order_cancelled(order):
+        """US-ORD-009: Pedido cancelado deja de contar (los entregados no se cancelan)"""
+        CustomerStatsService.apply_delta(
+            order.customer_id,
+            spent_delta=-_to_decimal(order.total),
+            count_delta=-1,
+            recompute_dates=True
+        )
+
+    @staticmethod
+    def record_return_approved(return_obj):
+        """US-ORD-011: Devolución aprobada descuenta su monto del gasto"""
+        CustomerStatsService.apply_delta(
+            return_obj.order.customer_id,
+            spent_delta=-_to_decimal(return_obj.total_amount)
+        )
+
+    @staticmethod
+    def rebuild(customer_ids=None):
+        """
+        Recalcular acumulados desde pedidos y devoluciones (set-based)
+
+        Args:
+            customer_ids: Lista de clientes a reconstruir (None = todos)
+
+        Returns:
+            int: Filas escritas
+        """
+        order_filters = [Order.status != ORDER_STATUS_CANCELLED]
+        customer_filters = []
+        if customer_ids is not None:
+            customer_ids = list(customer_ids)
+            if not customer_ids:
+                return 0
+            order_filters.append(Order.customer_id.in_(customer_ids))
+            customer_filters.append(Customer.id.in_(customer_ids))
+
+        orders_agg = select(
+            Order.customer_id.label('customer_id'),
+            func.sum(Order.total).label('spent'),
+            func.count(Order.id).label('order_count'),
+            func.min(Order.created_at).label('first_order_at'),
+            func.max(Order.created_at).label('last_order_at'),
+        ).where(*order_filters).group_by(Order.customer_id).subquery('orders_agg')
+
+        returns_agg = select(
+            Order.customer_id.label('customer_id'),
+            func.sum(Return.total_amount).label('returned'),
+        ).join(Order, Return.order_id == Order.id).where(
+            Return.status == RETURN_STATUS_APPROVED,
+            *order_filters
+        ).group_by(Order.customer_id).subquery('returns_agg')
+
+        rows = select(
+            Customer.id,
+            func.coalesce(orders_agg.c.spent, 0) - func.coalesce(returns_agg.c.returned, 0),
+            func.coalesce(orders_agg.c.order_count, 0),
+            orders_agg.c.first_order_at,
+            orders_agg.c.last_order_at,
+            literal(datetime.utcnow(), type_=db.DateTime),
+        ).select_from(Customer).outerjoin(
+            orders_agg, orders_agg.c.customer_id == Customer.id
+        ).outerjoin(
+            returns_agg, returns_agg.c.customer_id == Customer.id
+        ).where(*customer_filters)
+
+        mark_segmentation_stats_stale()
+
+        table = CustomerStats.__table__
+        delete_stmt = delete(table)
+        if customer_ids is not None:
+            delete_stmt = delete_stmt.where(table.c.customer_id.in_(customer_ids))
+        db.session.execute(delete_stmt)
+
+        result = db.session.execute(
+            insert(table).from_select(
+                ['customer_id', 'total_spent', 'order_count', 'first_order_at', 'last_order_at', 'updated_at'],
+                rows
+            )
+        )
+        # Las instancias en sesión no ven el INSERT masivo
+        db.session.expire_all()
+        return result.rowcount or 0
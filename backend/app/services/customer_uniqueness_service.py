@@ -0,0 +1,215 @@
+"""
+Servicio de sondeo de unicidad de clientes
+
+US-CUST-001 CA-4/CA-5: El formulario valida documento y correo en cada
+pulsación (check-documento / check-correo). Casi todos los valores sondeados
+están libres, así que un filtro de Bloom por proceso responde esos casos sin
+tocar la base de datos; solo "puede existir" consulta la tabla.
+
+Ciclo de vida del filtro:
+- Se carga con una query completa al primer uso (única carga en la petición).
+- Recibe cada cliente insertado o actualizado en este proceso.
+- Cada CUSTOMER_UNIQUENESS_SYNC_INTERVAL segundos un sondeo agrega los
+  clientes con updated_at posterior a la última sincronización (índice
+  ix_customers_updated_at, pocas filas): así recoge las altas de otros
+  workers. Si otro hilo ya está sincronizando, el sondeo no espera.
+- Cada CUSTOMER_UNIQUENESS_FILTER_TTL segundos (o si se satura) se
+  reconstruye en segundo plano para descartar valores viejos; mientras
+  tanto se sigue sirviendo el filtro actual.
+
+Los valores viejos (edición o borrado) solo producen falsos positivos, que
+terminan en la consulta normal. Un valor registrado por otro proceso puede
+responder "disponible" durante como mucho el intervalo de sincronización;
+el sondeo es orientativo y la validación al crear/editar sigue yendo
+siempre a la base de datos (y al índice único), que rechaza el duplicado.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import select, func
+from app import db
+from app.models.customer import Customer
+from app.utils.bloom_filter import BloomFilter
+from app.utils.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+_FILTER_KEY = 'customer_uniqueness_filter'
+_BUILD_LOCK = threading.Lock()
+_SYNC_LOCK = threading.Lock()
+
+# Holgura sobre el total actual para absorber altas antes de reconstruir
+CAPACITY_FACTOR = 2
+MIN_CAPACITY = 1000
+FALSE_POSITIVE_RATE = 0.01
+
+# La sincronización relee este margen hacia atrás: cubre transacciones que
+# confirman después de fijar su updated_at
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def normalize_documento(numero_documento):
+    return (numero_documento or '').strip()
+
+
+def normalize_correo(correo):
+    return (correo or '').strip().lower()
+
+
+class CustomerUniquenessService:
+    """Filtros de Bloom de documentos y correos registrados"""
+
+    @staticmethod
+    def _ttl():
+        return current_app.config.get('CUSTOMER_UNIQUENESS_FILTER_TTL', 3600)
+
+    @staticmethod
+    def _sync_interval():
+        return current_app.config.get('CUSTOMER_UNIQUENESS_SYNC_INTERVAL', 5)
+
+    @staticmethod
+    def _build():
+        """Cargar todos los documentos y correos en dos filtros nuevos"""
+        # Marca tomada antes de leer: lo que cambie durante la carga lo recoge la sincronización
+        synced_at = datetime.utcnow()
+        total = db.session.execute(select(func.count(Customer.id))).scalar() or 0
+        capacity = max(total * CAPACITY_FACTOR, MIN_CAPACITY)
+        documentos = BloomFilter(capacity, FALSE_POSITIVE_RATE)
+        correos = BloomFilter(capacity, FALSE_POSITIVE_RATE)
+
+        rows = db.session.execute(
+            select(Customer.numero_documento, Customer.correo).execution_options(yield_per=5000)
+        )
+        for numero_documento, correo in rows:
+            documentos.add(normalize_documento(numero_documento))
+            correos.add(normalize_correo(correo))
+
+        now = time.monotonic()
+        return {
+            'documentos': documentos,
+            'correos': correos,
+            'built_at': now,
+            'synced_at': synced_at,
+            'synced_monotonic': now,
+            'rebuilding': False,
+        }
+
+    @staticmethod
+    def _rebuild_in_background(app):
+        """Reconstruir los filtros fuera de la petición y reemplazar los actuales"""
+        with app.app_context():
+            try:
+                filters = CustomerUniquenessService._build()
+                app.extensions[_FILTER_KEY] = filters
+            except Exception:
+                logger.exception('No se pudo reconstruir el filtro de unicidad de clientes')
+                current = app.extensions.get(_FILTER_KEY)
+                if current is not None:
+                    current['rebuilding'] = False
+            finally:
+                db.session.remove()
+
+    @staticmethod
+    def _schedule_rebuild(filters):
+        from app import socketio
+
+        with _BUILD_LOCK:
+            if filters['rebuilding']:
+                return
+            filters['rebuilding'] = True
+        app = current_app._get_current_object()
+        socketio.start_background_task(CustomerUniquenessService._rebuild_in_background, app)
+
+    @staticmethod
+    def _sync(filters):
+        """Agregar los clientes modificados desde la última sincronización (sin esperar a otro hilo)"""
+        if time.monotonic() - filters['synced_monotonic'] < CustomerUniquenessService._sync_interval():
+            return
+        if not _SYNC_LOCK.acquire(blocking=False):
+            return
+        try:
+            synced_at = datetime.utcnow()
+            rows = db.session.execute(
+                select(Customer.numero_documento, Customer.correo).where(
+                    Customer.updated_at >= filters['synced_at'] - SYNC_OVERLAP
+                )
+            )
+            for numero_documento, correo in rows:
+                filters['documentos'].add(normalize_documento(numero_documento))
+                filters['correos'].add(normalize_correo(correo))
+            filters['synced_at'] = synced_at
+            filters['synced_monotonic'] = time.monotonic()
+        finally:
+            _SYNC_LOCK.release()
+
+    @staticmethod
+    def _get_filters():
+        """Filtros vigentes del proceso, o None si están desactivados (TTL 0)"""
+        ttl = CustomerUniquenessService._ttl()
+        if ttl <= 0:
+            return None
+
+        filters = current_app.extensions.get(_FILTER_KEY)
+        if filters is None:
+            with _BUILD_LOCK:
+                filters = current_app.extensions.get(_FILTER_KEY)
+                if filters is None:
+                    filters = CustomerUniquenessService._build()
+                    current_app.extensions[_FILTER_KEY] = filters
+            return filters
+
+        if not CustomerUniquenessService._is_fresh(filters, ttl):
+            CustomerUniquenessService._schedule_rebuild(filters)
+        CustomerUniquenessService._sync(filters)
+        return filters
+
+    @staticmethod
+    def _is_fresh(filters, ttl):
+        return (
+            time.monotonic() - filters['built_at'] < ttl
+            and not filters['documentos'].is_saturated
+        )
+
+    @staticmethod
+    def might_exist_documento(numero_documento):
+        """
+        False si el documento no está registrado
+
+        También False si lo registró otro proceso después de la última
+        sincronización del filtro (ver docstring del módulo).
+        """
+        filters = CustomerUniquenessService._get_filters()
+        maybe = filters is None or normalize_documento(numero_documento) in filters['documentos']
+        record_cache('customer_uniqueness', not maybe)
+        return maybe
+
+    @staticmethod
+    def might_exist_correo(correo):
+        """
+        False si el correo (sin distinguir mayúsculas) no está registrado
+
+        También False si lo registró otro proceso después de la última
+        sincronización del filtro (ver docstring del módulo).
+        """
+        filters = CustomerUniquenessService._get_filters()
+        maybe = filters is None or normalize_correo(correo) in filters['correos']
+        record_cache('customer_uniqueness', not maybe)
+        return maybe
+
+    @staticmethod
+    def register(numero_documento, correo):
+        """Agregar un cliente creado/actualizado a los filtros ya cargados"""
+        if not has_app_context():
+            return
+        filters = current_app.extensions.get(_FILTER_KEY)
+        if filters is None:
+            return
+        filters['documentos'].add(normalize_documento(numero_documento))
+        filters['correos'].add(normalize_correo(correo))
+
+    @staticmethod
+    def reset():
+        """Descartar los filtros (se reconstruyen en el próximo sondeo)"""
+        current_app.extensions.pop(_FILTER_KEY, None)
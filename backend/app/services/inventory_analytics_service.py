@@ -0,0 +1,263 @@
+"""
+Analítica de inventario: rotación, días de inventario, sell-through y ABC
+
+US-INV-005 CA-5: Métricas adicionales del inventario
+
+Sobre una ventana de INVENTORY_ANALYTICS_WINDOW_DAYS días, por producto:
+- COGS: unidades vendidas en pedidos no cancelados × costo actual
+- Inventario promedio: (stock al inicio de la ventana + stock actual) / 2 × costo;
+  el stock inicial sale del cambio neto en movement_daily_rollup
+- Rotación = COGS / inventario promedio; DIO = días de la ventana / rotación
+- Sell-through = unidades vendidas / (vendidas + stock actual)
+- Clase ABC por participación acumulada en el COGS (A hasta 80 %, B hasta 95 %)
+
+Todo sale de una sola consulta (productos + agregados de order_items y del
+rollup) y una pasada en Python; los agregados por categoría y totales se
+derivan de la misma pasada. El resultado queda en caché por proceso
+(INVENTORY_ANALYTICS_CACHE_TTL) y se recalcula con el trabajo
+'inventory_analytics_refresh'. Las lecturas devuelven los objetos de la
+caché sin copiarlos: los llamadores no deben modificarlos. La caché no se invalida con cada pedido o
+movimiento: la ventana es de meses y un TTL de minutos basta.
+"""
+import copy
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select
+from app import db
+from app.models.category import Category
+from app.models.movement_daily_rollup import MovementDailyRollup
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.utils.metrics import record_cache
+
+REFRESH_JOB = 'inventory_analytics_refresh'
+
+_CACHE_KEY = 'inventory_analytics_cache'
+
+ORDER_STATUS_CANCELLED = 'Cancelado'
+
+# Participación acumulada del COGS que cierra cada clase
+ABC_THRESHOLDS = (('A', 0.80), ('B', 0.95))
+
+
+def _ratios(window_days, cogs, average_value, units_sold, stock):
+    """Rotación, DIO y sell-through (None cuando no hay base para calcularlos)"""
+    turnover = cogs / average_value if average_value > 0 else None
+    days_of_inventory = window_days * average_value / cogs if cogs > 0 else None
+    available = units_sold + max(stock, 0)
+    sell_through = units_sold / available * 100 if available > 0 else None
+    return {
+        'inventory_turnover': round(turnover, 2) if turnover is not None else None,
+        'days_of_inventory': round(days_of_inventory, 1) if days_of_inventory is not None else None,
+        'sell_through': round(sell_through, 1) if sell_through is not None else None,
+    }
+
+
+def _assign_abc_classes(products):
+    """Clase ABC por COGS descendente; los productos sin ventas son C"""
+    total_cogs = sum(product['cogs'] for product in products)
+    cumulative = 0.0
+    for product in sorted(products, key=lambda p: (-p['cogs'], p['sku'] or '')):
+        if total_cogs <= 0 or product['cogs'] <= 0:
+            product['abc_class'] = 'C'
+            continue
+        # La clase se decide con la participación acumulada antes del producto
+        share_before = cumulative / total_cogs
+        cumulative += product['cogs']
+        product['abc_class'] = next(
+            (abc_class for abc_class, threshold in ABC_THRESHOLDS if share_before < threshold),
+            'C'
+        )
+
+
+class InventoryAnalyticsService:
+    """Cálculo y caché de la analítica de rotación de inventario"""
+
+    @staticmethod
+    def _window_days():
+        return current_app.config.get('INVENTORY_ANALYTICS_WINDOW_DAYS', 365)
+
+    @staticmethod
+    def compute(window_days=None):
+        """
+        Calcular la analítica completa (sin caché)
+
+        Args:
+            window_days: Días de la ventana (por defecto INVENTORY_ANALYTICS_WINDOW_DAYS)
+
+        Returns:
+            dict: {'window_days', 'computed_at', 'summary', 'categories', 'products'}
+        """
+        window_days = window_days or InventoryAnalyticsService._window_days()
+        now = datetime.utcnow()
+        window_start = now - timedelta(days=window_days)
+
+        sales = select(
+            OrderItem.product_id.label('product_id'),
+            func.sum(OrderItem.quantity).label('units_sold'),
+        ).join(
+            Order, Order.id == OrderItem.order_id
+        ).where(
+            Order.status != ORDER_STATUS_CANCELLED,
+            Order.created_at >= window_start
+        ).group_by(OrderItem.product_id).subquery('sales')
+
+        movements = select(
+            MovementDailyRollup.product_id.label('product_id'),
+            func.sum(MovementDailyRollup.qty_in - MovementDailyRollup.qty_out).label('net_change'),
+        ).where(
+            MovementDailyRollup.day >= window_start.date()
+        ).group_by(MovementDailyRollup.product_id).subquery('movements')
+
+        rows = db.session.execute(
+            select(
+                Product.id,
+                Product.sku,
+                Product.name,
+                Product.category_id,
+                Category.name,
+                Product.stock_quantity,
+                Product.cost_price,
+                func.coalesce(sales.c.units_sold, 0),
+                func.coalesce(movements.c.net_change, 0),
+            ).outerjoin(
+                Category, Category.id == Product.category_id
+            ).outerjoin(
+                sales, sales.c.product_id == Product.id
+            ).outerjoin(
+                movements, movements.c.product_id == Product.id
+            ).where(
+                Product.is_active == True,
+                Product.deleted_at.is_(None)
+            )
+        ).all()
+
+        products = []
+        for (product_id, sku, name, category_id, category_name,
+             stock, cost_price, units_sold, net_change) in rows:
+            cost = float(cost_price) if cost_price else 0.0
+            stock = stock or 0
+            units_sold = int(units_sold or 0)
+            beginning_stock = max(stock - int(net_change or 0), 0)
+            average_value = (beginning_stock + max(stock, 0)) / 2 * cost
+            cogs = units_sold * cost
+
+            products.append({
+                'product_id': product_id,
+                'sku': sku,
+                'name': name,
+                'category_id': category_id,
+                'category_name': category_name,
+                'units_sold': units_sold,
+                'stock_quantity': stock,
+                'cogs': round(cogs, 2),
+                'average_inventory_value': round(average_value, 2),
+                **_ratios(window_days, cogs, average_value, units_sold, stock),
+            })
+
+        _assign_abc_classes(products)
+
+        # Totales por categoría y generales, de la misma pasada
+        groups = {}
+        summary_totals = {'cogs': 0.0, 'average_inventory_value': 0.0, 'units_sold': 0, 'stock': 0,
+                          'abc_counts': {'A': 0, 'B': 0, 'C': 0}}
+        for product in products:
+            group = groups.setdefault(product['category_id'], {
+                'category_id': product['category_id'],
+                'category_name': product['category_name'],
+                'cogs': 0.0, 'average_inventory_value': 0.0, 'units_sold': 0, 'stock': 0,
+                'product_count': 0, 'abc_counts': {'A': 0, 'B': 0, 'C': 0},
+            })
+            for totals in (group, summary_totals):
+                totals['cogs'] += product['cogs']
+                totals['average_inventory_value'] += product['average_inventory_value']
+                totals['units_sold'] += product['units_sold']
+                totals['stock'] += max(product['stock_quantity'], 0)
+                totals['abc_counts'][product['abc_class']] += 1
+            group['product_count'] += 1
+
+        def _finish(totals):
+            stock = totals.pop('stock')
+            totals['cogs'] = round(totals['cogs'], 2)
+            totals['average_inventory_value'] = round(totals['average_inventory_value'], 2)
+            totals.update(_ratios(
+                window_days, totals['cogs'], totals['average_inventory_value'], totals['units_sold'], stock
+            ))
+            return totals
+
+        categories = sorted((_finish(group) for group in groups.values()), key=lambda c: -c['cogs'])
+
+        return {
+            'window_days': window_days,
+            'computed_at': now.isoformat(),
+            'summary': _finish(summary_totals),
+            'categories': categories,
+            'products': sorted(products, key=lambda p: (-p['cogs'], p['sku'] or '')),
+        }
+
+    @staticmethod
+    def _store(analytics):
+        """Guardar el resultado en caché junto con el índice por producto"""
+        entry = {
+            'value': analytics,
+            'products_by_id': {product['product_id']: product for product in analytics['products']},
+        }
+        ttl = current_app.config.get('INVENTORY_ANALYTICS_CACHE_TTL', 900)
+        if ttl:
+            entry['expires_at'] = time.monotonic() + ttl
+            current_app.extensions[_CACHE_KEY] = entry
+        return entry
+
+    @staticmethod
+    def _cached():
+        """Entrada vigente de la caché (se calcula si no hay o venció)"""
+        cached = current_app.extensions.get(_CACHE_KEY)
+        hit = bool(cached and cached['expires_at'] > time.monotonic())
+        record_cache('inventory_analytics', hit)
+        if hit:
+            return cached
+        return InventoryAnalyticsService._store(InventoryAnalyticsService.compute())
+
+    @staticmethod
+    def refresh(progress_callback=None):
+        """
+        Recalcular y guardar en caché (trabajo 'inventory_analytics_refresh')
+
+        Returns:
+            dict: Resumen calculado
+        """
+        analytics = InventoryAnalyticsService.compute()
+        InventoryAnalyticsService._store(analytics)
+        if progress_callback:
+            progress_callback(len(analytics['products']), len(analytics['products']))
+        return {'computed_at': analytics['computed_at'], 'summary': copy.deepcopy(analytics['summary'])}
+
+    @staticmethod
+    def get_analytics(include_products=False):
+        """
+        Analítica vigente desde la caché, sin copiar
+
+        Args:
+            include_products: Incluir la lista por producto
+
+        Returns:
+            dict: Nuevo dict de primer nivel que referencia summary, categories
+                y products de la caché (solo lectura)
+        """
+        value = InventoryAnalyticsService._cached()['value']
+        analytics = {key: value[key] for key in ('window_days', 'computed_at', 'summary', 'categories')}
+        if include_products:
+            analytics['products'] = value['products']
+        return analytics
+
+    @staticmethod
+    def get_summary():
+        """{'window_days', 'computed_at', 'summary'} desde la caché (summary de solo lectura)"""
+        value = InventoryAnalyticsService._cached()['value']
+        return {key: value[key] for key in ('window_days', 'computed_at', 'summary')}
+
+    @staticmethod
+    def get_product_metrics():
+        """{product_id: métricas} de la caché (solo lectura) para listados y exportaciones"""
+        return InventoryAnalyticsService._cached()['products_by_id']
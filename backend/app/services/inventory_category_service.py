@@ -6,6 +6,7 @@ Servicio para gestionar la vista de inventario agrupado por categorías
 from sqlalchemy import func, and_, or_, case, desc, asc
 from app.models.category import Category
 from app.models.product import Product
+from app.services.product_search_service import ProductSearchService
 from app import db
 
 
@@ -173,12 +174,13 @@ class InventoryCategoryService:
         return categories
 
     @staticmethod
-    def get_category_products(category_id):
+    def get_category_products(category_id, search=None):
         """
         US-INV-006 CA-3: Obtiene lista detallada de productos de una categoría
 
         Args:
             category_id (str): ID de la categoría
+            search (str): Búsqueda por nombre, descripción o SKU (opcional)
 
         Returns:
             list: Lista de productos con detalles de inventario
@@ -189,13 +191,17 @@ class InventoryCategoryService:
             raise ValueError(f"Categoría con ID {category_id} no encontrada")
 
         # Query de productos con stock_status calculado
-        products = Product.query.filter(
+        query = Product.query.filter(
             and_(
                 Product.category_id == category_id,
                 Product.is_active == True,
                 Product.deleted_at.is_(None)
             )
-        ).all()
+        )
+        if search:
+            # El orden final lo define stock_status, no la relevancia
+            query = ProductSearchService.apply(query, search, order_by_rank=False)
+        products = query.all()
 
         # Formatear resultados
         product_list = []
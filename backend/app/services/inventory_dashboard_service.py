@@ -9,7 +9,7 @@ US-INV-010: Dashboard de Inventario
 from app import db
 from app.models.product import Product
 from app.models.category import Category
-from app.models.inventory_movement import InventoryMovement
+from app.services.movement_rollup_service import MovementRollupService
 from sqlalchemy import func, and_, case
 from datetime import datetime, timedelta
 
@@ -62,10 +62,10 @@ class InventoryDashboardService:
             )
         ).count()
 
-        # Movimientos del último mes para tendencia
-        movements_count = InventoryMovement.query.filter(
-            InventoryMovement.created_at >= one_month_ago
-        ).count()
+        # Movimientos del último mes para tendencia (agregados diarios)
+        movements_count = sum(
+            int(row.count) for row in MovementRollupService.totals_by_type(one_month_ago.date())
+        )
 
         return {
             'total_products': total_products,
@@ -142,46 +142,26 @@ class InventoryDashboardService:
             dict con rotación, días de inventario, movimientos totales, productos inactivos
         """
         now = datetime.utcnow()
-        period_start = now - timedelta(days=days)
-
-        # Movimientos totales del período
-        movements_total = InventoryMovement.query.filter(
-            InventoryMovement.created_at >= period_start
-        ).count()
-
-        # Movimientos por tipo
-        movements_by_type = db.session.query(
-            InventoryMovement.movement_type,
-            func.count(InventoryMovement.id).label('count'),
-            func.coalesce(func.sum(func.abs(InventoryMovement.quantity)), 0).label('total_units')
-        ).filter(
-            InventoryMovement.created_at >= period_start
-        ).group_by(
-            InventoryMovement.movement_type
-        ).all()
+        # Días calendario completos (agregados diarios de movement_daily_rollup)
+        period_start = (now - timedelta(days=days)).date()
 
+        # Movimientos por tipo y totales del período
         type_stats = {}
-        for m in movements_by_type:
-            type_stats[m.movement_type] = {
-                'count': m.count,
-                'total_units': int(m.total_units)
+        movements_total = 0
+        for movement_type, count, qty_in, qty_out in MovementRollupService.totals_by_type(period_start):
+            type_stats[movement_type] = {
+                'count': int(count),
+                'total_units': int((qty_in or 0) + (qty_out or 0))
             }
+            movements_total += int(count)
 
         # Productos sin movimientos en 90+ días (inactivos)
-        ninety_days_ago = now - timedelta(days=90)
-        products_with_recent_movements = db.session.query(
-            InventoryMovement.product_id
-        ).filter(
-            InventoryMovement.created_at >= ninety_days_ago
-        ).distinct().subquery()
-
+        ninety_days_ago = (now - timedelta(days=90)).date()
         inactive_products = Product.query.filter(
             and_(
                 Product.is_active == True,
                 Product.deleted_at.is_(None),
-                ~Product.id.in_(
-                    db.session.query(products_with_recent_movements.c.product_id)
-                )
+                ~MovementRollupService.has_movements_since(Product.id, ninety_days_ago)
             )
         ).count()
 
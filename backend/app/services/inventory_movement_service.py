@@ -11,8 +11,15 @@ from app.models.inventory_movement import InventoryMovement
 from app.models.product import Product
 from app.models.user import User
 from app.models.category import Category
-from sqlalchemy import and_, or_, func, desc
-from datetime import datetime, timedelta
+from app.services.movement_rollup_service import MovementRollupService
+from app.utils.sql import epoch_expression
+from sqlalchemy import and_, or_, func, desc, select
+from datetime import datetime, timedelta, time, timezone
+import calendar
+import math
+
+# Máximo de puntos que puede pedir el gráfico de evolución de stock
+EVOLUTION_MAX_POINTS = 1000
 
 
 class InventoryMovementService:
@@ -158,56 +165,147 @@ class InventoryMovementService:
         """
         Obtiene la evolución del stock de un producto para graficar (CA-4)
 
+        Cubre todo el rango pedido. Si hay más movimientos que `limit`, el
+        rango se divide en `limit` intervalos de igual duración y cada uno
+        aporta su último movimiento (stock al cierre del intervalo), con el
+        mínimo y máximo de stock y el cambio neto del intervalo. La agrupación
+        se hace en SQL con funciones de ventana, así que el resultado nunca
+        supera `limit` filas sin importar cuántos movimientos tenga el producto.
+
         Args:
             product_id: ID del producto
             date_from: Fecha inicial
             date_to: Fecha final
-            limit: Máximo de puntos de datos
+            limit: Máximo de puntos de datos (hasta EVOLUTION_MAX_POINTS)
 
         Returns:
-            list: [
-                {
-                    'date': datetime,
-                    'stock': int,
-                    'movement_type': str,
-                    'quantity': int
-                },
-                ...
-            ]
+            dict: {
+                'points': [
+                    {
+                        'date': str,            # último movimiento del intervalo
+                        'bucket_start': str,
+                        'stock': int,
+                        'min_stock': int,
+                        'max_stock': int,
+                        'movement_type': str,
+                        'quantity': int,        # cambio neto del intervalo
+                        'movements': int
+                    },
+                    ...
+                ],
+                'resolution': {
+                    'bucket_seconds': int | None,   # None = movimientos sin agrupar
+                    'downsampled': bool,
+                    'total_movements': int,
+                    'points': int,
+                    'range_start': str | None,
+                    'range_end': str | None
+                }
+            }
         """
-        # Construir query
-        query = InventoryMovement.query.filter_by(product_id=product_id)
-
-        # Filtros de fecha
+        def _as_naive_utc(value):
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            if value is not None and value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            return value
+
+        date_from = _as_naive_utc(date_from)
+        date_to = _as_naive_utc(date_to)
+        if date_to and date_to.hour == 0 and date_to.minute == 0:
+            date_to = date_to + timedelta(days=1) - timedelta(seconds=1)
+        limit = max(1, min(limit or 100, EVOLUTION_MAX_POINTS))
+
+        filters = [InventoryMovement.product_id == product_id]
         if date_from:
-            if isinstance(date_from, str):
-                date_from = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-            query = query.filter(InventoryMovement.created_at >= date_from)
-
+            filters.append(InventoryMovement.created_at >= date_from)
         if date_to:
-            if isinstance(date_to, str):
-                date_to = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
-            if date_to.hour == 0 and date_to.minute == 0:
-                date_to = date_to + timedelta(days=1) - timedelta(seconds=1)
-            query = query.filter(InventoryMovement.created_at <= date_to)
-
-        # Ordenar cronológicamente (del más antiguo al más reciente)
-        query = query.order_by(InventoryMovement.created_at.asc())
-
-        # Limitar resultados
-        movements = query.limit(limit).all()
-
-        # Formatear para gráfico
-        evolution = []
-        for movement in movements:
-            evolution.append({
-                'date': movement.created_at.isoformat() if movement.created_at else None,
-                'stock': movement.new_stock,
-                'movement_type': movement.movement_type,
-                'quantity': movement.quantity
-            })
+            filters.append(InventoryMovement.created_at <= date_to)
 
-        return evolution
+        total, first_at, last_at = db.session.query(
+            func.count(InventoryMovement.id),
+            func.min(InventoryMovement.created_at),
+            func.max(InventoryMovement.created_at)
+        ).filter(*filters).one()
+
+        range_start = date_from or first_at
+        range_end = date_to or last_at
+        resolution = {
+            'bucket_seconds': None,
+            'downsampled': False,
+            'total_movements': total,
+            'points': 0,
+            'range_start': range_start.isoformat() if range_start else None,
+            'range_end': range_end.isoformat() if range_end else None,
+        }
+
+        if total <= limit:
+            # Pocos movimientos: se devuelven todos, sin agrupar
+            movements = InventoryMovement.query.filter(*filters).order_by(
+                InventoryMovement.created_at.asc()
+            ).all()
+            points = [
+                {
+                    'date': movement.created_at.isoformat() if movement.created_at else None,
+                    'bucket_start': movement.created_at.isoformat() if movement.created_at else None,
+                    'stock': movement.new_stock,
+                    'min_stock': movement.new_stock,
+                    'max_stock': movement.new_stock,
+                    'movement_type': movement.movement_type,
+                    'quantity': movement.quantity,
+                    'movements': 1
+                }
+                for movement in movements
+            ]
+            resolution['points'] = len(points)
+            return {'points': points, 'resolution': resolution}
+
+        # Intervalos de igual duración sobre todo el rango (segundos enteros)
+        start_epoch = calendar.timegm(range_start.timetuple())
+        span = calendar.timegm(range_end.timetuple()) - start_epoch + 1
+        bucket_seconds = max(math.ceil(span / limit), 1)
+
+        bucket = (epoch_expression(InventoryMovement.created_at) - start_epoch) // bucket_seconds
+        window = {'partition_by': bucket}
+        ranked = select(
+            bucket.label('bucket'),
+            InventoryMovement.created_at,
+            InventoryMovement.new_stock,
+            InventoryMovement.movement_type,
+            func.row_number().over(
+                order_by=(InventoryMovement.created_at.desc(), InventoryMovement.id.desc()), **window
+            ).label('position'),
+            func.min(InventoryMovement.new_stock).over(**window).label('min_stock'),
+            func.max(InventoryMovement.new_stock).over(**window).label('max_stock'),
+            func.sum(InventoryMovement.quantity).over(**window).label('quantity'),
+            func.count(InventoryMovement.id).over(**window).label('movements'),
+        ).where(*filters).subquery('ranked')
+
+        rows = db.session.execute(
+            select(ranked).where(ranked.c.position == 1).order_by(ranked.c.bucket)
+        ).all()
+
+        points = [
+            {
+                'date': row.created_at.isoformat(),
+                'bucket_start': datetime.utcfromtimestamp(
+                    start_epoch + int(row.bucket) * bucket_seconds
+                ).isoformat(),
+                'stock': row.new_stock,
+                'min_stock': row.min_stock,
+                'max_stock': row.max_stock,
+                'movement_type': row.movement_type,
+                'quantity': int(row.quantity or 0),
+                'movements': row.movements
+            }
+            for row in rows
+        ]
+        resolution.update({
+            'bucket_seconds': bucket_seconds,
+            'downsampled': True,
+            'points': len(points),
+        })
+        return {'points': points, 'resolution': resolution}
 
     @staticmethod
     def get_movement_details(movement_id):
@@ -250,6 +348,10 @@ class InventoryMovementService:
         """
         Obtiene estadísticas de movimientos en un período
 
+        Con límites de día completo (lo habitual: fechas sin hora) se leen los
+        agregados diarios de movement_daily_rollup; con horas exactas se
+        agregan los movimientos.
+
         Args:
             date_from: Fecha inicial
             date_to: Fecha final
@@ -257,27 +359,40 @@ class InventoryMovementService:
         Returns:
             dict: Estadísticas agregadas
         """
-        query = db.session.query(
-            InventoryMovement.movement_type,
-            func.count(InventoryMovement.id).label('count'),
-            func.sum(func.abs(InventoryMovement.quantity)).label('total_quantity')
-        )
-
-        # Filtros de fecha
-        if date_from:
-            if isinstance(date_from, str):
-                date_from = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-            query = query.filter(InventoryMovement.created_at >= date_from)
+        if date_from and isinstance(date_from, str):
+            date_from = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
 
         if date_to:
             if isinstance(date_to, str):
                 date_to = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
             if date_to.hour == 0 and date_to.minute == 0:
                 date_to = date_to + timedelta(days=1) - timedelta(seconds=1)
-            query = query.filter(InventoryMovement.created_at <= date_to)
 
-        # Agrupar por tipo
-        results = query.group_by(InventoryMovement.movement_type).all()
+        whole_days = (
+            (not date_from or date_from.time() == time.min)
+            and (not date_to or date_to.time() == time(23, 59, 59))
+        )
+
+        if whole_days:
+            results = [
+                (movement_type, count, (qty_in or 0) + (qty_out or 0))
+                for movement_type, count, qty_in, qty_out in MovementRollupService.totals_by_type(
+                    date_from, date_to
+                )
+            ]
+        else:
+            query = db.session.query(
+                InventoryMovement.movement_type,
+                func.count(InventoryMovement.id).label('count'),
+                func.sum(func.abs(InventoryMovement.quantity)).label('total_quantity')
+            )
+            if date_from:
+                query = query.filter(InventoryMovement.created_at >= date_from)
+            if date_to:
+                query = query.filter(InventoryMovement.created_at <= date_to)
+
+            # Agrupar por tipo
+            results = query.group_by(InventoryMovement.movement_type).all()
 
         # Formatear resultados
         statistics = {
@@ -289,10 +404,10 @@ class InventoryMovementService:
         for movement_type, count, total_quantity in results:
             statistics['by_type'].append({
                 'movement_type': movement_type,
-                'count': count,
+                'count': int(count),
                 'total_quantity': int(total_quantity) if total_quantity else 0
             })
-            statistics['total_movements'] += count
+            statistics['total_movements'] += int(count)
             statistics['total_quantity'] += int(total_quantity) if total_quantity else 0
 
         return statistics
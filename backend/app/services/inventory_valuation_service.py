@@ -0,0 +1,245 @@
+"""
+Valoración del inventario en cualquier instante (point-in-time)
+
+US-INV-005 CA-2 y CA-4: Evolución del valor y comparación con el período
+anterior sin depender de snapshots guardados.
+
+El stock de un producto al cierre del día D es su stock actual menos el
+cambio neto (qty_in - qty_out) de los días posteriores en
+movement_daily_rollup; para un instante dentro del día se descuentan además
+los movimientos de ese día posteriores al instante. El valor es
+Σ costo_actual × max(stock, 0) de los productos activos, como en
+InventoryValueService.calculate_total_value (no hay historial de costos).
+
+La reconstrucción recorre las filas del rollup una sola vez: cada fila
+aporta el cambio de valor, unidades y productos con stock que causó su día,
+y el valor de cada punto de la grilla es el valor actual menos la suma de
+los aportes posteriores. El recorrido es vectorizado con NumPy (dependencia
+de requirements.txt); el mismo algoritmo en Python puro queda como respaldo
+si NumPy no está disponible.
+"""
+from datetime import datetime, time, timedelta
+from sqlalchemy import func, and_
+from app import db
+from app.models.inventory_movement import InventoryMovement
+from app.models.movement_daily_rollup import MovementDailyRollup
+from app.models.product import Product
+
+
+def _active_products():
+    """{product_id: (stock actual, costo)} de productos activos no eliminados"""
+    rows = db.session.query(
+        Product.id, Product.stock_quantity, Product.cost_price
+    ).filter(
+        and_(Product.is_active == True, Product.deleted_at.is_(None))
+    ).all()
+    return {
+        product_id: (stock or 0, float(cost_price) if cost_price else 0.0)
+        for product_id, stock, cost_price in rows
+    }
+
+
+def _net_changes_after(day):
+    """
+    Cambio neto de stock por producto y día posterior a `day`
+
+    Returns:
+        list: (product_id, ordinal del día, cambio neto)
+    """
+    rows = db.session.query(
+        MovementDailyRollup.product_id,
+        MovementDailyRollup.day,
+        func.sum(MovementDailyRollup.qty_in - MovementDailyRollup.qty_out)
+    ).join(
+        Product, Product.id == MovementDailyRollup.product_id
+    ).filter(
+        and_(
+            MovementDailyRollup.day > day,
+            Product.is_active == True,
+            Product.deleted_at.is_(None)
+        )
+    ).group_by(
+        MovementDailyRollup.product_id, MovementDailyRollup.day
+    ).all()
+    return [(product_id, row_day.toordinal(), int(net or 0)) for product_id, row_day, net in rows]
+
+
+def _net_changes_within_day(moment):
+    """Cambio neto por producto de los movimientos del día de `moment` posteriores a él"""
+    next_day = datetime.combine(moment.date() + timedelta(days=1), time.min)
+    rows = db.session.query(
+        InventoryMovement.product_id,
+        func.sum(InventoryMovement.quantity)
+    ).filter(
+        InventoryMovement.created_at > moment,
+        InventoryMovement.created_at < next_day
+    ).group_by(InventoryMovement.product_id).all()
+    ordinal = moment.date().toordinal()
+    return [(product_id, ordinal, int(net or 0)) for product_id, net in rows]
+
+
+def _replay_python(products, changes, grid):
+    """Reconstrucción en Python puro (ver _replay)"""
+    by_product = {}
+    for product_id, ordinal, net in changes:
+        if product_id in products:
+            by_product.setdefault(product_id, []).append((ordinal, net))
+
+    contributions = {}
+    for product_id, product_changes in by_product.items():
+        stock, cost = products[product_id]
+        # Del día más reciente al más antiguo: deshacer cada día
+        for ordinal, net in sorted(product_changes, reverse=True):
+            before = stock - net
+            value, quantity, count = contributions.get(ordinal, (0.0, 0, 0))
+            contributions[ordinal] = (
+                value + cost * (max(stock, 0) - max(before, 0)),
+                quantity + max(stock, 0) - max(before, 0),
+                count + (stock > 0) - (before > 0),
+            )
+            stock = before
+
+    # Sumas de los aportes posteriores a cada punto (de atrás hacia adelante)
+    ordered = sorted(contributions.items(), reverse=True)
+    points = {}
+    value = quantity = count = 0
+    position = 0
+    for grid_ordinal in sorted(grid, reverse=True):
+        while position < len(ordered) and ordered[position][0] > grid_ordinal:
+            value += ordered[position][1][0]
+            quantity += ordered[position][1][1]
+            count += ordered[position][1][2]
+            position += 1
+        points[grid_ordinal] = (value, quantity, count)
+    return [points[grid_ordinal] for grid_ordinal in grid]
+
+
+def _replay_numpy(np, products, changes, grid):
+    """Reconstrucción vectorizada (ver _replay)"""
+    changes = [change for change in changes if change[0] in products]
+    if not changes:
+        return [(0.0, 0, 0)] * len(grid)
+
+    product_index = {product_id: index for index, product_id in enumerate(products)}
+    current = np.array([stock for stock, _ in products.values()], dtype=np.int64)
+    costs = np.array([cost for _, cost in products.values()], dtype=np.float64)
+
+    pids = np.array([product_index[product_id] for product_id, _, _ in changes], dtype=np.int64)
+    ordinals = np.array([ordinal for _, ordinal, _ in changes], dtype=np.int64)
+    nets = np.array([net for _, _, net in changes], dtype=np.int64)
+
+    # Orden por producto y día descendente
+    order = np.lexsort((-ordinals, pids))
+    pids, ordinals, nets = pids[order], ordinals[order], nets[order]
+
+    # Suma acumulada de cambios por producto (reiniciada en cada producto)
+    cumulative = np.cumsum(nets)
+    starts = np.flatnonzero(np.r_[True, pids[1:] != pids[:-1]])
+    lengths = np.diff(np.r_[starts, len(pids)])
+    cumulative -= np.repeat(cumulative[starts] - nets[starts], lengths)
+
+    after = current[pids] - (cumulative - nets)
+    before = after - nets
+    after_positive, before_positive = np.maximum(after, 0), np.maximum(before, 0)
+    value = costs[pids] * (after_positive - before_positive)
+    quantity = after_positive - before_positive
+    count = (after > 0).astype(np.int64) - (before > 0).astype(np.int64)
+
+    # Aportes de los días posteriores a cada punto de la grilla
+    order = np.argsort(ordinals, kind='stable')
+    sorted_ordinals = ordinals[order]
+    positions = np.searchsorted(sorted_ordinals, np.array(grid, dtype=np.int64), side='right')
+
+    totals = [np.r_[0, np.cumsum(series[order])] for series in (value, quantity, count)]
+    later = [(series[-1] - series[positions]).tolist() for series in totals]
+    return list(zip(*later))
+
+
+def _replay(products, changes, grid):
+    """
+    Valor, unidades y productos con stock al cierre de cada día de la grilla
+
+    Args:
+        products: {product_id: (stock actual, costo)}
+        changes: [(product_id, ordinal del día, cambio neto)] posteriores al primer punto
+        grid: Ordinales de día ascendentes
+
+    Returns:
+        list: (valor, unidades, productos con stock) por punto de la grilla
+    """
+    current_value = sum(cost * max(stock, 0) for stock, cost in products.values())
+    current_quantity = sum(max(stock, 0) for stock, _ in products.values())
+    current_count = sum(1 for stock, _ in products.values() if stock > 0)
+
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    if np is not None:
+        later = _replay_numpy(np, products, changes, grid)
+    else:
+        later = _replay_python(products, changes, grid)
+
+    return [
+        (
+            round(current_value - value, 2),
+            int(current_quantity - quantity),
+            int(current_count - count),
+        )
+        for value, quantity, count in later
+    ]
+
+
+class InventoryValuationService:
+    """Valor del inventario reconstruido desde los movimientos"""
+
+    @staticmethod
+    def get_value_at(moment):
+        """
+        Valor del inventario en un instante
+
+        Args:
+            moment: datetime (UTC)
+
+        Returns:
+            dict: {'total_value', 'total_products', 'total_quantity'}
+        """
+        day = moment.date()
+        # Los movimientos del día posteriores al instante se ubican en `day` y
+        # los días siguientes después: todos quedan tras el cierre del día anterior
+        changes = _net_changes_after(day) + _net_changes_within_day(moment)
+        grid_ordinal = day.toordinal() - 1
+        total_value, total_quantity, total_products = _replay(_active_products(), changes, [grid_ordinal])[0]
+        return {
+            'total_value': total_value,
+            'total_products': total_products,
+            'total_quantity': total_quantity,
+        }
+
+    @staticmethod
+    def get_daily_values(start_day, end_day):
+        """
+        Valor del inventario al cierre de cada día del rango (inclusive)
+
+        Args:
+            start_day: date inicial
+            end_day: date final
+
+        Returns:
+            list: [{'day': date, 'total_value', 'total_products', 'total_quantity'}, ...]
+        """
+        if end_day < start_day:
+            return []
+
+        days = [start_day + timedelta(days=offset) for offset in range((end_day - start_day).days + 1)]
+        points = _replay(_active_products(), _net_changes_after(start_day), [d.toordinal() for d in days])
+        return [
+            {
+                'day': day,
+                'total_value': total_value,
+                'total_products': total_products,
+                'total_quantity': total_quantity,
+            }
+            for day, (total_value, total_quantity, total_products) in zip(days, points)
+        ]
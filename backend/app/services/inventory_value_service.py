@@ -12,8 +12,10 @@ from app.models.product import Product
 from app.models.category import Category
 from app.models.inventory_value_history import InventoryValueHistory
 from app.models.inventory_movement import InventoryMovement
+from app.services.inventory_analytics_service import InventoryAnalyticsService
+from app.services.inventory_valuation_service import InventoryValuationService
 from sqlalchemy import func, and_
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 
 
@@ -248,6 +250,9 @@ class InventoryValueService:
         """
         US-INV-005 CA-4: Obtiene la evolución del valor del inventario en el tiempo
 
+        Un punto por día (cierre del día; el de hoy es el valor actual),
+        reconstruido con InventoryValuationService.
+
         Args:
             period: Período predefinido ('7d', '30d', '3m', '1y') o 'custom'
             date_from: Fecha inicial (para período custom)
@@ -282,25 +287,20 @@ class InventoryValueService:
             else:
                 start_date = end_date - timedelta(days=7)  # Default
 
-        # Obtener snapshots en el rango
-        snapshots = InventoryValueHistory.query.filter(
-            and_(
-                InventoryValueHistory.snapshot_date >= start_date,
-                InventoryValueHistory.snapshot_date <= end_date
-            )
-        ).order_by(
-            InventoryValueHistory.snapshot_date.asc()
-        ).all()
-
+        # Valor al cierre de cada día, reconstruido desde los movimientos
+        # (no depende de que existan snapshots en el rango)
+        now = datetime.utcnow()
+        end_date = min(end_date, now)
         evolution = []
-        for snapshot in snapshots:
-            total_value = float(snapshot.total_value) if snapshot.total_value else 0.0
+        for point in InventoryValuationService.get_daily_values(start_date.date(), end_date.date()):
+            total_value = point['total_value']
+            closing = min(datetime.combine(point['day'], time(23, 59, 59)), now)
 
             evolution.append({
-                'snapshot_date': snapshot.snapshot_date.isoformat(),
+                'snapshot_date': closing.isoformat(),
                 'total_value': total_value,
-                'total_products': snapshot.total_products,
-                'total_quantity': snapshot.total_quantity,
+                'total_products': point['total_products'],
+                'total_quantity': point['total_quantity'],
                 'formatted_value': f"COP {total_value:,.0f}"
             })
 
@@ -313,15 +313,16 @@ class InventoryValueService:
 
         Returns:
             dict: {
-                'inventory_turnover': float (rotación de inventario),
+                'inventory_turnover': float (rotación de inventario, COGS / inventario promedio),
                 'days_of_inventory': float (días de inventario),
+                'sell_through': float (% vendido de lo disponible),
+                'abc_counts': dict (productos por clase ABC),
                 'top_categories': list (top 5 categorías por valor),
                 'stock_distribution': dict (distribución por estado de stock)
             }
         """
-        # Para calcular rotación necesitaríamos datos de ventas
-        # Por ahora retornamos None o 0 para estas métricas
-        # Se implementarán cuando tengamos el módulo de ventas (Epic 4)
+        # Rotación y días de inventario desde la analítica en caché (ventas + rollup)
+        analytics = InventoryAnalyticsService.get_summary()
 
         # Top 5 categorías
         top_categories = InventoryValueService.get_value_by_category()[:5]
@@ -355,8 +356,12 @@ class InventoryValueService:
         ).first()
 
         return {
-            'inventory_turnover': None,  # Se implementará con módulo de ventas
-            'days_of_inventory': None,  # Se implementará con módulo de ventas
+            'inventory_turnover': analytics['summary']['inventory_turnover'],
+            'days_of_inventory': analytics['summary']['days_of_inventory'],
+            'sell_through': analytics['summary']['sell_through'],
+            'abc_counts': analytics['summary']['abc_counts'],
+            'analytics_window_days': analytics['window_days'],
+            'analytics_computed_at': analytics['computed_at'],
             'top_categories': top_categories,
             'stock_distribution': {
                 'out_of_stock': int(stock_distribution.out_of_stock or 0),
@@ -401,17 +406,8 @@ class InventoryValueService:
 
         target_date = datetime.utcnow() - timedelta(days=days_ago)
 
-        # Buscar el snapshot más cercano a la fecha objetivo
-        previous_snapshot = InventoryValueHistory.query.filter(
-            InventoryValueHistory.snapshot_date <= target_date
-        ).order_by(
-            InventoryValueHistory.snapshot_date.desc()
-        ).first()
-
-        if previous_snapshot:
-            previous_value = float(previous_snapshot.total_value) if previous_snapshot.total_value else 0.0
-        else:
-            previous_value = 0.0
+        # Valor reconstruido en la fecha objetivo (point-in-time)
+        previous_value = InventoryValuationService.get_value_at(target_date)['total_value']
 
         # Calcular cambio
         change_amount = current_value - previous_value
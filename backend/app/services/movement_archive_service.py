@@ -0,0 +1,226 @@
+"""
+Particiones mensuales y archivo de inventory_movements
+
+US-INV-003: Historial de Movimientos de Stock (retención)
+
+En PostgreSQL inventory_movements está particionada por mes sobre created_at
+(migración e7f8a9b0c1d2): las consultas que ya filtran por rango de fechas
+solo leen las particiones del rango, y archivar un mes es soltar su
+partición. En SQLite la tabla es normal y archivar un mes es un DELETE por
+rango.
+
+Los meses archivados se exportan antes de borrarse, un archivo por mes en
+MOVEMENTS_ARCHIVE_DIR (Parquet con pyarrow, si no CSV con gzip).
+movement_daily_rollup no se toca: estadísticas, dashboard y valoración
+histórica siguen cubriendo los meses archivados;
+`flask rollups backfill` no reconstruye días anteriores al movimiento más
+antiguo que queda (salvo con --force).
+"""
+import csv
+import gzip
+import logging
+import os
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy import func, select, text
+from app import db
+from app.models.inventory_movement import InventoryMovement
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = 'inventory_movements_p'
+DEFAULT_PARTITION = 'inventory_movements_default'
+
+ARCHIVE_BATCH_SIZE = 5000
+
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month):
+    return f'{PARTITION_PREFIX}{month:%Y%m}'
+
+
+def _is_postgresql():
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+
+def _partition_exists(name):
+    return db.session.execute(text('SELECT to_regclass(:name)'), {'name': name}).scalar() is not None
+
+
+def _write_csv(path, columns, batches):
+    rows = 0
+    with gzip.open(path, 'wt', newline='', encoding='utf-8') as archive:
+        writer = csv.writer(archive)
+        writer.writerow(columns)
+        for batch in batches:
+            for row in batch:
+                writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+            rows += len(batch)
+    return rows
+
+
+def _write_parquet(pa, pq, path, columns, batches):
+    integer_columns = {'quantity', 'previous_stock', 'new_stock'}
+    schema = pa.schema([
+        (name, pa.timestamp('us') if name == 'created_at'
+         else pa.int64() if name in integer_columns else pa.string())
+        for name in columns
+    ])
+    rows = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist([dict(zip(columns, row)) for row in batch], schema=schema))
+            rows += len(batch)
+    return rows
+
+
+class MovementArchiveService:
+    """Mantenimiento de particiones y archivo de movimientos antiguos"""
+
+    @staticmethod
+    def ensure_partitions(months_ahead=3, since=None):
+        """
+        Crear las particiones mensuales del mes actual y los siguientes
+
+        Si la partición DEFAULT ya recibió filas de un mes, se mueven a la
+        partición nueva antes de adjuntarla. No hace nada fuera de PostgreSQL.
+
+        Args:
+            months_ahead: Meses futuros a cubrir además del actual
+            since: Primer mes a cubrir si es anterior al actual (cargas de
+                datos históricos)
+
+        Returns:
+            list: Nombres de las particiones creadas
+        """
+        if not _is_postgresql():
+            return []
+
+        created = []
+        current = _month_start(date.today())
+        first = min(_month_start(since), current) if since else current
+        months = (current.year - first.year) * 12 + current.month - first.month + months_ahead + 1
+        for offset in range(months):
+            month = _add_months(first, offset)
+            name = _partition_name(month)
+            if _partition_exists(name):
+                continue
+
+            bounds = {'start': datetime.combine(month, datetime.min.time()),
+                      'end': datetime.combine(_add_months(month, 1), datetime.min.time())}
+            db.session.execute(text(
+                f'CREATE TABLE {name} (LIKE inventory_movements INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+            ))
+            db.session.execute(text(f"""
+                WITH moved AS (
+                    DELETE FROM {DEFAULT_PARTITION}
+                    WHERE created_at >= :start AND created_at < :end
+                    RETURNING *
+                )
+                INSERT INTO {name} SELECT * FROM moved
+            """), bounds)
+            db.session.execute(text(
+                f"ALTER TABLE inventory_movements ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+            ))
+            db.session.commit()
+            created.append(name)
+        return created
+
+    @staticmethod
+    def archive(before=None, directory=None, archive_format=None):
+        """
+        Exportar y eliminar los meses de movimientos anteriores a `before`
+
+        Cada mes se escribe completo en un archivo temporal, se renombra y
+        solo entonces se eliminan sus filas (partición o DELETE) y se
+        confirma; un fallo deja el mes en la base de datos.
+
+        Args:
+            before: Primer mes que se conserva (por defecto, hoy menos
+                MOVEMENTS_RETENTION_MONTHS); se redondea al inicio del mes
+            directory: Carpeta destino (por defecto MOVEMENTS_ARCHIVE_DIR)
+            archive_format: 'parquet' o 'csv' (por defecto MOVEMENTS_ARCHIVE_FORMAT)
+
+        Returns:
+            list: [{'month': 'YYYY-MM', 'rows': int, 'file': str | None}, ...]
+        """
+        config = current_app.config
+        if before is None:
+            before = _add_months(_month_start(date.today()), -config.get('MOVEMENTS_RETENTION_MONTHS', 24))
+        cutoff = _month_start(before)
+        directory = directory or config['MOVEMENTS_ARCHIVE_DIR']
+        archive_format = archive_format or config.get('MOVEMENTS_ARCHIVE_FORMAT', 'parquet')
+
+        pa = pq = None
+        if archive_format == 'parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                logger.warning('pyarrow no está instalado: el archivo de movimientos se escribe como CSV con gzip')
+                archive_format = 'csv'
+
+        oldest = db.session.query(func.min(InventoryMovement.created_at)).filter(
+            InventoryMovement.created_at < datetime.combine(cutoff, datetime.min.time())
+        ).scalar()
+        if oldest is None:
+            return []
+
+        os.makedirs(directory, exist_ok=True)
+        table = InventoryMovement.__table__
+        columns = [column.name for column in table.columns]
+        postgresql = _is_postgresql()
+
+        archived = []
+        month = _month_start(oldest)
+        while month < cutoff:
+            start = datetime.combine(month, datetime.min.time())
+            end = datetime.combine(_add_months(month, 1), datetime.min.time())
+            in_month = (table.c.created_at >= start, table.c.created_at < end)
+
+            result = db.session.execute(
+                select(table).where(*in_month).order_by(table.c.created_at, table.c.id)
+                .execution_options(yield_per=ARCHIVE_BATCH_SIZE)
+            )
+            batches = (list(batch) for batch in result.partitions())
+
+            extension = 'parquet' if archive_format == 'parquet' else 'csv.gz'
+            path = os.path.join(directory, f'inventory_movements_{month:%Y_%m}.{extension}')
+            temporary = f'{path}.tmp'
+            try:
+                if archive_format == 'parquet':
+                    rows = _write_parquet(pa, pq, temporary, columns, batches)
+                else:
+                    rows = _write_csv(temporary, columns, batches)
+            finally:
+                result.close()
+
+            if rows:
+                os.replace(temporary, path)
+            else:
+                os.remove(temporary)
+                path = None
+
+            name = _partition_name(month)
+            if postgresql and _partition_exists(name):
+                db.session.execute(text(f'ALTER TABLE inventory_movements DETACH PARTITION {name}'))
+                db.session.execute(text(f'DROP TABLE {name}'))
+            elif rows:
+                db.session.execute(table.delete().where(*in_month))
+            db.session.commit()
+
+            if rows:
+                logger.info('movimientos archivados mes=%s filas=%s archivo=%s', f'{month:%Y-%m}', rows, path)
+                archived.append({'month': f'{month:%Y-%m}', 'rows': rows, 'file': path})
+            month = _add_months(month, 1)
+
+        return archived
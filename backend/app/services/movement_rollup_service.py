@@ -0,0 +1,135 @@
+"""
+Servicio de agregados diarios de movimientos (movement_daily_rollup)
+
+Backfill set-based desde inventory_movements y consultas por rango de días
+para estadísticas de movimientos, dashboard y demanda de punto de reorden.
+El mantenimiento incremental está en el listener del modelo
+MovementDailyRollup.
+"""
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import case, delete, exists, func, insert, select
+from app import db
+from app.models.inventory_movement import InventoryMovement
+from app.models.movement_daily_rollup import MovementDailyRollup
+from app.utils.sql import day_expression
+
+
+def _as_day(value):
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    return value.date()
+
+
+def _day_filters(day_from=None, day_to=None):
+    filters = []
+    if day_from is not None:
+        filters.append(MovementDailyRollup.day >= _as_day(day_from))
+    if day_to is not None:
+        filters.append(MovementDailyRollup.day <= _as_day(day_to))
+    return filters
+
+
+class MovementRollupService:
+    """Reconstrucción y lectura de movement_daily_rollup"""
+
+    @staticmethod
+    def backfill(day_from=None, day_to=None, force=False):
+        """
+        Reconstruir el rollup desde inventory_movements (set-based, sin commit)
+
+        Borra los días del rango y los vuelve a agregar con un único
+        INSERT ... SELECT ... GROUP BY.
+
+        Los días anteriores al movimiento más antiguo que sigue en la tabla no
+        se tocan: son meses archivados (`flask movements archive`) cuyo
+        rollup ya no se puede reconstruir. `force` quita esa protección.
+
+        Args:
+            day_from: Primer día a reconstruir (None = desde el movimiento más antiguo)
+            day_to: Último día a reconstruir, inclusive (None = hasta hoy)
+            force: Reconstruir también los días sin movimientos almacenados
+
+        Returns:
+            int: Filas de rollup escritas
+        """
+        # Movimientos pendientes de la sesión no deben sumarse dos veces
+        db.session.flush()
+
+        if not force:
+            oldest = db.session.query(func.min(InventoryMovement.created_at)).scalar()
+            if oldest is None:
+                return 0
+            if day_from is None or _as_day(day_from) < oldest.date():
+                day_from = oldest.date()
+            if day_to is not None and _as_day(day_to) < day_from:
+                return 0
+
+        day = day_expression(InventoryMovement.created_at)
+        # Rango sobre created_at (no sobre el día calculado) para que
+        # PostgreSQL lea solo las particiones mensuales del rango
+        movement_filters = []
+        if day_from is not None:
+            movement_filters.append(
+                InventoryMovement.created_at >= datetime.combine(_as_day(day_from), time.min)
+            )
+        if day_to is not None:
+            movement_filters.append(
+                InventoryMovement.created_at < datetime.combine(_as_day(day_to) + timedelta(days=1), time.min)
+            )
+
+        rows = select(
+            InventoryMovement.product_id,
+            day,
+            InventoryMovement.movement_type,
+            func.count(InventoryMovement.id),
+            func.coalesce(func.sum(case((InventoryMovement.quantity > 0, InventoryMovement.quantity), else_=0)), 0),
+            func.coalesce(func.sum(case((InventoryMovement.quantity < 0, -InventoryMovement.quantity), else_=0)), 0),
+        ).where(*movement_filters).group_by(
+            InventoryMovement.product_id, day, InventoryMovement.movement_type
+        )
+
+        table = MovementDailyRollup.__table__
+        db.session.execute(delete(table).where(*_day_filters(day_from, day_to)))
+        result = db.session.execute(
+            insert(table).from_select(
+                ['product_id', 'day', 'movement_type', 'count', 'qty_in', 'qty_out'], rows
+            )
+        )
+        return result.rowcount or 0
+
+    @staticmethod
+    def totals_by_type(day_from=None, day_to=None):
+        """
+        Movimientos y unidades por tipo en un rango de días (inclusive)
+
+        Returns:
+            list: Filas (movement_type, count, qty_in, qty_out)
+        """
+        return db.session.query(
+            MovementDailyRollup.movement_type,
+            func.sum(MovementDailyRollup.count).label('count'),
+            func.sum(MovementDailyRollup.qty_in).label('qty_in'),
+            func.sum(MovementDailyRollup.qty_out).label('qty_out'),
+        ).filter(
+            *_day_filters(day_from, day_to)
+        ).group_by(MovementDailyRollup.movement_type).all()
+
+    @staticmethod
+    def product_units(product_id, movement_type, day_from=None):
+        """Unidades movidas (entradas + salidas) de un producto y tipo desde un día"""
+        total = db.session.query(
+            func.sum(MovementDailyRollup.qty_in + MovementDailyRollup.qty_out)
+        ).filter(
+            MovementDailyRollup.product_id == product_id,
+            MovementDailyRollup.movement_type == movement_type,
+            *_day_filters(day_from)
+        ).scalar()
+        return int(total or 0)
+
+    @staticmethod
+    def has_movements_since(product_id_column, day_from):
+        """Condición EXISTS: el producto tuvo movimientos desde `day_from`"""
+        return exists().where(
+            MovementDailyRollup.product_id == product_id_column,
+            *_day_filters(day_from)
+        )
@@ -12,8 +12,11 @@ from app.models.product import Product
 from app.models.customer import Customer
 from app.models.inventory_movement import InventoryMovement
 from app.models.payment import Payment
+from app.services.critical_stock_alert_service import CriticalStockAlertService
+from app.services.customer_stats_service import CustomerStatsService
 from app.services.stock_service import InsufficientStockError, StockUpdateError
 from app.utils.constants import DISCOUNT_AUTHORIZATION_THRESHOLD
+from app.utils.metrics import ORDERS_CREATED, timed
 from decimal import Decimal
 from datetime import datetime, date
 
@@ -94,6 +97,7 @@ class OrderService:
     """Servicio para gestionar pedidos"""
 
     @staticmethod
+    @timed('order_create')
     def create_order(data, user_id, user_role=None):
         """
         CA-8: Crea un nuevo pedido con validación de stock y movimientos de inventario.
@@ -263,7 +267,14 @@ class OrderService:
             )
             db.session.add(status_entry)
 
+            # 9. Acumulados de compra del cliente (US-CUST-011)
+            CustomerStatsService.record_order_created(order)
+
+            # 10. US-INV-007: Alertas de stock crítico de los productos vendidos
+            CriticalStockAlertService.evaluate_stock_alerts(product_ids)
+
             db.session.commit()
+            ORDERS_CREATED.inc()
             return order
 
         except (ValueError, InsufficientStockError, DiscountAuthorizationError):
@@ -508,6 +519,12 @@ class OrderService:
             )
             db.session.add(audit)
 
+            # 6. Acumulados de compra del cliente (US-CUST-011)
+            CustomerStatsService.record_order_updated(order, previous_customer_id, previous_total)
+
+            # 7. US-INV-007: Alertas de stock crítico de los productos ajustados
+            CriticalStockAlertService.evaluate_stock_alerts(all_product_ids)
+
             db.session.commit()
             return order, changes
 
@@ -665,6 +682,12 @@ class OrderService:
             )
             db.session.add(status_entry)
 
+            # 7. El pedido cancelado deja de contar en los acumulados del cliente
+            CustomerStatsService.record_order_cancelled(order)
+
+            # 8. US-INV-007: El stock repuesto puede resolver alertas
+            CriticalStockAlertService.evaluate_stock_alerts(product_ids)
+
             db.session.commit()
             return order
 
@@ -0,0 +1,195 @@
+"""
+Servicio para listados paginados de productos
+
+US-PROD-002: Listar productos con paginación y estadísticas
+US-PROD-003: Buscar y filtrar productos
+US-PROD-008: Productos con stock bajo
+
+Centraliza los filtros del listado para que la página y las estadísticas
+usen exactamente las mismas condiciones, y calcula total + conteos por
+estado de stock en un solo agregado (sin COUNT adicional de paginate()).
+
+La serialización de listas carga categoría y último usuario en la misma
+query de la página: una página de N productos no dispara N lazy loads.
+"""
+import math
+from sqlalchemy import func, case
+from sqlalchemy.orm import contains_eager, joinedload
+from app import db
+from app.models.product import Product
+from app.models.user import User
+from app.services.product_search_service import ProductSearchService
+
+
+class ProductListingService:
+    """Construcción de filtros, estadísticas y paginación del listado de productos"""
+
+    STOCK_STATUS_NORMAL = 'normal'
+    STOCK_STATUS_LOW = 'low'
+    STOCK_STATUS_OUT = 'out'
+
+    @staticmethod
+    def build_conditions(search=None, category_id=None, stock_status=None,
+                         low_stock_only=False, below_reorder_point=False):
+        """
+        Condiciones WHERE del listado (US-PROD-006 CA-9: excluye eliminados)
+
+        Args:
+            search: Texto de búsqueda (ver ProductSearchService)
+            category_id: Filtrar por categoría
+            stock_status: 'normal', 'low' u 'out' (umbral: min_stock_level)
+            low_stock_only: [DEPRECATED] stock <= min_stock_level
+            below_reorder_point: stock <= reorder_point (US-PROD-008)
+
+        Returns:
+            list: Condiciones para Query.filter(*conditions)
+        """
+        conditions = [
+            Product.is_active == True,
+            Product.deleted_at == None
+        ]
+
+        if search:
+            search_filter = ProductSearchService.build_filter(search)
+            if search_filter is not None:
+                conditions.append(search_filter)
+
+        if category_id:
+            conditions.append(Product.category_id == category_id)
+
+        # US-PROD-003 CA-4: Filtrar por estado de stock
+        if stock_status == ProductListingService.STOCK_STATUS_NORMAL:
+            conditions.append(Product.stock_quantity > Product.min_stock_level)
+        elif stock_status == ProductListingService.STOCK_STATUS_LOW:
+            conditions.append(Product.stock_quantity <= Product.min_stock_level)
+            conditions.append(Product.stock_quantity > 0)
+        elif stock_status == ProductListingService.STOCK_STATUS_OUT:
+            conditions.append(Product.stock_quantity == 0)
+        elif low_stock_only:
+            conditions.append(Product.stock_quantity <= Product.min_stock_level)
+
+        if below_reorder_point:
+            conditions.append(Product.stock_quantity <= Product.reorder_point)
+
+        return conditions
+
+    @staticmethod
+    def get_statistics(conditions, threshold=None):
+        """
+        Total y conteos por estado de stock en un solo agregado
+
+        Args:
+            conditions: Condiciones de build_conditions()
+            threshold: Columna umbral de stock bajo (default: min_stock_level)
+
+        Returns:
+            dict: {total, normal_stock, low_stock, out_of_stock}
+        """
+        threshold = Product.min_stock_level if threshold is None else threshold
+
+        row = db.session.query(
+            func.count(Product.id).label('total'),
+            func.count(case((Product.stock_quantity > threshold, 1))).label('normal_stock'),
+            func.count(case(
+                ((Product.stock_quantity > 0) & (Product.stock_quantity <= threshold), 1)
+            )).label('low_stock'),
+            func.count(case((Product.stock_quantity == 0, 1))).label('out_of_stock')
+        ).filter(*conditions).one()
+
+        return {
+            'total': row.total or 0,
+            'normal_stock': row.normal_stock or 0,
+            'low_stock': row.low_stock or 0,
+            'out_of_stock': row.out_of_stock or 0
+        }
+
+    @staticmethod
+    def paginate(query, page, per_page, total=None):
+        """
+        Paginar una query ya ordenada sin ejecutar COUNT
+
+        Si `total` es None (scroll infinito) se pide una fila extra para
+        saber si hay página siguiente y total/pages se devuelven como None.
+
+        Args:
+            query: Query ordenada
+            page: Número de página (>= 1)
+            per_page: Elementos por página
+            total: Total conocido (de get_statistics) o None
+
+        Returns:
+            tuple: (items, pagination_dict)
+        """
+        page = max(page or 1, 1)
+        per_page = max(per_page or 1, 1)
+        offset = (page - 1) * per_page
+
+        if total is None:
+            rows = query.offset(offset).limit(per_page + 1).all()
+            has_next = len(rows) > per_page
+            items = rows[:per_page]
+            pages = None
+        else:
+            items = query.offset(offset).limit(per_page).all() if offset < total else []
+            pages = math.ceil(total / per_page) if total else 0
+            has_next = page < pages
+
+        has_prev = page > 1
+        return items, {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': pages,
+            'has_prev': has_prev,
+            'has_next': has_next,
+            'prev_page': page - 1 if has_prev else None,
+            'next_page': page + 1 if has_next else None
+        }
+
+    @staticmethod
+    def eager_options(category_joined=False):
+        """
+        Opciones de carga para listados: categoría y usuario de última actualización
+
+        Args:
+            category_joined: True si la query ya hace outerjoin(Category)
+                (se reutiliza el join con contains_eager)
+
+        Returns:
+            list: Opciones para Query.options(*options)
+        """
+        category_option = (
+            contains_eager(Product.category) if category_joined
+            else joinedload(Product.category)
+        )
+        return [
+            category_option,
+            joinedload(Product.last_updated_by).load_only(User.id, User.full_name)
+        ]
+
+    @staticmethod
+    def serialize(product):
+        """
+        Serializar un producto para listados (relaciones ya cargadas con eager_options)
+
+        Args:
+            product: Instancia de Product
+
+        Returns:
+            dict: to_dict() + profit_margin + category resumida
+        """
+        product_dict = product.to_dict()
+
+        # CA-4: Margen de ganancia
+        product_dict['profit_margin'] = product.calculate_profit_margin()
+
+        # CA-1: Información de categoría
+        category = product.category
+        product_dict['category'] = {
+            'id': category.id,
+            'name': category.name,
+            'color': category.color,
+            'icon': category.icon
+        } if category else None
+
+        return product_dict
@@ -0,0 +1,264 @@
+"""
+Servicio de búsqueda de productos
+
+US-PROD-003: Buscar y filtrar productos
+- Búsqueda por nombre, descripción y SKU sin distinguir acentos ni mayúsculas
+- Coincidencia por prefijo en SKU
+- Resultados ordenados por relevancia
+
+PostgreSQL: índices GIN pg_trgm sobre nombre/SKU y tsvector ('spanish') sobre
+nombre + descripción (ver migración c9d1e2f3a4b5).
+SQLite: tabla virtual FTS5 `products_fts` sincronizada por triggers.
+"""
+from sqlalchemy import event, func, or_, case, literal_column, select, table, text
+from app import db
+from app.models.product import Product
+from app.utils.search import normalize_text, tokenize, escape_like
+
+
+# Función inmutable creada por la migración (unaccent no es IMMUTABLE y no se puede indexar)
+PG_UNACCENT_FUNCTION = 'gestrack_unaccent'
+PG_TS_CONFIG = 'spanish'
+
+SQLITE_FTS_TABLE = 'products_fts'
+
+# FTS5 con contenido externo: el índice lee de `products` usando su rowid implícito
+SQLITE_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        sku, name, description,
+        content='products', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, sku, name, description)
+        VALUES (new.rowid, new.sku, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, sku, name, description)
+        VALUES ('delete', old.rowid, old.sku, old.name, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF sku, name, description ON products BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, sku, name, description)
+        VALUES ('delete', old.rowid, old.sku, old.name, old.description);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, sku, name, description)
+        VALUES (new.rowid, new.sku, new.name, new.description);
+    END""",
+]
+
+SQLITE_FTS_DROP_DDL = [
+    'DROP TRIGGER IF EXISTS products_fts_au',
+    'DROP TRIGGER IF EXISTS products_fts_ad',
+    'DROP TRIGGER IF EXISTS products_fts_ai',
+    f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}',
+]
+
+
+@event.listens_for(Product.__table__, 'after_create')
+def _create_sqlite_fts(target, connection, **kw):
+    """Crear índice FTS5 junto con la tabla products (db.create_all en SQLite)"""
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in SQLITE_FTS_DDL:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Product.__table__, 'before_drop')
+def _drop_sqlite_fts(target, connection, **kw):
+    """Eliminar índice FTS5 antes de borrar la tabla products"""
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in SQLITE_FTS_DROP_DDL:
+        connection.exec_driver_sql(statement)
+
+
+class ProductSearchService:
+    """
+    Construye filtros y expresiones de relevancia para buscar productos
+
+    Uso:
+        query = query.filter(ProductSearchService.build_filter(term))
+        query = query.order_by(ProductSearchService.rank_expression(term).desc())
+    """
+
+    @staticmethod
+    def normalize_term(term):
+        """
+        Normalizar término: minúsculas, sin acentos y espacios colapsados
+
+        Args:
+            term: Texto ingresado por el usuario
+
+        Returns:
+            str: Término normalizado ('' si no hay texto útil)
+        """
+        return normalize_text(term)
+
+    @staticmethod
+    def tokenize(term):
+        """Tokens alfanuméricos del término normalizado (seguros para MATCH / tsquery)"""
+        return tokenize(term)
+
+    @staticmethod
+    def _dialect():
+        return db.session.get_bind().dialect.name
+
+    # ------------------------------------------------------------------
+    # PostgreSQL
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _pg_unaccent(expression):
+        return getattr(func, PG_UNACCENT_FUNCTION)(func.lower(expression))
+
+    @staticmethod
+    def _pg_document():
+        """Misma expresión que el índice idx_products_search_tsv"""
+        return func.to_tsvector(
+            literal_column(f"'{PG_TS_CONFIG}'::regconfig"),
+            ProductSearchService._pg_unaccent(
+                func.coalesce(Product.name, '') + ' ' + func.coalesce(Product.description, '')
+            )
+        )
+
+    @staticmethod
+    def _pg_tsquery(tokens):
+        return func.to_tsquery(
+            literal_column(f"'{PG_TS_CONFIG}'::regconfig"),
+            ' & '.join(f'{token}:*' for token in tokens)
+        )
+
+    # ------------------------------------------------------------------
+    # SQLite FTS5
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _fts_match_expression(tokens):
+        """Consulta MATCH de FTS5: todos los tokens, cada uno como prefijo"""
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    @staticmethod
+    def _sqlite_rowid():
+        return literal_column(f'{Product.__tablename__}.rowid')
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def build_filter(term):
+        """
+        Condición booleana para filtrar productos por el término de búsqueda
+
+        Args:
+            term: Texto de búsqueda
+
+        Returns:
+            ClauseElement | None: None si el término está vacío
+        """
+        normalized = ProductSearchService.normalize_term(term)
+        if not normalized:
+            return None
+
+        tokens = ProductSearchService.tokenize(term)
+        escaped = escape_like(normalized)
+        sku_prefix = func.lower(Product.sku).like(f'{escaped}%', escape='\\')
+        dialect = ProductSearchService._dialect()
+
+        if dialect == 'postgresql':
+            conditions = [
+                sku_prefix,
+                # pg_trgm: LIKE '%x%' usa el índice GIN gin_trgm_ops
+                ProductSearchService._pg_unaccent(Product.name).like(f'%{escaped}%', escape='\\'),
+            ]
+            if tokens:
+                conditions.append(
+                    ProductSearchService._pg_document().op('@@')(ProductSearchService._pg_tsquery(tokens))
+                )
+            return or_(*conditions)
+
+        if dialect == 'sqlite' and tokens:
+            fts_rowids = select(literal_column('rowid')).select_from(
+                table(SQLITE_FTS_TABLE)
+            ).where(
+                text(f'{SQLITE_FTS_TABLE} MATCH :fts_query').bindparams(
+                    fts_query=ProductSearchService._fts_match_expression(tokens)
+                )
+            )
+            return or_(sku_prefix, ProductSearchService._sqlite_rowid().in_(fts_rowids))
+
+        # Otros motores: coincidencia parcial simple
+        return or_(
+            Product.name.ilike(f'%{escaped}%', escape='\\'),
+            Product.sku.ilike(f'%{escaped}%', escape='\\')
+        )
+
+    @staticmethod
+    def rank_expression(term):
+        """
+        Expresión de relevancia (mayor = más relevante)
+
+        Prioridad: SKU exacto > prefijo de SKU > relevancia de texto.
+
+        Args:
+            term: Texto de búsqueda
+
+        Returns:
+            ColumnElement | None: None si el término está vacío
+        """
+        normalized = ProductSearchService.normalize_term(term)
+        if not normalized:
+            return None
+
+        tokens = ProductSearchService.tokenize(term)
+        escaped = escape_like(normalized)
+        sku_lower = func.lower(Product.sku)
+        sku_score = case(
+            (sku_lower == normalized, 100.0),
+            (sku_lower.like(f'{escaped}%', escape='\\'), 50.0),
+            else_=0.0
+        )
+        dialect = ProductSearchService._dialect()
+
+        if dialect == 'postgresql':
+            text_score = func.similarity(ProductSearchService._pg_unaccent(Product.name), normalized)
+            if tokens:
+                text_score = text_score + func.ts_rank(
+                    ProductSearchService._pg_document(),
+                    ProductSearchService._pg_tsquery(tokens)
+                )
+            return sku_score + text_score
+
+        if dialect == 'sqlite' and tokens:
+            # bm25() es negativo: más cercano a -inf = más relevante
+            bm25_score = select(-func.bm25(literal_column(SQLITE_FTS_TABLE))).select_from(
+                table(SQLITE_FTS_TABLE)
+            ).where(
+                text(f'{SQLITE_FTS_TABLE} MATCH :fts_rank_query').bindparams(
+                    fts_rank_query=ProductSearchService._fts_match_expression(tokens)
+                ),
+                literal_column(f'{SQLITE_FTS_TABLE}.rowid') == ProductSearchService._sqlite_rowid()
+            ).scalar_subquery()
+            return sku_score + func.coalesce(bm25_score, 0.0)
+
+        return sku_score
+
+    @staticmethod
+    def apply(query, term, order_by_rank=True):
+        """
+        Aplicar búsqueda (y opcionalmente orden por relevancia) a una query de Product
+
+        Args:
+            query: Query sobre Product
+            term: Texto de búsqueda
+            order_by_rank: Ordenar por relevancia descendente
+
+        Returns:
+            Query: Query filtrada (sin cambios si el término está vacío)
+        """
+        condition = ProductSearchService.build_filter(term)
+        if condition is None:
+            return query
+        query = query.filter(condition)
+        if order_by_rank:
+            query = query.order_by(ProductSearchService.rank_expression(term).desc())
+        return query
@@ -4,9 +4,8 @@ US-INV-004 CA-4 y CA-5: Configuración masiva y sugerencias inteligentes
 """
 from app import db
 from app.models.product import Product
-from app.models.inventory_movement import InventoryMovement
+from app.services.movement_rollup_service import MovementRollupService
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_
 import math
 
 
@@ -46,20 +45,9 @@ class ReorderPointService:
         if not product:
             return None
 
-        # Calcular ventas de los últimos 30 días
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-
-        # Obtener movimientos de tipo 'venta' (cantidad negativa)
-        sales_movements = InventoryMovement.query.filter(
-            and_(
-                InventoryMovement.product_id == product_id,
-                InventoryMovement.movement_type == 'venta',
-                InventoryMovement.created_at >= thirty_days_ago
-            )
-        ).all()
-
-        # Calcular total de unidades vendidas (tomar valor absoluto)
-        total_sold = sum(abs(movement.quantity) for movement in sales_movements)
+        # Ventas de los últimos 30 días (tipo 'venta'), desde los agregados diarios
+        thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).date()
+        total_sold = MovementRollupService.product_units(product_id, 'venta', thirty_days_ago)
 
         # Calcular promedio diario
         average_daily_sales = total_sold / 30 if total_sold > 0 else 0
@@ -6,6 +6,8 @@ from app import db
 from app.models.order import Order, OrderStatusHistory
 from app.models.return_order import Return, ReturnItem
 from app.models.product import Product
+from app.services.critical_stock_alert_service import CriticalStockAlertService
+from app.services.customer_stats_service import CustomerStatsService
 from app.services.stock_service import StockUpdateError
 from app.utils.constants import RETURN_WINDOW_DAYS
 from decimal import Decimal
@@ -225,6 +227,12 @@ class ReturnService:
                 return_obj.refund_method = data.get('refund_method')
                 return_obj.refund_reference = data.get('refund_reference')
 
+                # El monto devuelto se descuenta del gasto acumulado del cliente
+                CustomerStatsService.record_return_approved(return_obj)
+
+                # US-INV-007: El stock devuelto puede resolver alertas
+                CriticalStockAlertService.evaluate_stock_alerts(product_ids)
+
             return_obj.status = new_status
             return_obj.approved_by_id = user_id
             return_obj.approved_at = datetime.utcnow()
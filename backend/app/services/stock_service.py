@@ -12,6 +12,8 @@ US-INV-007: Alerta de Stock Crítico
 from app import db
 from app.models.product import Product
 from app.models.inventory_movement import InventoryMovement
+from app.services.critical_stock_alert_service import CriticalStockAlertService
+from app.utils.metrics import timed
 from datetime import datetime
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import StaleDataError
@@ -41,6 +43,7 @@ class StockService:
     """
 
     @staticmethod
+    @timed('stock_update')
     def update_stock(product_id, quantity_change, user_id, movement_type, reason=None, reference=None, notes=None, expected_version=None):
         """
         Actualiza el stock de un producto con optimistic locking (CA-5)
@@ -112,33 +115,12 @@ class StockService:
                 notes=notes
             )
 
-            # Guardar cambios
             db.session.add(movement)
-            db.session.commit()
 
-            # US-INV-007: Gestionar alertas de stock crítico
-            try:
-                from app.services.critical_stock_alert_service import CriticalStockAlertService
-
-                # CA-1: Crear alerta si stock llega a 0
-                if new_stock == 0 and previous_stock > 0:
-                    CriticalStockAlertService.check_and_create_alert(
-                        product_id=product_id,
-                        previous_stock=previous_stock,
-                        new_stock=new_stock,
-                        user_id=user_id
-                    )
+            # US-INV-007: Alertas de stock crítico en la misma transacción
+            CriticalStockAlertService.evaluate_stock_alerts([product.id])
 
-                # CA-8: Resolver alerta si stock se recupera
-                elif new_stock > 0 and previous_stock == 0:
-                    CriticalStockAlertService.check_and_resolve_alert(
-                        product_id=product_id,
-                        previous_stock=previous_stock,
-                        new_stock=new_stock
-                    )
-            except Exception as e:
-                # No fallar la operación principal si hay error en alertas
-                print(f"Warning: Error managing critical stock alerts: {str(e)}")
+            db.session.commit()
 
             return product, movement
 
@@ -0,0 +1,183 @@
+"""
+Ejecución de tareas en segundo plano con seguimiento de progreso
+
+Las tareas corren con socketio.start_background_task (modo threading) dentro
+de un contexto de aplicación propio. El estado se guarda en memoria del
+proceso y el progreso se emite por WebSocket en el evento 'job_progress'.
+
+Uso:
+    job = start_job('segmentation_recalculate', recalculate_all_categories)
+    get_job(job['id'])  # {'status': 'running', 'processed': 5000, 'total': 20000, ...}
+
+La función recibe `progress_callback(processed, total)` como argumento nombrado.
+
+Limitación: el estado es por proceso. Con varios workers, get_job() desde
+otro worker devuelve None (el sondeo responde 404; el evento 'job_progress'
+sí llega a todos los clientes) y find_running_job() solo ve los trabajos
+propios. Las tareas que no deben correr dos veces a la vez se protegen con
+un lock de base de datos (app.utils.sql.advisory_lock), no con este registro.
+"""
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import current_app
+from app.utils.metrics import JOB_DURATION
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUS_PENDING = 'pending'
+JOB_STATUS_RUNNING = 'running'
+JOB_STATUS_COMPLETED = 'completed'
+JOB_STATUS_FAILED = 'failed'
+
+# Máximo de trabajos terminados que se conservan para consulta
+MAX_FINISHED_JOBS = 50
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _snapshot(job):
+    """Copia serializable del estado de un trabajo"""
+    data = dict(job)
+    for key in ('created_at', 'started_at', 'finished_at'):
+        if data.get(key):
+            data[key] = data[key].isoformat()
+    total = data.get('total')
+    data['percentage'] = round(data['processed'] / total * 100, 1) if total else None
+    return data
+
+
+def _update_job(job_id, **fields):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        job.update(fields)
+        return _snapshot(job)
+
+
+def _prune_finished_jobs():
+    """Descartar los trabajos terminados más antiguos"""
+    finished = sorted(
+        (job for job in _jobs.values() if job['status'] in (JOB_STATUS_COMPLETED, JOB_STATUS_FAILED)),
+        key=lambda job: job['finished_at']
+    )
+    excess = len(finished) - MAX_FINISHED_JOBS
+    for job in finished[:max(excess, 0)]:
+        _jobs.pop(job['id'], None)
+
+
+def _emit_progress(snapshot):
+    try:
+        from app import socketio
+        socketio.emit('job_progress', snapshot)
+    except Exception:
+        logger.debug('No se pudo emitir progreso del trabajo %s', snapshot.get('id'))
+
+
+def _run_job(app, job_id, target, args, kwargs):
+    with app.app_context():
+        from app import db
+
+        def progress_callback(processed, total=None):
+            fields = {'processed': processed}
+            if total is not None:
+                fields['total'] = total
+            snapshot = _update_job(job_id, **fields)
+            if snapshot:
+                _emit_progress(snapshot)
+
+        _update_job(job_id, status=JOB_STATUS_RUNNING, started_at=datetime.utcnow())
+        start = time.perf_counter()
+        status = JOB_STATUS_FAILED
+        try:
+            result = target(*args, progress_callback=progress_callback, **kwargs)
+            snapshot = _update_job(
+                job_id,
+                status=JOB_STATUS_COMPLETED,
+                result=result,
+                finished_at=datetime.utcnow()
+            )
+            status = JOB_STATUS_COMPLETED
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('Trabajo %s falló', job_id)
+            snapshot = _update_job(
+                job_id,
+                status=JOB_STATUS_FAILED,
+                error=str(e),
+                finished_at=datetime.utcnow()
+            )
+        finally:
+            job = get_job(job_id)
+            JOB_DURATION.observe(
+                time.perf_counter() - start,
+                job=job['name'] if job else 'unknown',
+                status=status
+            )
+            db.session.remove()
+            with _jobs_lock:
+                _prune_finished_jobs()
+
+        if snapshot:
+            _emit_progress(snapshot)
+
+
+def start_job(name, target, *args, **kwargs):
+    """
+    Iniciar una tarea en segundo plano
+
+    Args:
+        name: Nombre del tipo de trabajo (ej: 'segmentation_recalculate')
+        target: Función a ejecutar; recibe progress_callback como kwarg
+        *args, **kwargs: Argumentos adicionales para target
+
+    Returns:
+        dict: Estado inicial del trabajo
+    """
+    from app import socketio
+
+    job_id = str(uuid.uuid4())
+    job = {
+        'id': job_id,
+        'name': name,
+        'status': JOB_STATUS_PENDING,
+        'processed': 0,
+        'total': None,
+        'result': None,
+        'error': None,
+        'created_at': datetime.utcnow(),
+        'started_at': None,
+        'finished_at': None,
+    }
+    with _jobs_lock:
+        _jobs[job_id] = job
+        snapshot = _snapshot(job)
+
+    app = current_app._get_current_object()
+    socketio.start_background_task(_run_job, app, job_id, target, args, kwargs)
+    return snapshot
+
+
+def get_job(job_id):
+    """
+    Obtener el estado de un trabajo
+
+    Returns:
+        dict | None: Estado del trabajo o None si no existe
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return _snapshot(job) if job else None
+
+
+def find_running_job(name):
+    """Trabajo pendiente o en curso con ese nombre (para evitar ejecuciones duplicadas)"""
+    with _jobs_lock:
+        for job in _jobs.values():
+            if job['name'] == name and job['status'] in (JOB_STATUS_PENDING, JOB_STATUS_RUNNING):
+                return _snapshot(job)
+    return None
@@ -0,0 +1,46 @@
+"""
+Filtro de Bloom en memoria
+
+Responde "seguro que no está" sin falsos negativos y "puede estar" con una
+tasa de falsos positivos acotada. Se usa para evitar consultas a la base de
+datos en validaciones de unicidad que casi siempre resultan libres.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Conjunto probabilístico de cadenas (sin borrado)"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        """
+        Args:
+            capacity: Número de elementos esperados
+            error_rate: Tasa de falsos positivos objetivo a plena capacidad
+        """
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))), 8)
+        self.hash_count = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Doble hashing (Kirsch-Mitzenmacher) sobre un único digest
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    @property
+    def is_saturated(self):
+        """Más elementos que la capacidad prevista: la tasa de error ya no se cumple"""
+        return self.count > self.capacity
@@ -0,0 +1,89 @@
+"""
+Engines de base de datos: enrutamiento de reportes y monitoreo del pool
+
+El bind 'reports' (SQLALCHEMY_BINDS) apunta a la misma base con un pool propio
+y un statement_timeout mayor. Las rutas de reportes largos se decoran con
+@use_reporting_engine: mientras dura el request, las lecturas de db.session
+van a ese engine y no ocupan conexiones del pool de pedidos y stock. Los
+flush (escrituras ORM) siguen yendo al engine principal. Sin el bind (tests)
+todo usa el engine principal.
+
+init_pool_monitoring() registra un aviso en el log cuando un pool se acerca
+a su capacidad (pool_size + max_overflow).
+"""
+import functools
+import logging
+import time
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+REPORTS_BIND_KEY = 'reports'
+
+_REPORTS_FLAG = 'use_reporting_engine'
+# Segundos entre avisos de saturación del mismo pool
+SATURATION_LOG_INTERVAL = 60
+
+
+class RoutingSession(Session):
+    """Sesión que envía las lecturas al engine de reportes cuando está activado"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(_REPORTS_FLAG) and not self._flushing:
+            engine = self._db.engines.get(REPORTS_BIND_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_reporting_engine(f):
+    """Decorador de rutas de solo lectura con consultas largas"""
+    @functools.wraps(f)
+    def decorated_function(*args, **kwargs):
+        from app import db
+
+        session = db.session()
+        previous = session.info.get(_REPORTS_FLAG, False)
+        session.info[_REPORTS_FLAG] = True
+        try:
+            return f(*args, **kwargs)
+        finally:
+            session.info[_REPORTS_FLAG] = previous
+
+    return decorated_function
+
+
+def init_pool_monitoring(app, engines):
+    """
+    Avisar cuando el uso de un pool supera DB_POOL_SATURATION_WARN_RATIO
+
+    Args:
+        engines: dict {bind_key: Engine} (db.engines)
+    """
+    ratio = app.config.get('DB_POOL_SATURATION_WARN_RATIO', 0.8)
+
+    for bind_key, engine in engines.items():
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout') or not hasattr(pool, 'size'):
+            continue  # Pools sin límite (SQLite en memoria)
+
+        name = bind_key or 'default'
+        state = {'last_warning': 0.0}
+
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy,
+                         pool=pool, name=name, state=state):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            in_use = pool.checkedout()
+            if capacity <= 0 or in_use < capacity * ratio:
+                return
+            now = time.monotonic()
+            if now - state['last_warning'] < SATURATION_LOG_INTERVAL:
+                return
+            state['last_warning'] = now
+            logger.warning(
+                'Pool de base de datos cerca de saturarse: engine=%s en_uso=%d capacidad=%d',
+                name, in_use, capacity
+            )
+
+        event.listen(pool, 'checkout', _on_checkout)
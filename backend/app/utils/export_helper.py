@@ -2,11 +2,22 @@
 Helper para exportación de datos a CSV y Excel
 
 US-INV-003: CA-6 - Export functionality
+US-CUST-012: Exportación en streaming (memoria constante) para listados grandes
 """
 import csv
 import io
+import tempfile
+import time
 from datetime import datetime
-from flask import Response
+from flask import Response, stream_with_context
+from app.utils.metrics import EXPORT_DURATION
+
+# Filas por bloque enviado al cliente en exportaciones en streaming
+STREAM_CHUNK_ROWS = 500
+# Bytes por bloque al enviar un archivo XLSX ya generado
+STREAM_FILE_CHUNK_SIZE = 64 * 1024
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
 
 class ExportHelper:
@@ -70,6 +81,144 @@ class ExportHelper:
 
         return response
 
+    @staticmethod
+    def _format_value(value):
+        """Formatear un valor para CSV/Excel (None, fechas y booleanos)"""
+        if value is None:
+            return ''
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        if isinstance(value, bool):
+            return 'Sí' if value else 'No'
+        return value
+
+    @staticmethod
+    def _attachment_response(body, filename, mimetype, content_type):
+        return Response(
+            body,
+            mimetype=mimetype,
+            headers={
+                'Content-Disposition': f'attachment; filename={filename}',
+                'Content-Type': content_type
+            }
+        )
+
+    @staticmethod
+    def _observe_stream(chunks, export_format, start):
+        """Registrar la duración de la exportación al enviar el último bloque"""
+        try:
+            yield from chunks
+        finally:
+            EXPORT_DURATION.observe(time.perf_counter() - start, format=export_format)
+
+    @staticmethod
+    def stream_csv(rows, columns, filename_prefix='export'):
+        """
+        Exporta a CSV en streaming: las filas se escriben y envían por bloques
+
+        Args:
+            rows: Iterable (puede ser un generador) de diccionarios
+            columns: Lista de tuplas (key, header_name)
+            filename_prefix: Prefijo para el nombre del archivo
+
+        Returns:
+            Flask Response en streaming con el archivo CSV
+        """
+        start = time.perf_counter()
+
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+            writer.writerow([col[1] for col in columns])
+
+            for index, row in enumerate(rows, 1):
+                writer.writerow([str(ExportHelper._format_value(row.get(key, ''))) for key, _ in columns])
+                if index % STREAM_CHUNK_ROWS == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate(0)
+
+            yield buffer.getvalue()
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return ExportHelper._attachment_response(
+            stream_with_context(ExportHelper._observe_stream(generate(), 'csv', start)),
+            f'{filename_prefix}_{timestamp}.csv',
+            'text/csv',
+            'text/csv; charset=utf-8'
+        )
+
+    @staticmethod
+    def stream_excel(rows, columns, filename_prefix='export', sheet_name='Datos'):
+        """
+        Exporta a Excel (XLSX) con memoria constante
+
+        Usa el modo write_only de openpyxl (las filas no se guardan en memoria)
+        sobre un archivo temporal que luego se envía por bloques. Sin openpyxl
+        se usa CSV en streaming como fallback.
+
+        Args:
+            rows: Iterable (puede ser un generador) de diccionarios
+            columns: Lista de tuplas (key, header_name)
+            filename_prefix: Prefijo para el nombre del archivo
+            sheet_name: Nombre de la hoja
+
+        Returns:
+            Flask Response en streaming con el archivo Excel
+        """
+        try:
+            from openpyxl import Workbook
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.styles import Font, PatternFill, Alignment
+            from openpyxl.utils import get_column_letter
+        except ImportError:
+            return ExportHelper.stream_csv(rows, columns, filename_prefix)
+
+        start = time.perf_counter()
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title=sheet_name)
+        for col_num in range(1, len(columns) + 1):
+            ws.column_dimensions[get_column_letter(col_num)].width = 15
+
+        header_font = Font(bold=True, color='FFFFFF')
+        header_fill = PatternFill(start_color='2e7d32', end_color='2e7d32', fill_type='solid')
+        header_alignment = Alignment(horizontal='center', vertical='center')
+
+        headers = []
+        for _, header in columns:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_alignment
+            headers.append(cell)
+        ws.append(headers)
+
+        for row in rows:
+            ws.append([ExportHelper._format_value(row.get(key, '')) for key, _ in columns])
+
+        # El XLSX es un zip: se termina en disco y se envía por bloques
+        output = tempfile.TemporaryFile()
+        wb.save(output)
+        output.seek(0)
+
+        def generate():
+            try:
+                while True:
+                    chunk = output.read(STREAM_FILE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+            finally:
+                output.close()
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return ExportHelper._attachment_response(
+            ExportHelper._observe_stream(generate(), 'xlsx', start),
+            f'{filename_prefix}_{timestamp}.xlsx',
+            XLSX_MIMETYPE,
+            XLSX_MIMETYPE
+        )
+
     @staticmethod
     def export_inventory_movements_to_csv(movements):
         """
@@ -425,7 +574,11 @@ class ExportHelper:
             ('valor_total', 'Valor Total'),
             ('estado', 'Estado'),
             ('ultima_actualizacion', 'Última Actualización'),
-            ('proveedor', 'Proveedor Principal')
+            ('proveedor', 'Proveedor Principal'),
+            ('rotacion', 'Rotación'),
+            ('dias_inventario', 'Días de Inventario'),
+            ('sell_through', 'Sell-through (%)'),
+            ('clase_abc', 'Clase ABC')
         ]
 
         return ExportHelper.export_to_csv(
@@ -478,7 +631,11 @@ class ExportHelper:
             ('valor_total', 'Valor Total', 14),
             ('estado', 'Estado', 15),
             ('ultima_actualizacion', 'Última Actualización', 22),
-            ('proveedor', 'Proveedor Principal', 20)
+            ('proveedor', 'Proveedor Principal', 20),
+            ('rotacion', 'Rotación', 12),
+            ('dias_inventario', 'Días de Inventario', 16),
+            ('sell_through', 'Sell-through (%)', 16),
+            ('clase_abc', 'Clase ABC', 11)
         ]
 
         # Encabezados
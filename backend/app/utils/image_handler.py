@@ -3,7 +3,7 @@ Utilidad para manejo de imágenes de productos
 Validación, optimización y almacenamiento de imágenes
 """
 import os
-import uuid
+import hashlib
 from werkzeug.utils import secure_filename
 from PIL import Image
 import io
@@ -15,6 +15,7 @@ MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 MAX_IMAGE_WIDTH = 1200
 MAX_IMAGE_HEIGHT = 1200
 DEFAULT_PRODUCT_IMAGE = 'default-product.png'
+CONTENT_HASH_LENGTH = 16  # Caracteres hex del sha256 usados en el nombre del archivo
 
 
 def allowed_file(filename):
@@ -115,19 +116,23 @@ def save_product_image(file_storage, sku, upload_folder):
         # Optimizar imagen
         optimized_image = optimize_image(file_storage)
 
-        # Generar nombre de archivo: {sku}_{timestamp}.{extension}
-        timestamp = uuid.uuid4().hex[:8]
+        # Generar nombre de archivo por contenido: {sku}_{hash}.{extension}
+        # El hash permite servir la imagen como inmutable (ver utils/static_files.py)
+        content_hash = hashlib.sha256(optimized_image.getbuffer()).hexdigest()[:CONTENT_HASH_LENGTH]
         extension = secure_filename(file_storage.filename).rsplit('.', 1)[1].lower()
-        filename = f"{secure_filename(sku)}_{timestamp}.{extension}"
+        filename = f"{secure_filename(sku)}_{content_hash}.{extension}"
 
         # Crear ruta completa
         products_folder = os.path.join(upload_folder, 'products')
         os.makedirs(products_folder, exist_ok=True)
         filepath = os.path.join(products_folder, filename)
 
-        # Guardar archivo optimizado
-        with open(filepath, 'wb') as f:
-            f.write(optimized_image.getbuffer())
+        # Guardar archivo optimizado (si ya existe, el contenido es idéntico)
+        if not os.path.exists(filepath):
+            tmp_path = f'{filepath}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(optimized_image.getbuffer())
+            os.replace(tmp_path, filepath)
 
         # Retornar URL completa con prefijo /uploads/ para acceso desde frontend
         return True, f'/uploads/products/{filename}'
@@ -0,0 +1,352 @@
+"""
+Métricas en proceso con exposición en formato de texto de Prometheus
+
+Contadores, gauges e histogramas en memoria (con lock, sin dependencias ni
+red), registrados en un registro de módulo y expuestos en GET /metrics.
+Cada proceso (worker) expone sus propios valores; Prometheus los agrega.
+
+Uso:
+    ORDERS_CREATED.inc()
+    with SERVICE_DURATION.time(operation='order_create'):
+        ...
+
+    @timed('stock_update')
+    def update_stock(...):
+"""
+import functools
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from flask import Response, current_app, g, request
+
+# Límites por defecto de los histogramas de latencia (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Exportaciones y trabajos en segundo plano duran mucho más
+LONG_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name}: etiquetas esperadas {self.labelnames}, recibidas {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def collect(self):
+        """Líneas de exposición (HELP, TYPE y muestras)"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(self._samples(items))
+        return lines
+
+    def _samples(self, items):
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}'
+            for key, value in items
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Valor que solo crece (usar rate() para obtener tasas por segundo)"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Valor que sube y baja; `callback` devuelve [(etiquetas, valor)] al exponer"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def collect(self):
+        if self.callback is not None:
+            for labels, value in self.callback():
+                self.set(value, **labels)
+        return super().collect()
+
+
+class Histogram(_Metric):
+    """Distribución de observaciones en buckets acumulativos"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][index] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observar la duración del bloque (también si lanza una excepción)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        entry = self._values.get(self._key(labels))
+        return entry['count'] if entry else 0
+
+    def _samples(self, items):
+        lines = []
+        for key, entry in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, entry['counts']):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_number(float(bound)))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_number(entry["sum"])}')
+            lines.append(f'{self.name}_count{labels} {entry["count"]}')
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas expuestas en /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].collect())
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+
+def _pool_metrics():
+    """Uso de los pools de conexiones (principal y reportes) por estado"""
+    from app import db
+
+    try:
+        engines = db.engines
+    except RuntimeError:
+        return []
+
+    samples = []
+    for bind_key, engine in engines.items():
+        for state, method in (('size', 'size'), ('checked_out', 'checkedout'),
+                              ('checked_in', 'checkedin'), ('overflow', 'overflow')):
+            getter = getattr(engine.pool, method, None)
+            if getter is not None:
+                samples.append(({'engine': bind_key or 'default', 'state': state}, getter()))
+    return samples
+
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    'gestrack_http_request_duration_seconds',
+    'Latencia de requests HTTP por blueprint y ruta',
+    ('blueprint', 'endpoint', 'method', 'status')
+))
+SERVICE_DURATION = REGISTRY.register(Histogram(
+    'gestrack_service_duration_seconds',
+    'Duración de operaciones de servicio con SLO',
+    ('operation', 'outcome')
+))
+DB_POOL_CONNECTIONS = REGISTRY.register(Gauge(
+    'gestrack_db_pool_connections',
+    'Conexiones del pool de base de datos por engine y estado',
+    ('engine', 'state'),
+    callback=_pool_metrics
+))
+SOCKETIO_CONNECTIONS = REGISTRY.register(Gauge(
+    'gestrack_socketio_connections',
+    'Clientes Socket.IO conectados'
+))
+STOCK_MUTATIONS = REGISTRY.register(Counter(
+    'gestrack_stock_mutations_total',
+    'Movimientos de inventario registrados por tipo',
+    ('movement_type',)
+))
+ORDERS_CREATED = REGISTRY.register(Counter(
+    'gestrack_orders_created_total',
+    'Pedidos creados'
+))
+EXPORT_DURATION = REGISTRY.register(Histogram(
+    'gestrack_export_duration_seconds',
+    'Duración de exportaciones (hasta enviar el último byte)',
+    ('format',),
+    buckets=LONG_BUCKETS
+))
+JOB_DURATION = REGISTRY.register(Histogram(
+    'gestrack_background_job_duration_seconds',
+    'Duración de trabajos en segundo plano',
+    ('job', 'status'),
+    buckets=LONG_BUCKETS
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    'gestrack_cache_requests_total',
+    'Consultas a cachés en proceso por resultado (hit/miss)',
+    ('cache', 'result')
+))
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def timed(operation):
+    """Decorador: registra la duración en SERVICE_DURATION con outcome success/error"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = func(*args, **kwargs)
+                outcome = 'success'
+                return result
+            finally:
+                SERVICE_DURATION.observe(time.perf_counter() - start, operation=operation, outcome=outcome)
+        return wrapper
+    return decorator
+
+
+# Formato de EXPORT_DURATION según el tipo de contenido del archivo generado
+EXPORT_FORMATS = {
+    'text/csv': 'csv',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'xlsx',
+    'application/pdf': 'pdf',
+}
+
+
+def timed_export(func):
+    """
+    Decorador de rutas de exportación: registra en EXPORT_DURATION el tiempo
+    de consulta y generación del archivo
+
+    Las respuestas en streaming (ExportHelper.stream_csv/stream_excel) se
+    registran al enviar el último bloque y los errores no se registran.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        response = func(*args, **kwargs)
+        if isinstance(response, Response) and not response.is_streamed:
+            export_format = EXPORT_FORMATS.get(response.mimetype)
+            if export_format and response.status_code < 400:
+                EXPORT_DURATION.observe(time.perf_counter() - start, format=export_format)
+        return response
+    return wrapper
+
+
+def init_metrics(app):
+    """Latencia por ruta y endpoint GET /metrics (solo con METRICS_TOKEN o METRICS_PUBLIC)"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_request_start = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        start = g.pop('metrics_request_start', None)
+        if start is not None and request.endpoint != 'metrics':
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                blueprint=request.blueprint or '',
+                endpoint=request.url_rule.rule if request.url_rule else 'unmatched',
+                method=request.method,
+                status=response.status_code
+            )
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        # Rutas, volumen de pedidos y estado del pool no se publican sin
+        # METRICS_TOKEN salvo opt-in explícito (METRICS_PUBLIC)
+        token = current_app.config.get('METRICS_TOKEN')
+        if not token and not current_app.config.get('METRICS_PUBLIC', False):
+            return Response('Not Found\n', status=404, content_type='text/plain')
+        if token and not hmac.compare_digest(
+            request.headers.get('Authorization', '').encode('utf-8'), f'Bearer {token}'.encode('utf-8')
+        ):
+            return Response('Unauthorized\n', status=401, content_type='text/plain')
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
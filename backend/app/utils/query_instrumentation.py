@@ -0,0 +1,154 @@
+"""
+Instrumentación de consultas SQL por request
+
+Cuenta las sentencias, el tiempo total en base de datos y las formas de
+sentencia repetidas (señal típica de N+1) de cada request, usando los eventos
+before_cursor_execute / after_cursor_execute de SQLAlchemy.
+
+- Cabecera Server-Timing: db;dur=<ms>;desc="<n> queries" (visible en DevTools)
+- Log estructurado por request en el logger 'sql' (WARNING si hay repeticiones)
+- track_queries(): mismo colector fuera de un request (tests, trabajos)
+
+Config:
+    QUERY_INSTRUMENTATION_ENABLED: Activa cabecera y log por request
+    QUERY_REPEAT_THRESHOLD: Repeticiones de una misma forma que se reportan como N+1
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('sql')
+
+# Colectores activos en el contexto actual (un request puede estar dentro de un bloque de test)
+_collectors = ContextVar('query_collectors', default=())
+
+_WHITESPACE = re.compile(r'\s+')
+# IN (?, ?, ?) / IN (%(p_1)s, %(p_2)s) -> IN (?): misma forma sin importar el tamaño
+_IN_LIST = re.compile(r'\(\s*(?:\?|%\([^)]*\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\([^)]*\)s|%s|:\w+))*\s*\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+_START_KEY = 'query_instrumentation_start'
+
+
+def statement_shape(statement):
+    """Forma normalizada de una sentencia: sin literales, listas IN colapsadas"""
+    shape = _LITERAL.sub('?', statement)
+    shape = _IN_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class QueryStats:
+    """Sentencias, tiempo y formas repetidas registradas por un colector"""
+
+    def __init__(self):
+        self.statements = []
+        self.duration_ms = 0.0
+        self.shapes = Counter()
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def record(self, statement, duration_ms):
+        self.statements.append(statement)
+        self.duration_ms += duration_ms
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold=2):
+        """Formas ejecutadas al menos `threshold` veces, de más a menos frecuentes"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def server_timing(self):
+        return f'db;dur={self.duration_ms:.1f};desc="{self.count} queries"'
+
+
+@contextmanager
+def track_queries():
+    """
+    Registrar las sentencias ejecutadas en este contexto
+
+    Uso:
+        with track_queries() as stats:
+            ...
+        stats.count, stats.duration_ms, stats.repeated()
+    """
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors.get():
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _collectors.get()
+    starts = conn.info.get(_START_KEY)
+    if not collectors or not starts:
+        return
+    duration_ms = (time.perf_counter() - starts.pop()) * 1000
+    for stats in collectors:
+        stats.record(statement, duration_ms)
+
+
+def init_query_instrumentation(app):
+    """Registrar los hooks de request (cabecera Server-Timing y log por request)"""
+    if not app.config.get('QUERY_INSTRUMENTATION_ENABLED', True):
+        return
+
+    @app.before_request
+    def _start_query_tracking():
+        stats = QueryStats()
+        g.query_stats = stats
+        _collectors.set(_collectors.get() + (stats,))
+
+    @app.after_request
+    def _report_query_tracking(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+
+        response.headers.add('Server-Timing', stats.server_timing())
+
+        threshold = app.config.get('QUERY_REPEAT_THRESHOLD', 5)
+        repeated = stats.repeated(threshold)
+        log_data = {
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(stats.duration_ms, 1),
+            'repeated': [{'shape': shape[:200], 'count': n} for shape, n in repeated],
+        }
+        if repeated:
+            logger.warning(
+                'Posible N+1: endpoint=%s queries=%d db_ms=%.1f repeated=%d',
+                request.endpoint, stats.count, stats.duration_ms, len(repeated),
+                extra={'sql': log_data}
+            )
+        else:
+            logger.info(
+                'endpoint=%s queries=%d db_ms=%.1f',
+                request.endpoint, stats.count, stats.duration_ms,
+                extra={'sql': log_data}
+            )
+        return response
+
+    @app.teardown_request
+    def _stop_query_tracking(exc):
+        stats = g.pop('query_stats', None)
+        if stats is not None:
+            _collectors.set(tuple(c for c in _collectors.get() if c is not stats))
@@ -0,0 +1,42 @@
+"""
+Utilidades de normalización de texto para búsquedas
+
+Compartidas por la búsqueda de productos y de clientes: el mismo
+normalizador se aplica al texto indexado y al término de búsqueda.
+"""
+import re
+import unicodedata
+
+
+def normalize_text(value):
+    """
+    Normalizar texto: minúsculas, sin acentos y espacios colapsados
+
+    Args:
+        value: Texto a normalizar
+
+    Returns:
+        str: Texto normalizado ('' si no hay texto útil)
+    """
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value).lower())
+    without_accents = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(without_accents.split())
+
+
+def digits_only(value):
+    """Conservar solo dígitos (documentos y teléfonos: '300-123 45' -> '30012345')"""
+    if not value:
+        return ''
+    return re.sub(r'\D', '', str(value))
+
+
+def tokenize(value):
+    """Tokens alfanuméricos del texto normalizado"""
+    return re.findall(r'\w+', normalize_text(value))
+
+
+def escape_like(value):
+    """Escapar comodines de LIKE para que el término se trate literalmente (ESCAPE '\\')"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
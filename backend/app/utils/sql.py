@@ -0,0 +1,88 @@
+"""
+Expresiones SQL portables entre PostgreSQL (producción) y SQLite (tests)
+
+Usadas por las escrituras set-based (INSERT ... SELECT, upserts) que no pasan
+por el ORM y por lo tanto no reciben los defaults de Python de los modelos.
+"""
+from contextlib import contextmanager
+from sqlalchemy import text, literal_column, func, cast, insert, BigInteger, Date
+from app import db
+
+
+def _dialect_name(bind=None):
+    return (bind if bind is not None else db.session.get_bind()).dialect.name
+
+
+def uuid_expression():
+    """UUID v4 como texto generado por la base de datos (para INSERT ... SELECT)"""
+    if _dialect_name() == 'postgresql':
+        return text('gen_random_uuid()::text')
+
+    # SQLite: mismo formato 8-4-4-4-12 que uuid.uuid4()
+    return literal_column(
+        "lower(hex(randomblob(4)) || '-' || hex(randomblob(2)) || '-4' || "
+        "substr(hex(randomblob(2)), 2) || '-' || "
+        "substr('89ab', 1 + (abs(random()) % 4), 1) || substr(hex(randomblob(2)), 2) || '-' || "
+        "hex(randomblob(6)))"
+    )
+
+
+def day_expression(column, bind=None):
+    """Día (fecha sin hora) de una columna DateTime"""
+    if _dialect_name(bind) == 'sqlite':
+        # CAST(... AS DATE) en SQLite devuelve solo el año
+        return func.date(column)
+    return cast(column, Date)
+
+
+def epoch_expression(column, bind=None):
+    """Segundos enteros desde 1970-01-01 (UTC) de una columna DateTime sin zona"""
+    if _dialect_name(bind) == 'sqlite':
+        return cast(func.strftime('%s', column), BigInteger)
+    return cast(func.floor(func.extract('epoch', column)), BigInteger)
+
+
+def upsert_insert(table, bind=None):
+    """
+    INSERT con soporte de ON CONFLICT del dialecto
+
+    Returns:
+        tuple: (sentencia insert, True si admite on_conflict_do_*)
+    """
+    dialect = _dialect_name(bind)
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(table), False
+    return dialect_insert(table), True
+
+
+@contextmanager
+def advisory_lock(name):
+    """
+    Lock exclusivo entre procesos identificado por `name` (no bloqueante)
+
+    En PostgreSQL toma pg_try_advisory_lock en una conexión propia que se
+    mantiene durante todo el bloque, así sobrevive a los commits de la sesión;
+    si el proceso muere, el lock se libera al cerrarse la conexión. En SQLite
+    (un solo proceso en tests) siempre se concede.
+
+    Yields:
+        bool: True si se obtuvo el lock, False si lo tiene otro proceso
+    """
+    if db.engine.dialect.name != 'postgresql':
+        yield True
+        return
+
+    with db.engine.connect() as connection:
+        key = connection.execute(text('SELECT hashtext(:name)'), {'name': name}).scalar()
+        acquired = connection.execute(text('SELECT pg_try_advisory_lock(:key)'), {'key': key}).scalar()
+        connection.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': key})
+                connection.commit()
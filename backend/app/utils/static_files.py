@@ -0,0 +1,107 @@
+"""
+Utilidad para servir archivos subidos (imágenes de productos)
+
+- Nombres con hash de contenido ({sku}_{hash}.{ext}) se sirven como inmutables
+  con caché de un año y ETag fuerte derivado del hash
+- GET condicional (If-None-Match / If-Modified-Since) y peticiones Range
+- Modo opcional X-Sendfile / X-Accel-Redirect para que el servidor web
+  frontal entregue los bytes sin ocupar hilos de la aplicación
+"""
+import os
+import re
+import mimetypes
+from flask import current_app, request, send_from_directory, abort, make_response
+from werkzeug.security import safe_join
+from app.utils.image_handler import CONTENT_HASH_LENGTH
+
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60  # 1 año
+DEFAULT_MAX_AGE = 60 * 60  # 1 hora para archivos sin hash (legado, imagen por defecto)
+
+SENDFILE_MODE_NONE = None
+SENDFILE_MODE_X_SENDFILE = 'x-sendfile'
+SENDFILE_MODE_X_ACCEL = 'x-accel'
+
+_HASHED_NAME_RE = re.compile(r'_([0-9a-f]{%d})\.[A-Za-z0-9]+$' % CONTENT_HASH_LENGTH)
+
+
+def get_content_hash(filename):
+    """
+    Extraer el hash de contenido del nombre de archivo
+
+    Args:
+        filename: Ruta relativa del archivo (ej: 'products/ABC123_0f3a...e1.png')
+
+    Returns:
+        str | None: Hash si el archivo tiene nombre por contenido
+    """
+    match = _HASHED_NAME_RE.search(filename)
+    return match.group(1) if match else None
+
+
+def _cache_control(response, content_hash):
+    """Aplicar cabeceras de caché según si el archivo es inmutable"""
+    response.cache_control.public = True
+    if content_hash:
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = current_app.config.get(
+            'UPLOADS_DEFAULT_MAX_AGE', DEFAULT_MAX_AGE
+        )
+    return response
+
+
+def _accel_redirect_response(filename, content_hash):
+    """
+    Respuesta vacía con X-Accel-Redirect para que nginx sirva el archivo
+
+    nginx debe definir una location `internal` para UPLOADS_ACCEL_PREFIX
+    que apunte a UPLOAD_FOLDER.
+    """
+    prefix = current_app.config.get('UPLOADS_ACCEL_PREFIX', '/protected-uploads').rstrip('/')
+    response = make_response('')
+    response.headers['X-Accel-Redirect'] = f'{prefix}/{filename}'
+    mimetype, _ = mimetypes.guess_type(filename)
+    response.headers['Content-Type'] = mimetype or 'application/octet-stream'
+    if content_hash:
+        response.set_etag(content_hash)
+    return _cache_control(response, content_hash)
+
+
+def serve_upload(filename):
+    """
+    Servir un archivo de UPLOAD_FOLDER con cabeceras amigables para caché
+
+    Args:
+        filename: Ruta relativa dentro de UPLOAD_FOLDER
+
+    Returns:
+        Response: 200/206 con el archivo, 304 si el cliente ya lo tiene, 404 si no existe
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    filepath = safe_join(upload_folder, filename)
+    if filepath is None or not os.path.isfile(filepath):
+        abort(404)
+
+    content_hash = get_content_hash(filename)
+    mode = current_app.config.get('UPLOADS_SENDFILE_MODE')
+
+    if mode == SENDFILE_MODE_X_ACCEL:
+        # El hash en el nombre basta para responder 304 sin tocar disco
+        if content_hash and request.if_none_match.contains(content_hash):
+            response = make_response('', 304)
+            response.set_etag(content_hash)
+            return _cache_control(response, content_hash)
+        return _accel_redirect_response(filename, content_hash)
+
+    # send_file resuelve condicionales y Range. En modo x-sendfile la config
+    # USE_X_SENDFILE hace que werkzeug responda solo con la cabecera X-Sendfile
+    response = send_from_directory(
+        upload_folder,
+        filename,
+        conditional=True,
+        etag=content_hash if content_hash else True,
+        max_age=None,
+    )
+    return _cache_control(response, content_hash)
@@ -0,0 +1,204 @@
+"""
+Endpoint benchmark harness
+
+Times the key API endpoints through the Flask test client against the
+configured database (load it first with seed_large_data.py) and records, per
+endpoint, the latency percentiles, HTTP status, response size and the number
+and duration of SQL statements (app.utils.query_instrumentation). Results go
+to JSON; --compare checks them against a previous run and exits with status 1
+when an endpoint got slower than --threshold or runs more queries.
+
+Each endpoint gets one warm-up request first, so per-process caches
+(analytics, segmentation) are measured warm.
+
+Usage:
+    python benchmark_endpoints.py [--runs 10] [--only products_list,orders_list]
+                                  [--output bench.json] [--compare baseline.json] [--threshold 0.2]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from app import create_app, db
+
+ENDPOINTS = {
+    'products_list': '/api/products?page=1&per_page=20',
+    'products_by_category': '/api/products?category_id={category_id}&page=1&per_page=20',
+    'products_search': '/api/products?search=GEN&page=1&per_page=20',
+    'orders_list': '/api/orders?page=1&per_page=20',
+    'orders_by_status': '/api/orders?status=Pendiente,Confirmado&page=1&per_page=20',
+    'customer_orders_history': '/api/customers/{customer_id}/orders-history',
+    'inventory_movements': '/api/inventory/movements?page=1&per_page=50',
+    'stock_evolution': '/api/inventory/movements/stock-evolution/{product_id}',
+    'dashboard_kpis': '/api/inventory/dashboard/kpis',
+    'dashboard_low_stock': '/api/inventory/dashboard/low-stock-products',
+    'dashboard_additional_stats': '/api/inventory/dashboard/additional-stats',
+    'value_metrics': '/api/inventory/value/metrics',
+    'value_evolution': '/api/inventory/value/evolution',
+    'customer_segmentation': '/api/customers/segmentation',
+    'export_inventory': '/api/inventory/export?format=csv',
+    'export_movements': '/api/inventory/movements/export?format=csv',
+    'export_customers': '/api/customers/export?format=csv',
+}
+
+
+def auth_headers():
+    """Token de un administrador activo (los endpoints requieren JWT)"""
+    from flask_jwt_extended import create_access_token
+    from app.models.user import User
+
+    user = User.query.filter_by(role='Admin', is_active=True).order_by(User.created_at).first()
+    if user is None:
+        raise RuntimeError('No hay un usuario Admin activo para autenticar el benchmark')
+    token = create_access_token(identity=user.id, additional_claims={'role': user.role})
+    return {'Authorization': f'Bearer {token}'}
+
+
+def path_params():
+    """Cliente con pedidos, producto con movimientos y categoría para las rutas con parámetros"""
+    from app.models.category import Category
+    from app.models.inventory_movement import InventoryMovement
+    from app.models.order import Order
+
+    customer_id = db.session.query(Order.customer_id).order_by(Order.created_at.desc()).limit(1).scalar()
+    product_id = db.session.query(InventoryMovement.product_id).order_by(
+        InventoryMovement.created_at.desc()
+    ).limit(1).scalar()
+    category_id = db.session.query(Category.id).order_by(Category.name).limit(1).scalar()
+    return {'customer_id': customer_id, 'product_id': product_id, 'category_id': category_id}
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = min(int(round(percent / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def run_benchmark(client, headers, endpoints, runs=10):
+    """
+    Medir cada endpoint
+
+    Args:
+        client: Flask test client
+        headers: Cabeceras de autenticación
+        endpoints: {nombre: ruta ya resuelta}
+        runs: Peticiones medidas por endpoint (tras una de calentamiento)
+
+    Returns:
+        dict: {nombre: {'path', 'status', 'runs', 'p50_ms', 'p95_ms', 'min_ms', 'max_ms',
+                        'queries', 'sql_ms', 'bytes'}}
+    """
+    from app.utils.query_instrumentation import track_queries
+
+    results = {}
+    for name, path in endpoints.items():
+        client.get(path, headers=headers).get_data()
+
+        latencies, queries, sql_ms = [], [], []
+        status = size = None
+        for _ in range(runs):
+            with track_queries() as stats:
+                started = time.perf_counter()
+                response = client.get(path, headers=headers)
+                body = response.get_data()
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(stats.count)
+            sql_ms.append(stats.duration_ms)
+            status, size = response.status_code, len(body)
+
+        results[name] = {
+            'path': path,
+            'status': status,
+            'runs': runs,
+            'p50_ms': round(statistics.median(latencies), 2),
+            'p95_ms': round(_percentile(latencies, 95), 2),
+            'min_ms': round(min(latencies), 2),
+            'max_ms': round(max(latencies), 2),
+            'queries': int(statistics.median(queries)),
+            'sql_ms': round(statistics.median(sql_ms), 2),
+            'bytes': size,
+        }
+    return results
+
+
+def compare(current, baseline, threshold=0.2, min_delta_ms=1.0):
+    """
+    Regresiones respecto de una corrida anterior
+
+    Un endpoint regresa si su p50 supera al de referencia en más de
+    `threshold` (y en más de `min_delta_ms`) o si ejecuta más sentencias SQL.
+
+    Returns:
+        list: [{'endpoint', 'metric', 'baseline', 'current'}, ...]
+    """
+    regressions = []
+    for name, result in current.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if (result['p50_ms'] > reference['p50_ms'] * (1 + threshold)
+                and result['p50_ms'] - reference['p50_ms'] > min_delta_ms):
+            regressions.append({'endpoint': name, 'metric': 'p50_ms',
+                                'baseline': reference['p50_ms'], 'current': result['p50_ms']})
+        if result['queries'] > reference['queries']:
+            regressions.append({'endpoint': name, 'metric': 'queries',
+                                'baseline': reference['queries'], 'current': result['queries']})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=10, help='Timed requests per endpoint')
+    parser.add_argument('--only', help='Comma-separated endpoint names (default: all)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Previous results JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed p50 slowdown (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else list(ENDPOINTS)
+    unknown = [name for name in names if name not in ENDPOINTS]
+    if unknown:
+        sys.exit(f"Unknown endpoints: {', '.join(unknown)}")
+
+    app = create_app()
+    with app.app_context():
+        params = path_params()
+        endpoints = {name: ENDPOINTS[name].format(**params) for name in names}
+        results = run_benchmark(app.test_client(), auth_headers(), endpoints, args.runs)
+        database = db.engine.dialect.name
+
+    print(f"{'endpoint':<28} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'sql ms':>8}")
+    for name, result in results.items():
+        print(f"{name:<28} {result['status']:>6} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+              f"{result['queries']:>8} {result['sql_ms']:>8.2f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump({
+                'generated_at': datetime.utcnow().isoformat(),
+                'database': database,
+                'python': platform.python_version(),
+                'runs': args.runs,
+                'endpoints': results,
+            }, output, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)['endpoints']
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['endpoint']}: {regression['metric']} "
+                  f"{regression['baseline']} -> {regression['current']}")
+        if regressions:
+            sys.exit(1)
+        print('No regressions against', args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""US-CUST-001: Unique index on lower(correo) for case-insensitive email checks
+
+Revision ID: a3b4c5d6e7f8
+Revises: f2a3b4c5d6e7
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3b4c5d6e7f8'
+down_revision = 'f2a3b4c5d6e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Correos repetidos con distinta capitalización impiden crear el índice
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT lower(correo) FROM customers GROUP BY lower(correo) HAVING count(*) > 1 LIMIT 5"
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            'Hay correos de clientes duplicados sin distinguir mayúsculas; '
+            f'corríjalos antes de migrar: {", ".join(duplicates)}'
+        )
+
+    op.create_index(
+        'ux_customers_correo_lower',
+        'customers',
+        [sa.text('lower(correo)')],
+        unique=True
+    )
+
+
+def downgrade():
+    op.drop_index('ux_customers_correo_lower', table_name='customers')
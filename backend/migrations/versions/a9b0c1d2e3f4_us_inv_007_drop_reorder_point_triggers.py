@@ -0,0 +1,126 @@
+"""US-INV-007: Drop the reorder point triggers in favour of the alert engine
+
+Revision ID: a9b0c1d2e3f4
+Revises: f8a9b0c1d2e3
+Create Date: 2026-10-19 20:00:00.000000
+
+Los triggers de 3e515d718137 (trigger_reorder_point / check_reorder_point()
+en PostgreSQL, trigger_reorder_point_alert y trigger_resolve_reorder_alert en
+SQLite) escribían alertas 'reorder_point' con su propia regla (stock <= punto
+de reorden, incluido 0). Al pasar de más del punto de reorden directamente a
+0 dejaban una alerta 'reorder_point' que el motor resolvía de inmediato al
+crear la 'out_of_stock'. Desde ahora solo
+CriticalStockAlertService.evaluate_stock_alerts escribe alertas.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9b0c1d2e3f4'
+down_revision = 'f8a9b0c1d2e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect_name = op.get_bind().dialect.name
+
+    if dialect_name == 'sqlite':
+        op.execute(sa.text("DROP TRIGGER IF EXISTS trigger_reorder_point_alert"))
+        op.execute(sa.text("DROP TRIGGER IF EXISTS trigger_resolve_reorder_alert"))
+    elif dialect_name == 'postgresql':
+        op.execute(sa.text("DROP TRIGGER IF EXISTS trigger_reorder_point ON products"))
+        op.execute(sa.text("DROP FUNCTION IF EXISTS check_reorder_point()"))
+
+
+def downgrade():
+    # Mismos triggers que creó 3e515d718137
+    dialect_name = op.get_bind().dialect.name
+
+    if dialect_name == 'sqlite':
+        op.execute(sa.text("""
+            CREATE TRIGGER IF NOT EXISTS trigger_reorder_point_alert
+            AFTER UPDATE OF stock_quantity ON products
+            FOR EACH ROW
+            WHEN (NEW.stock_quantity <= NEW.reorder_point AND OLD.stock_quantity > OLD.reorder_point)
+            BEGIN
+                INSERT INTO inventory_alerts (
+                    id, product_id, alert_type, current_stock,
+                    reorder_point, is_active, created_at
+                )
+                SELECT
+                    lower(hex(randomblob(4)) || '-' || hex(randomblob(2)) || '-' ||
+                          hex(randomblob(2)) || '-' || hex(randomblob(2)) || '-' ||
+                          hex(randomblob(6))),
+                    NEW.id,
+                    'reorder_point',
+                    NEW.stock_quantity,
+                    NEW.reorder_point,
+                    1,
+                    datetime('now')
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM inventory_alerts
+                    WHERE product_id = NEW.id
+                    AND alert_type = 'reorder_point'
+                    AND is_active = 1
+                );
+            END;
+        """))
+        op.execute(sa.text("""
+            CREATE TRIGGER IF NOT EXISTS trigger_resolve_reorder_alert
+            AFTER UPDATE OF stock_quantity ON products
+            FOR EACH ROW
+            WHEN (NEW.stock_quantity > NEW.reorder_point AND OLD.stock_quantity <= OLD.reorder_point)
+            BEGIN
+                UPDATE inventory_alerts
+                SET is_active = 0, resolved_at = datetime('now')
+                WHERE product_id = NEW.id
+                AND alert_type = 'reorder_point'
+                AND is_active = 1;
+            END;
+        """))
+
+    elif dialect_name == 'postgresql':
+        op.execute(sa.text("""
+            CREATE OR REPLACE FUNCTION check_reorder_point()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                IF NEW.stock_quantity <= NEW.reorder_point AND OLD.stock_quantity > OLD.reorder_point THEN
+                    INSERT INTO inventory_alerts (
+                        id, product_id, alert_type, current_stock,
+                        reorder_point, is_active, created_at
+                    )
+                    SELECT
+                        gen_random_uuid()::text,
+                        NEW.id,
+                        'reorder_point',
+                        NEW.stock_quantity,
+                        NEW.reorder_point,
+                        true,
+                        NOW()
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM inventory_alerts
+                        WHERE product_id = NEW.id
+                        AND alert_type = 'reorder_point'
+                        AND is_active = true
+                    );
+                END IF;
+
+                IF NEW.stock_quantity > NEW.reorder_point AND OLD.stock_quantity <= OLD.reorder_point THEN
+                    UPDATE inventory_alerts
+                    SET is_active = false, resolved_at = NOW()
+                    WHERE product_id = NEW.id
+                    AND alert_type = 'reorder_point'
+                    AND is_active = true;
+                END IF;
+
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER trigger_reorder_point
+            AFTER UPDATE OF stock_quantity ON products
+            FOR EACH ROW
+            EXECUTE FUNCTION check_reorder_point();
+        """))
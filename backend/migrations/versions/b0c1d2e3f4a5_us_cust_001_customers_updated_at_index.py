@@ -0,0 +1,27 @@
+"""US-CUST-001: Index customers.updated_at for the uniqueness filter sync
+
+Revision ID: b0c1d2e3f4a5
+Revises: a9b0c1d2e3f4
+Create Date: 2026-10-19 21:00:00.000000
+
+El filtro de Bloom de check-documento/check-correo agrega cada pocos
+segundos los clientes con updated_at reciente; sin índice cada
+sincronización recorrería toda la tabla.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b0c1d2e3f4a5'
+down_revision = 'a9b0c1d2e3f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_customers_updated_at', 'customers', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_customers_updated_at', table_name='customers')
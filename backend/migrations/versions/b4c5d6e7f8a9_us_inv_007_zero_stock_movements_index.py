@@ -0,0 +1,31 @@
+"""US-INV-007: Partial index on inventory_movements for the last zero-stock movement
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4c5d6e7f8a9'
+down_revision = 'a3b4c5d6e7f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_inventory_movements_zero_stock',
+        'inventory_movements',
+        ['product_id', 'created_at'],
+        unique=False,
+        postgresql_where=sa.text('new_stock = 0'),
+        sqlite_where=sa.text('new_stock = 0')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_inventory_movements_zero_stock', table_name='inventory_movements')
@@ -0,0 +1,45 @@
+"""US-INV-007: Partial unique index on active inventory alerts per product and type
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d6e7f8a9b0'
+down_revision = 'b4c5d6e7f8a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Alertas activas duplicadas impiden crear el índice: se conserva la más antigua
+    op.execute(sa.text("""
+        UPDATE inventory_alerts
+        SET is_active = false, resolved_at = CURRENT_TIMESTAMP
+        WHERE is_active AND EXISTS (
+            SELECT 1 FROM inventory_alerts older
+            WHERE older.product_id = inventory_alerts.product_id
+              AND older.alert_type = inventory_alerts.alert_type
+              AND older.is_active
+              AND (older.created_at < inventory_alerts.created_at
+                   OR (older.created_at = inventory_alerts.created_at AND older.id < inventory_alerts.id))
+        )
+    """))
+
+    op.create_index(
+        'ux_inventory_alerts_active',
+        'inventory_alerts',
+        ['product_id', 'alert_type'],
+        unique=True,
+        postgresql_where=sa.text('is_active'),
+        sqlite_where=sa.text('is_active')
+    )
+
+
+def downgrade():
+    op.drop_index('ux_inventory_alerts_active', table_name='inventory_alerts')
@@ -0,0 +1,77 @@
+"""US-PROD-003: Product search indexes (pg_trgm + tsvector / SQLite FTS5)
+
+Revision ID: c9d1e2f3a4b5
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9d1e2f3a4b5'
+down_revision = 'a7b8c9d0e1f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    connection = op.get_bind()
+    dialect_name = connection.dialect.name
+
+    if dialect_name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+
+        # unaccent() es STABLE; el wrapper IMMUTABLE permite usarlo en índices
+        op.execute("""
+            CREATE OR REPLACE FUNCTION gestrack_unaccent(text)
+            RETURNS text
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+            AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        """)
+
+        # Coincidencia parcial en nombre y prefijo/parcial en SKU
+        op.execute("""
+            CREATE INDEX IF NOT EXISTS idx_products_name_trgm
+            ON products USING gin (gestrack_unaccent(lower(name)) gin_trgm_ops)
+        """)
+        op.execute("""
+            CREATE INDEX IF NOT EXISTS idx_products_sku_trgm
+            ON products USING gin (lower(sku) gin_trgm_ops)
+        """)
+
+        # Búsqueda de texto completo en español sobre nombre + descripción
+        op.execute("""
+            CREATE INDEX IF NOT EXISTS idx_products_search_tsv
+            ON products USING gin (
+                to_tsvector('spanish'::regconfig,
+                    gestrack_unaccent(lower(coalesce(name, '') || ' ' || coalesce(description, ''))))
+            )
+        """)
+
+    elif dialect_name == 'sqlite':
+        from app.services.product_search_service import SQLITE_FTS_DDL, SQLITE_FTS_TABLE
+
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        # Indexar productos existentes
+        op.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+
+
+def downgrade():
+    connection = op.get_bind()
+    dialect_name = connection.dialect.name
+
+    if dialect_name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS idx_products_search_tsv')
+        op.execute('DROP INDEX IF EXISTS idx_products_sku_trgm')
+        op.execute('DROP INDEX IF EXISTS idx_products_name_trgm')
+        op.execute('DROP FUNCTION IF EXISTS gestrack_unaccent(text)')
+
+    elif dialect_name == 'sqlite':
+        from app.services.product_search_service import SQLITE_FTS_DROP_DDL
+
+        for statement in SQLITE_FTS_DROP_DDL:
+            op.execute(statement)
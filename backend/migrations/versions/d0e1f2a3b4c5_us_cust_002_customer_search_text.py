@@ -0,0 +1,85 @@
+"""US-CUST-002: Add normalized customers.search_text with trigram index
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d1e2f3a4b5
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd0e1f2a3b4c5'
+down_revision = 'c9d1e2f3a4b5'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _build_search_text(row):
+    """Misma lógica que Customer.build_search_text()"""
+    from app.utils.search import normalize_text, digits_only
+
+    parts = [
+        normalize_text(row.nombre_razon_social),
+        normalize_text(row.correo),
+        normalize_text(row.numero_documento),
+        digits_only(row.numero_documento),
+        digits_only(row.telefono_movil),
+    ]
+    return ' '.join(dict.fromkeys(part for part in parts if part))
+
+
+def upgrade():
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_text', sa.Text(), nullable=True))
+
+    # Backfill por lotes de clientes existentes
+    connection = op.get_bind()
+    customers = sa.table(
+        'customers',
+        sa.column('id', sa.String),
+        sa.column('nombre_razon_social', sa.String),
+        sa.column('correo', sa.String),
+        sa.column('numero_documento', sa.String),
+        sa.column('telefono_movil', sa.String),
+        sa.column('search_text', sa.Text),
+    )
+    last_id = ''
+    while True:
+        rows = connection.execute(
+            sa.select(
+                customers.c.id,
+                customers.c.nombre_razon_social,
+                customers.c.correo,
+                customers.c.numero_documento,
+                customers.c.telefono_movil,
+            ).where(customers.c.id > last_id).order_by(customers.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(
+            customers.update().where(customers.c.id == sa.bindparam('b_id')).values(
+                search_text=sa.bindparam('b_search_text')
+            ),
+            [{'b_id': row.id, 'b_search_text': _build_search_text(row)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+    if connection.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute("""
+            CREATE INDEX IF NOT EXISTS idx_customers_search_text_trgm
+            ON customers USING gin (search_text gin_trgm_ops)
+        """)
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS idx_customers_search_text_trgm')
+
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.drop_column('search_text')
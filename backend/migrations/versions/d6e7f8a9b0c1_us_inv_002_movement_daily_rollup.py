@@ -0,0 +1,55 @@
+"""US-INV-002: Add movement_daily_rollup with per-day movement aggregates
+
+Revision ID: d6e7f8a9b0c1
+Revises: c5d6e7f8a9b0
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6e7f8a9b0c1'
+down_revision = 'c5d6e7f8a9b0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'movement_daily_rollup',
+        sa.Column('product_id', sa.String(length=36), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('movement_type', sa.String(length=50), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('qty_in', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('qty_out', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('product_id', 'day', 'movement_type')
+    )
+    op.create_index('ix_movement_daily_rollup_day', 'movement_daily_rollup', ['day'], unique=False)
+
+    # Backfill set-based (equivalente a `flask rollups backfill`)
+    # CAST(... AS DATE) en SQLite devuelve solo el año (ver day_expression)
+    if op.get_bind().dialect.name == 'sqlite':
+        day = 'date(created_at)'
+    else:
+        day = 'CAST(created_at AS DATE)'
+    op.execute(f"""
+        INSERT INTO movement_daily_rollup (product_id, day, movement_type, count, qty_in, qty_out)
+        SELECT
+            product_id,
+            {day},
+            movement_type,
+            COUNT(id),
+            COALESCE(SUM(CASE WHEN quantity > 0 THEN quantity ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN quantity < 0 THEN -quantity ELSE 0 END), 0)
+        FROM inventory_movements
+        GROUP BY product_id, {day}, movement_type
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_movement_daily_rollup_day', table_name='movement_daily_rollup')
+    op.drop_table('movement_daily_rollup')
@@ -0,0 +1,69 @@
+"""US-CUST-011: Add customer_stats purchase ledger and orders(customer_id, created_at) index
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f2a3b4c5d6'
+down_revision = 'd0e1f2a3b4c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'customer_stats',
+        sa.Column('customer_id', sa.String(length=36), nullable=False),
+        sa.Column('total_spent', sa.Numeric(precision=14, scale=2), nullable=False, server_default='0'),
+        sa.Column('order_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('first_order_at', sa.DateTime(), nullable=True),
+        sa.Column('last_order_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('customer_id')
+    )
+
+    # Pedidos por cliente (historial, primera/última compra)
+    op.create_index('ix_orders_customer_created', 'orders', ['customer_id', 'created_at'], unique=False)
+
+    # Backfill set-based: pedidos no cancelados menos devoluciones aprobadas
+    op.execute("""
+        INSERT INTO customer_stats
+            (customer_id, total_spent, order_count, first_order_at, last_order_at, updated_at)
+        SELECT
+            c.id,
+            COALESCE(o.spent, 0) - COALESCE(r.returned, 0),
+            COALESCE(o.order_count, 0),
+            o.first_order_at,
+            o.last_order_at,
+            CURRENT_TIMESTAMP
+        FROM customers c
+        LEFT JOIN (
+            SELECT customer_id,
+                   SUM(total) AS spent,
+                   COUNT(id) AS order_count,
+                   MIN(created_at) AS first_order_at,
+                   MAX(created_at) AS last_order_at
+            FROM orders
+            WHERE status != 'Cancelado'
+            GROUP BY customer_id
+        ) o ON o.customer_id = c.id
+        LEFT JOIN (
+            SELECT ord.customer_id, SUM(ret.total_amount) AS returned
+            FROM returns ret
+            JOIN orders ord ON ord.id = ret.order_id
+            WHERE ret.status = 'Aprobada' AND ord.status != 'Cancelado'
+            GROUP BY ord.customer_id
+        ) r ON r.customer_id = c.id
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_orders_customer_created', table_name='orders')
+    op.drop_table('customer_stats')
@@ -0,0 +1,107 @@
+"""US-INV-003: Monthly range partitioning of inventory_movements on created_at
+
+Revision ID: e7f8a9b0c1d2
+Revises: d6e7f8a9b0c1
+Create Date: 2026-10-19 18:00:00.000000
+
+Solo PostgreSQL (en SQLite no hay particionado declarativo y la migración no
+hace nada). La tabla se recrea como PARTITION BY RANGE (created_at) con una
+partición por mes desde el primer movimiento hasta tres meses adelante y una
+partición DEFAULT de respaldo; los meses siguientes se crean con
+`flask movements ensure-partitions`. La clave primaria pasa a (id, created_at)
+porque PostgreSQL exige que incluya la clave de particionado; el modelo sigue
+identificando los movimientos por id.
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7f8a9b0c1d2'
+down_revision = 'd6e7f8a9b0c1'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _recreate_indexes_and_keys():
+    op.create_foreign_key(
+        'inventory_movements_product_id_fkey', 'inventory_movements', 'products', ['product_id'], ['id']
+    )
+    op.create_foreign_key(
+        'inventory_movements_user_id_fkey', 'inventory_movements', 'users', ['user_id'], ['id']
+    )
+    op.create_index(
+        'ix_inventory_movements_zero_stock',
+        'inventory_movements',
+        ['product_id', 'created_at'],
+        postgresql_where=sa.text('new_stock = 0')
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    first = bind.execute(sa.text(
+        "SELECT CAST(date_trunc('month', MIN(created_at)) AS DATE) FROM inventory_movements"
+    )).scalar()
+    today = date.today()
+    month = first or date(today.year, today.month, 1)
+    last = date(today.year, today.month, 1)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+
+    op.execute("""
+        CREATE TABLE inventory_movements_partitioned (
+            LIKE inventory_movements INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+            CONSTRAINT inventory_movements_partitioned_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    while month <= last:
+        following = _next_month(month)
+        op.execute(
+            f"CREATE TABLE inventory_movements_p{month:%Y%m} "
+            f"PARTITION OF inventory_movements_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        month = following
+    op.execute("CREATE TABLE inventory_movements_default PARTITION OF inventory_movements_partitioned DEFAULT")
+
+    op.execute("INSERT INTO inventory_movements_partitioned SELECT * FROM inventory_movements")
+    op.execute("DROP TABLE inventory_movements")
+    op.execute("ALTER TABLE inventory_movements_partitioned RENAME TO inventory_movements")
+    op.execute(
+        "ALTER TABLE inventory_movements RENAME CONSTRAINT inventory_movements_partitioned_pkey "
+        "TO inventory_movements_pkey"
+    )
+    _recreate_indexes_and_keys()
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # Los meses ya archivados no vuelven: solo se copia lo que siga en la tabla
+    op.execute("""
+        CREATE TABLE inventory_movements_plain (
+            LIKE inventory_movements INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+            CONSTRAINT inventory_movements_plain_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("INSERT INTO inventory_movements_plain SELECT * FROM inventory_movements")
+    op.execute("DROP TABLE inventory_movements CASCADE")
+    op.execute("ALTER TABLE inventory_movements_plain RENAME TO inventory_movements")
+    op.execute(
+        "ALTER TABLE inventory_movements RENAME CONSTRAINT inventory_movements_plain_pkey "
+        "TO inventory_movements_pkey"
+    )
+    _recreate_indexes_and_keys()
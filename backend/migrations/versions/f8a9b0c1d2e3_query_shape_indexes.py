@@ -0,0 +1,82 @@
+"""Indexes for the order, payment, product and movement query shapes
+
+Revision ID: f8a9b0c1d2e3
+Revises: e7f8a9b0c1d2
+Create Date: 2026-10-19 19:00:00.000000
+
+- orders (status, created_at): listado filtrado por estado y ordenado por
+  fecha, conteo por estado
+- orders (created_at): listado por defecto, rangos de fecha y ventana de la
+  analítica de inventario
+- order_items (product_id, order_id): ventas por producto (analítica, historial)
+- payments (order_id, is_deleted): pagos activos de un pedido; reemplaza a
+  ix_payments_order_id, que queda cubierto por el prefijo
+- products (category_id, name) parcial sobre los productos listables
+  (is_active AND deleted_at IS NULL): filtro por categoría y orden por nombre
+- inventory_movements (product_id, created_at): historial y evolución por
+  producto; lo eliminó por error el autogenerado de 3e515d718137
+- inventory_movements (related_order_id) parcial: claves foráneas hacia
+  pedidos y trazabilidad de reservas
+
+orders (customer_id, created_at) y order_items (order_id) ya existen
+(e1f2a3b4c5d6 y f2a3b4c5d6e7).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8a9b0c1d2e3'
+down_revision = 'e7f8a9b0c1d2'
+branch_labels = None
+depends_on = None
+
+LISTED_PRODUCTS = sa.text('is_active AND deleted_at IS NULL')
+ORDER_MOVEMENTS = sa.text('related_order_id IS NOT NULL')
+
+
+def upgrade():
+    op.create_index('ix_orders_status_created', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index('ix_orders_created_at', 'orders', ['created_at'], unique=False)
+    op.create_index('ix_order_items_product_order', 'order_items', ['product_id', 'order_id'], unique=False)
+
+    op.create_index('ix_payments_order_deleted', 'payments', ['order_id', 'is_deleted'], unique=False)
+    op.drop_index('ix_payments_order_id', table_name='payments')
+
+    op.create_index(
+        'ix_products_listed_category_name',
+        'products',
+        ['category_id', 'name'],
+        postgresql_where=LISTED_PRODUCTS,
+        sqlite_where=LISTED_PRODUCTS
+    )
+
+    op.create_index(
+        'ix_inventory_movements_product_created',
+        'inventory_movements',
+        ['product_id', 'created_at'],
+        unique=False
+    )
+    op.create_index(
+        'ix_inventory_movements_related_order',
+        'inventory_movements',
+        ['related_order_id'],
+        postgresql_where=ORDER_MOVEMENTS,
+        sqlite_where=ORDER_MOVEMENTS
+    )
+
+    # Estadísticas al día para que el planificador use los índices nuevos
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in ('orders', 'order_items', 'payments', 'products', 'inventory_movements'):
+            op.execute(f'ANALYZE {table}')
+
+
+def downgrade():
+    op.drop_index('ix_inventory_movements_related_order', table_name='inventory_movements')
+    op.drop_index('ix_inventory_movements_product_created', table_name='inventory_movements')
+    op.drop_index('ix_products_listed_category_name', table_name='products')
+    op.create_index('ix_payments_order_id', 'payments', ['order_id'], unique=False)
+    op.drop_index('ix_payments_order_deleted', table_name='payments')
+    op.drop_index('ix_order_items_product_order', table_name='order_items')
+    op.drop_index('ix_orders_created_at', table_name='orders')
+    op.drop_index('ix_orders_status_created', table_name='orders')
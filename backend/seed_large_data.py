@@ -0,0 +1,427 @@
+"""
+Large-scale data generator for load tests and benchmarks
+
+Generates categories, products, customers, orders with items, payments,
+inventory movements and approved returns with the same shapes the services
+write (order_reservation / order_cancellation / Devolución movements,
+reserved_stock, payment_status). Output is deterministic for the same
+arguments: every random choice comes from --seed and dates end at --until.
+
+Rows are written in bulk: COPY ... FROM STDIN on PostgreSQL, executemany
+elsewhere, flushed every --batch-size rows in foreign-key order. Existing
+data (users included) is left untouched; generated rows use the GEN prefix
+(SKU GEN-, orders GEN-, returns GRT-, documents GEN) and the script refuses
+to run twice on the same database. Derived tables are rebuilt at the end:
+movement_daily_rollup, customer_stats and critical-stock alerts.
+
+Usage:
+    python seed_large_data.py [--customers 100000] [--orders 1000000] [--products 5000]
+                              [--categories 30] [--days 730] [--until YYYY-MM-DD]
+                              [--seed 42] [--batch-size 50000]
+"""
+
+import argparse
+import bisect
+import csv
+import heapq
+import io
+import random
+import time as timer
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from app import create_app, db
+from app.models.customer import Customer
+
+# Orden de escritura: cada tabla después de las que referencia
+TABLE_COLUMNS = {
+    'categories': ('id', 'name', 'description', 'color', 'icon', 'is_default', 'created_at'),
+    'products': ('id', 'sku', 'name', 'cost_price', 'sale_price', 'stock_quantity', 'min_stock_level',
+                 'reorder_point', 'reserved_stock', 'category_id', 'is_active', 'created_at', 'updated_at',
+                 'version'),
+    'customers': ('id', 'tipo_documento', 'numero_documento', 'nombre_razon_social', 'tipo_contribuyente',
+                  'pais', 'municipio_ciudad', 'correo', 'search_text', 'customer_category', 'is_active',
+                  'created_at', 'updated_at'),
+    'orders': ('id', 'order_number', 'customer_id', 'created_by_id', 'status', 'payment_status', 'subtotal',
+               'tax_percentage', 'tax_amount', 'shipping_cost', 'discount_amount', 'total', 'refund_pending',
+               'created_at', 'updated_at'),
+    'order_items': ('id', 'order_id', 'product_id', 'quantity', 'unit_price', 'subtotal', 'product_name',
+                    'product_sku'),
+    'payments': ('id', 'order_id', 'created_by_id', 'amount', 'payment_method', 'payment_date', 'is_deleted',
+                 'created_at'),
+    'returns': ('id', 'return_number', 'order_id', 'created_by_id', 'approved_by_id', 'reason', 'total_amount',
+                'status', 'refund_method', 'return_date', 'approved_at', 'created_at', 'updated_at'),
+    'return_items': ('id', 'return_id', 'product_id', 'quantity', 'unit_price', 'subtotal', 'product_name',
+                     'product_sku'),
+    'inventory_movements': ('id', 'product_id', 'user_id', 'movement_type', 'quantity', 'previous_stock',
+                            'new_stock', 'reason', 'reference', 'related_order_id', 'created_at'),
+}
+
+CITIES = ['Bogotá', 'Medellín', 'Cali', 'Barranquilla', 'Cartagena', 'Bucaramanga', 'Pereira', 'Manizales']
+PAYMENT_METHODS = ['Efectivo', 'Tarjeta Débito', 'Tarjeta Crédito', 'Transferencia']
+RETURN_REASONS = ['Producto defectuoso/dañado', 'Producto incorrecto (error en pedido)',
+                  'Cliente cambió de opinión', 'Producto no cumple expectativas']
+REFUND_METHODS = ['Reembolso', 'Nota de Crédito', 'Intercambio']
+OPEN_STATUSES = ('Pendiente', 'Confirmado', 'Procesando', 'Enviado')
+
+TAX_PERCENTAGE = Decimal('19.00')
+CENT = Decimal('0.01')
+RECENT_DAYS = 14            # Pedidos más recientes que esto siguen abiertos
+CANCELLED_RATE = 0.06
+RETURN_RATE = 0.02
+PRODUCT_POPULARITY = 0.9    # Exponente Zipf de las ventas por producto
+
+
+class BulkWriter:
+    """Buffer de filas por tabla volcado en bloque (COPY o executemany)"""
+
+    def __init__(self, connection, batch_size):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.copy = connection.dialect.name == 'postgresql'
+        self.buffers = {name: [] for name in TABLE_COLUMNS}
+        self.counts = {name: 0 for name in TABLE_COLUMNS}
+        self.pending = 0
+
+    def add(self, table, row):
+        self.buffers[table].append(row)
+        self.pending += 1
+
+    def checkpoint(self):
+        """Volcar si el buffer está lleno (llamar solo entre unidades completas)"""
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Volcar todas las tablas en orden de claves foráneas y confirmar"""
+        for name, rows in self.buffers.items():
+            if not rows:
+                continue
+            if self.copy:
+                self._copy(name, rows)
+            else:
+                columns = TABLE_COLUMNS[name]
+                self.connection.execute(
+                    db.metadata.tables[name].insert(), [dict(zip(columns, row)) for row in rows]
+                )
+            self.counts[name] += len(rows)
+            rows.clear()
+        self.connection.commit()
+        self.pending = 0
+
+    def _copy(self, name, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(
+                '' if value is None
+                else ('t' if value else 'f') if isinstance(value, bool)
+                else value.isoformat(' ') if isinstance(value, datetime)
+                else value
+                for value in row
+            )
+        buffer.seek(0)
+        cursor = self.connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {name} ({', '.join(TABLE_COLUMNS[name])}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+
+
+class DataGenerator:
+    """Generación determinista de un conjunto de datos completo"""
+
+    def __init__(self, writer, user_id, seed, until, days):
+        self.writer = writer
+        self.user_id = user_id
+        self.rng = random.Random(seed)
+        self.end = datetime.combine(until, time.min)
+        self.start = self.end - timedelta(days=days)
+        self.products = []          # [id, sku, name, sale_price, stock, reserved]
+        self.popularity = []        # Pesos acumulados (Zipf) para elegir productos
+        self.customer_ids = []
+        self.pending_events = []    # Heap de (instante, secuencia, evento) diferidos
+        self.event_sequence = 0
+
+    def new_id(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def money(self, low, high):
+        return Decimal(self.rng.uniform(low, high)).quantize(CENT)
+
+    def movement(self, product, movement_type, quantity, moment, reason, reference=None, order_id=None):
+        previous = product[4]
+        product[4] = previous + quantity
+        self.writer.add('inventory_movements', (
+            self.new_id(), product[0], self.user_id, movement_type, quantity, previous, product[4],
+            reason, reference, order_id, moment
+        ))
+
+    def categories(self, count):
+        ids = []
+        for number in range(1, count + 1):
+            category_id = self.new_id()
+            ids.append(category_id)
+            self.writer.add('categories', (
+                category_id, f'Categoría GEN-{number:03d}', 'Categoría generada para pruebas de carga',
+                '#607D8B', 'category', False, self.start
+            ))
+        return ids
+
+    def products_rows(self, count, category_ids):
+        for number in range(1, count + 1):
+            cost = self.money(5, 500)
+            sale = (cost * Decimal(str(round(self.rng.uniform(1.2, 1.8), 2)))).quantize(CENT)
+            product = [self.new_id(), f'GEN-{number:06d}', f'Producto GEN {number}', sale, 0, 0]
+            product_row = [
+                product[0], product[1], product[2], cost, sale, 0, 10, self.rng.randint(10, 50), 0,
+                self.rng.choice(category_ids), self.rng.random() > 0.05, self.start, self.start, 1
+            ]
+            self.products.append((product, product_row))
+
+        weights = [1 / rank ** PRODUCT_POPULARITY for rank in range(1, count + 1)]
+        self.rng.shuffle(weights)
+        total = 0.0
+        for weight in weights:
+            total += weight
+            self.popularity.append(total)
+
+        # Se insertan con stock 0; generate() escribe el stock resultante al final
+        for product, product_row in self.products:
+            self.writer.add('products', tuple(product_row))
+            initial = self.rng.randint(50, 500)
+            self.movement(product, 'Stock Inicial', initial, self.start, 'Stock inicial')
+            self.writer.checkpoint()
+        self.products = [product for product, _ in self.products]
+
+    def customers(self, count):
+        span = (self.end - self.start).total_seconds()
+        for number in range(1, count + 1):
+            customer_id = self.new_id()
+            self.customer_ids.append(customer_id)
+            company = self.rng.random() < 0.15
+            created_at = self.start + timedelta(seconds=self.rng.uniform(0, span / 2))
+            document = f'GEN{number:09d}'
+            name = f'Empresa GEN {number} S.A.S.' if company else f'Cliente GEN {number}'
+            email = f'cliente{number}.gen@example.com'
+            # El listener que llena search_text no corre en la escritura masiva
+            search_text = Customer(
+                nombre_razon_social=name, correo=email, numero_documento=document
+            ).build_search_text()
+            self.writer.add('customers', (
+                customer_id, 'NIT' if company else 'CC', document, name,
+                'Persona Jurídica' if company else 'Persona Natural', 'Colombia',
+                self.rng.choice(CITIES), email, search_text, 'Regular', True, created_at, created_at
+            ))
+            self.writer.checkpoint()
+
+    def pick_product(self):
+        index = bisect.bisect_left(self.popularity, self.rng.random() * self.popularity[-1])
+        return self.products[min(index, len(self.products) - 1)]
+
+    def defer(self, moment, event):
+        self.event_sequence += 1
+        heapq.heappush(self.pending_events, (moment, self.event_sequence, event))
+
+    def run_events_until(self, moment):
+        """Aplicar cancelaciones y devoluciones anteriores a `moment` (orden cronológico)"""
+        while self.pending_events and self.pending_events[0][0] <= moment:
+            event_moment, _, event = heapq.heappop(self.pending_events)
+            event(event_moment)
+
+    def orders(self, count):
+        span = (self.end - self.start).total_seconds()
+        recent = self.end - timedelta(days=RECENT_DAYS)
+        for number in range(1, count + 1):
+            created_at = self.start + timedelta(seconds=span * (number - self.rng.random()) / count)
+            self.run_events_until(created_at)
+            self.order(number, created_at, recent)
+            self.writer.checkpoint()
+        self.run_events_until(self.end)
+        self.writer.checkpoint()
+
+    def order(self, number, created_at, recent):
+        order_id = self.new_id()
+        order_number = f'GEN-{number:09d}'
+        rng = self.rng
+
+        if created_at >= recent:
+            status = rng.choice(OPEN_STATUSES)
+        else:
+            status = 'Cancelado' if rng.random() < CANCELLED_RATE else 'Entregado'
+
+        lines = {}
+        for _ in range(min(1 + int(rng.expovariate(0.8)), 6)):
+            product = self.pick_product()
+            lines[product[0]] = (product, lines.get(product[0], (product, 0))[1] + rng.randint(1, 5))
+
+        items = []
+        subtotal = Decimal('0')
+        for product, quantity in lines.values():
+            line_total = product[3] * quantity
+            subtotal += line_total
+            items.append((product, quantity, line_total))
+            self.writer.add('order_items', (
+                self.new_id(), order_id, product[0], quantity, product[3], line_total, product[2], product[1]
+            ))
+
+        tax = (subtotal * TAX_PERCENTAGE / 100).quantize(CENT)
+        total = subtotal + tax
+        paid = status not in ('Pendiente', 'Cancelado') or rng.random() < 0.3
+        payment_status = 'Pagado' if status not in ('Pendiente', 'Cancelado') else (
+            'Parcialmente Pagado' if paid else 'Pendiente'
+        )
+        self.writer.add('orders', (
+            order_id, order_number, rng.choice(self.customer_ids), self.user_id, status,
+            'Pendiente' if status == 'Cancelado' else payment_status,
+            subtotal, TAX_PERCENTAGE, tax, Decimal('0'), Decimal('0'), total, False, created_at, created_at
+        ))
+        if paid and status != 'Cancelado':
+            amount = total if payment_status == 'Pagado' else (total / 2).quantize(CENT)
+            self.writer.add('payments', (
+                self.new_id(), order_id, self.user_id, amount, rng.choice(PAYMENT_METHODS),
+                created_at.date(), False, created_at
+            ))
+
+        # Reserva de stock al crear el pedido (reponiendo si no alcanza)
+        for product, quantity, _ in items:
+            if product[4] < quantity:
+                self.movement(product, 'Entrada', quantity + rng.randint(100, 300),
+                              created_at - timedelta(seconds=1), 'Reposición de stock')
+            self.movement(product, 'order_reservation', -quantity, created_at,
+                          f'Reserva de stock - Pedido {order_number}', order_number, order_id)
+            if status in OPEN_STATUSES:
+                product[5] += quantity
+
+        if status == 'Cancelado':
+            self.defer(created_at + timedelta(hours=rng.uniform(1, 48)),
+                       lambda moment: self.cancel(order_id, order_number, items, moment))
+        elif status == 'Entregado' and rng.random() < RETURN_RATE:
+            self.defer(created_at + timedelta(days=rng.uniform(3, 20)),
+                       lambda moment: self.return_order(order_id, items, moment))
+
+    def cancel(self, order_id, order_number, items, moment):
+        for product, quantity, _ in items:
+            self.movement(product, 'order_cancellation', quantity, moment,
+                          f'Devolución por cancelación de pedido {order_number}', order_number, order_id)
+
+    def return_order(self, order_id, items, moment):
+        product, ordered, _ = self.rng.choice(items)
+        quantity = self.rng.randint(1, ordered)
+        amount = product[3] * quantity
+        return_id = self.new_id()
+        self.event_sequence += 1
+        return_number = f'GRT-{self.event_sequence:09d}'
+        self.writer.add('returns', (
+            return_id, return_number, order_id, self.user_id, self.user_id, self.rng.choice(RETURN_REASONS),
+            amount, 'Aprobada', self.rng.choice(REFUND_METHODS), moment, moment, moment, moment
+        ))
+        self.writer.add('return_items', (
+            self.new_id(), return_id, product[0], quantity, product[3], amount, product[2], product[1]
+        ))
+        self.movement(product, 'Devolución', quantity, moment, f'Devolución aprobada - {return_number}',
+                      return_number, order_id)
+
+    def final_stock(self):
+        """(id, stock, reservado) de cada producto al terminar"""
+        return [(product[0], product[4], product[5]) for product in self.products]
+
+
+def generation_user_id(connection):
+    """Primer usuario existente; si no hay, se crea uno inactivo para la autoría de los datos"""
+    from sqlalchemy import text
+
+    user_id = connection.execute(text('SELECT id FROM users ORDER BY created_at LIMIT 1')).scalar()
+    if user_id:
+        return user_id
+
+    user_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    connection.execute(db.metadata.tables['users'].insert(), {
+        'id': user_id, 'full_name': 'Generador de datos', 'email': 'generator@example.com',
+        'password_hash': '!', 'role': 'Admin', 'is_active': False, 'created_at': now, 'updated_at': now,
+    })
+    connection.commit()
+    return user_id
+
+
+def generate(customers=100_000, orders=1_000_000, products=5_000, categories=30, days=730,
+             until=None, seed=42, batch_size=50_000):
+    """
+    Generar el conjunto de datos en la base de la aplicación (requiere app context)
+
+    Returns:
+        dict: Filas escritas por tabla
+    """
+    from sqlalchemy import bindparam, text
+    from app.services.critical_stock_alert_service import CriticalStockAlertService
+    from app.services.customer_stats_service import CustomerStatsService
+    from app.services.movement_archive_service import MovementArchiveService
+    from app.services.movement_rollup_service import MovementRollupService
+
+    until = until or date.today()
+    if db.session.execute(text("SELECT 1 FROM products WHERE sku LIKE 'GEN-%' LIMIT 1")).scalar():
+        raise RuntimeError('La base ya tiene datos generados (productos GEN-)')
+    MovementArchiveService.ensure_partitions(since=until - timedelta(days=days))
+    db.session.commit()
+
+    with db.engine.connect() as connection:
+        writer = BulkWriter(connection, batch_size)
+        generator = DataGenerator(writer, generation_user_id(connection), seed, until, days)
+
+        category_ids = generator.categories(categories)
+        generator.products_rows(products, category_ids)
+        generator.customers(customers)
+        writer.flush()
+        generator.orders(orders)
+        writer.flush()
+
+        products_table = db.metadata.tables['products']
+        connection.execute(
+            products_table.update().where(products_table.c.id == bindparam('product_id')).values(
+                # updated_at explícito: el onupdate pondría la hora actual
+                stock_quantity=bindparam('stock'), reserved_stock=bindparam('reserved'),
+                updated_at=generator.end
+            ),
+            [{'product_id': product_id, 'stock': stock, 'reserved': reserved}
+             for product_id, stock, reserved in generator.final_stock()]
+        )
+        connection.commit()
+        counts = dict(writer.counts)
+
+    MovementRollupService.backfill(until - timedelta(days=days), until)
+    CustomerStatsService.rebuild()
+    db.session.commit()
+    CriticalStockAlertService.sync_alerts()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--customers', type=int, default=100_000)
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--products', type=int, default=5_000)
+    parser.add_argument('--categories', type=int, default=30)
+    parser.add_argument('--days', type=int, default=730, help='History length ending at --until')
+    parser.add_argument('--until', type=date.fromisoformat, default=None, help='Last day (default: today)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=50_000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        started = timer.perf_counter()
+        counts = generate(args.customers, args.orders, args.products, args.categories, args.days,
+                          args.until, args.seed, args.batch_size)
+        elapsed = timer.perf_counter() - started
+
+    for table, rows in counts.items():
+        print(f"  {table:<20} {rows:>12,}")
+    print(f"Generated {sum(counts.values()):,} rows in {elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
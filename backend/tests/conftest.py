@@ -24,3 +24,76 @@ def client(app):
 def runner(app):
     """Crea un CLI runner de prueba"""
     return app.test_cli_runner()
+
+
+@pytest.fixture
+def admin_user(app):
+    """Usuario Admin persistido (sin hash real de contraseña para agilizar)"""
+    from app.models.user import User
+
+    user = User(
+        full_name='Admin Test',
+        email='admin.test@gestrack.com',
+        password_hash='not-a-real-hash',
+        role='Admin'
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(admin_user):
+    """Cabeceras Authorization con un JWT del usuario Admin"""
+    from flask_jwt_extended import create_access_token
+
+    token = create_access_token(identity=admin_user.id, additional_claims={'role': admin_user.role})
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def query_counter(app):
+    """
+    Cuenta las sentencias SQL ejecutadas dentro del bloque
+
+    Uso:
+        with query_counter() as counter:
+            client.get(...)
+        assert counter.count <= 3
+    """
+    from app.utils.query_instrumentation import track_queries
+
+    return track_queries
+
+
+@pytest.fixture
+def query_budget(app):
+    """
+    Falla si el bloque ejecuta más sentencias SQL que el presupuesto
+
+    Uso:
+        with query_budget(4):
+            client.get(...)
+
+    Args:
+        max_queries: Sentencias permitidas
+        max_repeats: Veces que puede repetirse una misma forma (N+1); None = sin límite
+    """
+    from contextlib import contextmanager
+    from app.utils.query_instrumentation import track_queries
+
+    @contextmanager
+    def _budget(max_queries, max_repeats=None):
+        with track_queries() as stats:
+            yield stats
+
+        repeated = stats.repeated(max_repeats + 1) if max_repeats is not None else []
+        if stats.count > max_queries or repeated:
+            detail = '\n'.join(f'  {n}x {shape}' for shape, n in stats.repeated()) or '  (sin repeticiones)'
+            pytest.fail(
+                f'Presupuesto de queries excedido: {stats.count} (máximo {max_queries}), '
+                f'{stats.duration_ms:.1f} ms\nFormas repetidas:\n{detail}',
+                pytrace=False
+            )
+
+    return _budget
@@ -0,0 +1,183 @@
+"""
+US-INV-007: Tests del motor de alertas de stock crítico
+
+Las alertas se evalúan dentro de la transacción que modifica el stock, desde
+ajustes, pedidos y cancelaciones.
+"""
+
+import importlib.util
+import pytest
+from decimal import Decimal
+from pathlib import Path
+from app import db
+from app.models.category import Category
+from app.models.customer import Customer
+from app.models.inventory_alert import InventoryAlert
+from app.models.product import Product
+from app.services.critical_stock_alert_service import CriticalStockAlertService
+from app.services.order_service import OrderService
+from app.services.stock_service import StockService
+
+
+@pytest.fixture
+def alert_setup(app, admin_user):
+    """Un cliente y un producto con 10 unidades y punto de reorden 3"""
+    customer = Customer(
+        tipo_documento='CC',
+        numero_documento='900',
+        nombre_razon_social='Cliente Alertas',
+        tipo_contribuyente='Persona Natural',
+        correo='alertas@example.com'
+    )
+    category = Category(name='General')
+    db.session.add_all([customer, category])
+    db.session.flush()
+
+    product = Product(
+        sku='ALR-001',
+        name='Producto Alertas',
+        cost_price=Decimal('50.00'),
+        sale_price=Decimal('100.00'),
+        stock_quantity=10,
+        reorder_point=3,
+        category_id=category.id,
+        last_updated_by_id=admin_user.id
+    )
+    db.session.add(product)
+    db.session.commit()
+    return {'customer_id': customer.id, 'product_id': product.id, 'user_id': admin_user.id}
+
+
+def _run_migration(direction):
+    """Ejecutar upgrade()/downgrade() de a9b0c1d2e3f4 sobre la base de los tests"""
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+
+    path = Path(__file__).parents[1] / 'migrations' / 'versions' / 'a9b0c1d2e3f4_us_inv_007_drop_reorder_point_triggers.py'
+    spec = importlib.util.spec_from_file_location('drop_reorder_point_triggers', path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    with db.engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            getattr(migration, direction)()
+
+
+def _active_alert_types(product_id):
+    return sorted(
+        alert_type for (alert_type,) in db.session.query(InventoryAlert.alert_type).filter_by(
+            product_id=product_id, is_active=True
+        )
+    )
+
+
+class TestAlertEngine:
+    """Tests de evaluate_stock_alerts y de su uso desde los servicios"""
+
+    def test_stock_update_transitions(self, alert_setup):
+        """Reorden → sin stock → recuperado: una alerta activa por estado"""
+        product_id, user_id = alert_setup['product_id'], alert_setup['user_id']
+
+        StockService.update_stock(product_id, -7, user_id, 'Salida')
+        assert _active_alert_types(product_id) == ['reorder_point']
+
+        StockService.update_stock(product_id, -3, user_id, 'Salida')
+        assert _active_alert_types(product_id) == ['out_of_stock']
+
+        StockService.update_stock(product_id, 20, user_id, 'Entrada')
+        assert _active_alert_types(product_id) == []
+        assert db.session.query(InventoryAlert).filter(InventoryAlert.resolved_at.isnot(None)).count() == 2
+
+    def test_idempotent(self, alert_setup):
+        """Reevaluar sin cambios de stock no duplica alertas"""
+        product_id, user_id = alert_setup['product_id'], alert_setup['user_id']
+        StockService.update_stock(product_id, -10, user_id, 'Salida')
+
+        assert CriticalStockAlertService.evaluate_stock_alerts([product_id]) == {'created': 0, 'resolved': 0}
+
+    def test_order_and_cancellation(self, alert_setup):
+        """Crear el pedido que agota el stock crea la alerta; cancelarlo la resuelve"""
+        product_id = alert_setup['product_id']
+
+        order = OrderService.create_order({
+            'customer_id': alert_setup['customer_id'],
+            'items': [{'product_id': product_id, 'quantity': 10, 'unit_price': 100}],
+        }, alert_setup['user_id'])
+        assert _active_alert_types(product_id) == ['out_of_stock']
+
+        OrderService.cancel_order(order.id, alert_setup['user_id'])
+        assert _active_alert_types(product_id) == []
+
+    def test_rolled_back_with_stock_change(self, alert_setup):
+        """La alerta forma parte de la transacción del cambio de stock"""
+        product_id = alert_setup['product_id']
+        product = db.session.get(Product, product_id)
+        product.stock_quantity = 0
+
+        CriticalStockAlertService.evaluate_stock_alerts([product_id])
+        db.session.rollback()
+
+        assert _active_alert_types(product_id) == []
+
+
+    def test_engine_is_the_only_alert_writer(self, alert_setup):
+        """Con los triggers de reorden eliminados, agotar el stock no deja una alerta 'reorder_point'"""
+        product_id, user_id = alert_setup['product_id'], alert_setup['user_id']
+
+        _run_migration('downgrade')
+        StockService.update_stock(product_id, -10, user_id, 'Salida')
+        assert db.session.query(InventoryAlert).filter_by(
+            product_id=product_id, alert_type='reorder_point'
+        ).count() == 1
+
+        StockService.update_stock(product_id, 10, user_id, 'Entrada')
+        _run_migration('upgrade')
+        StockService.update_stock(product_id, -10, user_id, 'Salida')
+
+        assert _active_alert_types(product_id) == ['out_of_stock']
+        assert db.session.query(InventoryAlert).filter_by(
+            product_id=product_id, alert_type='reorder_point'
+        ).count() == 1
+
+
+class TestAlertSync:
+    """Tests de POST /api/inventory/critical-alerts/sync"""
+
+    def test_sync_creates_and_resolves(self, client, auth_headers, alert_setup):
+        """Crea la alerta faltante y resuelve la que quedó activa con stock"""
+        product_id = alert_setup['product_id']
+        db.session.add(InventoryAlert(
+            product_id=product_id, alert_type='out_of_stock', current_stock=0, reorder_point=3
+        ))
+        other = Product(
+            sku='ALR-002', name='Agotado previo', cost_price=Decimal('1.00'), sale_price=Decimal('2.00'),
+            stock_quantity=0, category_id=db.session.get(Product, product_id).category_id,
+            last_updated_by_id=alert_setup['user_id']
+        )
+        db.session.add(other)
+        db.session.commit()
+        other_id = other.id
+
+        response = client.post('/api/inventory/critical-alerts/sync', headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert data == {'alerts_created': 1, 'alerts_resolved': 1}
+        assert _active_alert_types(product_id) == []
+        assert _active_alert_types(other_id) == ['out_of_stock']
+
+        second = client.post('/api/inventory/critical-alerts/sync', headers=auth_headers)
+        assert second.get_json()['data'] == {'alerts_created': 0, 'alerts_resolved': 0}
+
+    def test_one_active_alert_per_product_and_type(self, alert_setup):
+        """El índice único parcial rechaza una segunda alerta activa"""
+        from sqlalchemy.exc import IntegrityError
+
+        for _ in range(2):
+            db.session.add(InventoryAlert(
+                product_id=alert_setup['product_id'], alert_type='out_of_stock',
+                current_stock=0, reorder_point=3
+            ))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
@@ -0,0 +1,59 @@
+"""
+US-CUST-012: Tests de la exportación de clientes en streaming
+"""
+
+import csv
+import io
+import pytest
+from app import db
+from app.models.customer import Customer
+from app.services.customer_stats_service import CustomerStatsService
+from app.utils import export_helper
+
+
+@pytest.fixture
+def export_customers(app):
+    """Clientes activos e inactivos; uno con acumulados de compra"""
+    for index in range(5):
+        db.session.add(Customer(
+            tipo_documento='CC',
+            numero_documento=f'EXP{index}',
+            nombre_razon_social=f'Cliente {index}',
+            tipo_contribuyente='Persona Natural',
+            correo=f'exp{index}@example.com',
+            is_active=index != 4
+        ))
+    db.session.commit()
+
+    first = Customer.query.filter_by(numero_documento='EXP0').first()
+    CustomerStatsService.apply_delta(first.id, spent_delta=1500, count_delta=2)
+    db.session.commit()
+
+
+def _read_csv(response):
+    return list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+
+class TestCustomerExport:
+    """Tests de GET /api/customers/export"""
+
+    def test_streams_all_rows_with_stats(self, client, auth_headers, export_customers, monkeypatch):
+        """Todas las filas (sin tope) llegan por bloques con los acumulados de customer_stats"""
+        monkeypatch.setattr(export_helper, 'STREAM_CHUNK_ROWS', 2)
+
+        response = client.get('/api/customers/export?format=csv', headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        rows = _read_csv(response)
+        assert [r['Número Documento'] for r in rows] == [f'EXP{i}' for i in range(5)]
+        assert rows[0]['Total Compras (COP)'] == '1500.0'
+        assert rows[0]['Número de Pedidos'] == '2'
+        assert rows[1]['Total Compras (COP)'] == '0.0'
+        assert rows[4]['Estado'] == 'Inactivo'
+
+    def test_filters_apply_to_stream(self, client, auth_headers, export_customers):
+        """Los filtros del listado se aplican a la exportación"""
+        response = client.get('/api/customers/export?is_active=false', headers=auth_headers)
+
+        assert [r['Número Documento'] for r in _read_csv(response)] == ['EXP4']
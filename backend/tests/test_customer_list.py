@@ -0,0 +1,62 @@
+"""
+US-CUST-002 / US-CUST-008: Tests del listado de clientes con campos de auditoría
+"""
+
+import pytest
+from datetime import datetime
+from app import db
+from app.models.customer import Customer
+from app.models.user import User
+
+
+@pytest.fixture
+def audited_customers(app, admin_user):
+    """Clientes inactivados y reactivados por dos usuarios distintos"""
+    seller = User(
+        full_name='Vendedor',
+        email='seller@example.com',
+        password_hash='not-a-real-hash',
+        role='Personal de Ventas'
+    )
+    db.session.add(seller)
+    db.session.flush()
+
+    for index in range(6):
+        db.session.add(Customer(
+            tipo_documento='CC',
+            numero_documento=f'AUD{index}',
+            nombre_razon_social=f'Cliente {index}',
+            tipo_contribuyente='Persona Natural',
+            correo=f'aud{index}@example.com',
+            is_active=index % 2 == 0,
+            inactivated_at=datetime.utcnow(),
+            inactivated_by=admin_user.id if index % 2 else seller.id,
+            reactivated_by=seller.id if index % 2 == 0 else None,
+        ))
+    db.session.commit()
+    db.session.expunge_all()
+
+
+class TestCustomerList:
+    """Tests de GET /api/customers"""
+
+    def test_lean_list_omits_audit_fields(self, client, auth_headers, audited_customers):
+        """Por defecto el listado no incluye campos de auditoría"""
+        response = client.get('/api/customers', headers=auth_headers)
+
+        assert response.status_code == 200
+        customer = response.get_json()['data'][0]
+        assert 'inactivated_by_name' not in customer
+        assert 'total_purchases' in customer
+
+    def test_audit_names_resolved_in_batch(self, client, auth_headers, audited_customers, query_counter):
+        """Los nombres de auditoría se resuelven sin una query por cliente"""
+        with query_counter() as counter:
+            response = client.get('/api/customers?include_audit=true', headers=auth_headers)
+
+        data = response.get_json()['data']
+        assert {c['numero_documento']: c['inactivated_by_name'] for c in data}['AUD1'] == 'Admin Test'
+        assert {c['numero_documento']: c['reactivated_by_name'] for c in data}['AUD0'] == 'Vendedor'
+        user_queries = [s for s in counter.statements if 'FROM users' in s]
+        # Una query IN por relación, independiente del número de clientes
+        assert len(user_queries) == 2
@@ -0,0 +1,129 @@
+"""
+US-CUST-007: Tests del historial de compras del cliente (CustomerOrderHistoryService)
+"""
+
+import pytest
+from decimal import Decimal
+from app import db
+from app.models.category import Category
+from app.models.customer import Customer
+from app.models.product import Product
+from app.services.order_service import OrderService
+
+
+@pytest.fixture
+def history(app, admin_user):
+    """Cliente con dos pedidos activos (dos productos) y uno cancelado"""
+    customer = Customer(
+        tipo_documento='CC',
+        numero_documento='12345',
+        nombre_razon_social='Cliente Historial',
+        tipo_contribuyente='Persona Natural',
+        correo='historial@example.com'
+    )
+    category = Category(name='General')
+    db.session.add_all([customer, category])
+    db.session.flush()
+
+    products = []
+    for index in range(2):
+        product = Product(
+            sku=f'HIS-{index:03d}',
+            name=f'Producto {index}',
+            cost_price=Decimal('50.00'),
+            sale_price=Decimal('100.00'),
+            stock_quantity=100,
+            category_id=category.id,
+            last_updated_by_id=admin_user.id
+        )
+        db.session.add(product)
+        products.append(product)
+    db.session.commit()
+    customer_id, user_id = customer.id, admin_user.id
+    first, second = [p.id for p in products]
+
+    def _order(items):
+        return OrderService.create_order({
+            'customer_id': customer_id,
+            'items': [{'product_id': pid, 'quantity': q, 'unit_price': 100} for pid, q in items],
+        }, user_id, 'Admin')
+
+    _order([(first, 2), (second, 1)])
+    _order([(first, 3)])
+    cancelled = _order([(second, 10)])
+    OrderService.cancel_order(cancelled.id, user_id)
+
+    # Forzar que el endpoint cargue todo desde la base de datos
+    db.session.expunge_all()
+    return {'customer_id': customer_id, 'create_order': _order, 'product_ids': [first, second]}
+
+
+class TestCustomerOrderHistory:
+    """Tests de GET /api/customers/<id>/orders-history"""
+
+    def test_metrics_chart_and_top_products(self, client, auth_headers, history, query_counter):
+        """Métricas excluyen cancelados, el gráfico los incluye; sin lazy loads por item"""
+        with query_counter() as counter:
+            response = client.get(
+                f"/api/customers/{history['customer_id']}/orders-history?limit=2",
+                headers=auth_headers
+            )
+        body = response.get_json()
+
+        assert response.status_code == 200
+        # Huella + resumen (CTE) + página con items y productos
+        assert counter.count <= 3
+
+        metrics = body['data']['metrics']
+        assert metrics['total_orders'] == 3
+        assert metrics['non_cancelled_count'] == 2
+        assert metrics['total_spent'] == 600.0
+        assert metrics['average_order'] == 300.0
+        assert metrics['highest_ticket'] == 300.0
+
+        assert [(c['count'], c['total']) for c in body['data']['chart_data']] == [(3, 1600.0)]
+        top = body['data']['top_products']
+        assert [(p['sku'], p['total_qty'], p['times_ordered']) for p in top] == [
+            ('HIS-000', 5, 2), ('HIS-001', 1, 1)
+        ]
+
+        assert body['pagination'] == {'page': 1, 'per_page': 2, 'total': 3, 'pages': 2}
+        assert len(body['data']['orders']) == 2
+        assert all('product_image_url' in item for order in body['data']['orders'] for item in order['items'])
+
+    def test_filters_apply_to_metrics_and_page(self, client, auth_headers, history):
+        """El filtro de estado limita métricas y página, no el top ni el gráfico"""
+        response = client.get(
+            f"/api/customers/{history['customer_id']}/orders-history?status=Cancelado",
+            headers=auth_headers
+        )
+        body = response.get_json()
+
+        assert body['data']['metrics']['total_orders'] == 1
+        assert body['data']['metrics']['non_cancelled_count'] == 0
+        assert [o['status'] for o in body['data']['orders']] == ['Cancelado']
+        assert len(body['data']['top_products']) == 2
+
+    def test_etag_returns_304_until_history_changes(self, client, auth_headers, history):
+        """Un historial sin cambios responde 304; un pedido nuevo invalida el ETag"""
+        url = f"/api/customers/{history['customer_id']}/orders-history"
+        first = client.get(url, headers=auth_headers)
+        etag = first.headers['ETag']
+
+        repeat = client.get(url, headers={**auth_headers, 'If-None-Match': etag})
+        assert repeat.status_code == 304
+        assert repeat.data == b''
+
+        other_page = client.get(f'{url}?page=2', headers={**auth_headers, 'If-None-Match': etag})
+        assert other_page.status_code == 200
+
+        history['create_order']([(history['product_ids'][0], 1)])
+
+        changed = client.get(url, headers={**auth_headers, 'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+        assert changed.get_json()['data']['metrics']['total_orders'] == 4
+
+    def test_unknown_customer_returns_404(self, client, auth_headers, app):
+        response = client.get('/api/customers/no-existe/orders-history', headers=auth_headers)
+        assert response.status_code == 404
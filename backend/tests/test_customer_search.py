@@ -0,0 +1,68 @@
+"""
+US-CUST-002: Tests para la búsqueda normalizada de clientes (CustomerSearchService)
+"""
+
+import pytest
+from app import db
+from app.models.customer import Customer
+from app.services.customer_search_service import CustomerSearchService
+
+
+@pytest.fixture
+def customers(app):
+    """Clientes con acentos, documentos con separadores y teléfonos"""
+    rows = [
+        ('CC', '1.020.304.050', 'José Núñez', 'jose.nunez@example.com', '300 123 4567'),
+        ('NIT', '900123456-7', 'Distribuciones Álamo S.A.S.', 'ventas@alamo.co', '6015550000'),
+        ('PAS', 'AB12345', 'Maria Lopez', 'maria@example.com', None),
+    ]
+    for tipo, numero, nombre, correo, telefono in rows:
+        db.session.add(Customer(
+            tipo_documento=tipo,
+            numero_documento=numero,
+            nombre_razon_social=nombre,
+            tipo_contribuyente='Persona Natural',
+            correo=correo,
+            telefono_movil=telefono
+        ))
+    db.session.commit()
+
+
+def _search(term):
+    condition = CustomerSearchService.build_filter(term)
+    return sorted(c.numero_documento for c in Customer.query.filter(condition).all())
+
+
+class TestCustomerSearch:
+    """Tests del filtro de búsqueda sobre customers.search_text"""
+
+    def test_search_text_is_normalized_on_insert(self, customers):
+        """search_text guarda nombre/correo sin acentos y documento/teléfono en dígitos"""
+        customer = Customer.query.filter_by(correo='jose.nunez@example.com').first()
+        assert 'jose nunez' in customer.search_text
+        assert '1020304050' in customer.search_text
+        assert '3001234567' in customer.search_text
+
+    def test_accent_and_case_insensitive_name(self, customers):
+        """'NUNEZ' encuentra 'José Núñez'"""
+        assert _search('NUNEZ') == ['1.020.304.050']
+
+    def test_document_and_phone_ignore_separators(self, customers):
+        """Documento y teléfono se encuentran con o sin separadores"""
+        assert _search('1020304050') == ['1.020.304.050']
+        assert _search('900.123.456') == ['900123456-7']
+        assert _search('300-123-4567') == ['1.020.304.050']
+
+    def test_email_and_alphanumeric_document(self, customers):
+        """Correo y documentos alfanuméricos (pasaporte) son buscables"""
+        assert _search('ventas@alamo') == ['900123456-7']
+        assert _search('ab123') == ['AB12345']
+
+    def test_search_text_follows_updates(self, customers):
+        """Al editar el cliente se recalcula search_text"""
+        customer = Customer.query.filter_by(correo='maria@example.com').first()
+        customer.nombre_razon_social = 'María Gómez'
+        db.session.commit()
+
+        assert _search('gomez') == ['AB12345']
+        assert _search('lopez') == []
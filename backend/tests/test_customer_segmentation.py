@@ -0,0 +1,149 @@
+"""
+US-CUST-011: Tests para el recálculo masivo de categorías de clientes
+"""
+
+import re
+from contextlib import contextmanager
+import pytest
+from app import db
+from app.models.customer import Customer
+from app.models.customer_category_history import CustomerCategoryHistory
+from app.models.customer_segmentation_config import CustomerSegmentationConfig
+from app.models.order import Order
+from app.services.customer_segmentation_service import recalculate_all_categories, get_segmentation_stats
+from app.services.customer_stats_service import CustomerStatsService
+
+
+@pytest.fixture
+def segmented_customers(app, admin_user):
+    """Clientes con gasto VIP, Frecuente, solo pedidos cancelados y sin pedidos"""
+    db.session.add(CustomerSegmentationConfig(vip_threshold=1000, frequent_threshold=500))
+
+    spends = {
+        'vip': [('Entregado', 800), ('Pendiente', 300)],
+        'frecuente': [('Entregado', 600)],
+        'cancelado': [('Cancelado', 5000)],
+        'sin_pedidos': [],
+    }
+    order_number = 0
+    for documento, orders in spends.items():
+        customer = Customer(
+            tipo_documento='CC',
+            numero_documento=documento,
+            nombre_razon_social=documento,
+            tipo_contribuyente='Persona Natural',
+            correo=f'{documento}@example.com',
+            # 'cancelado' parte como VIP y debe bajar a Regular
+            customer_category='VIP' if documento == 'cancelado' else 'Regular'
+        )
+        db.session.add(customer)
+        db.session.flush()
+        for status, total in orders:
+            order_number += 1
+            db.session.add(Order(
+                order_number=f'PED-{order_number:04d}',
+                customer_id=customer.id,
+                created_by_id=admin_user.id,
+                status=status,
+                total=total
+            ))
+    # Pedidos insertados directamente: reconstruir acumulados
+    CustomerStatsService.rebuild()
+    db.session.commit()
+
+
+def _categories():
+    return {c.numero_documento: c.customer_category for c in Customer.query.all()}
+
+
+class TestRecalculateAllCategories:
+    """Tests del recálculo por bloques con UPDATE ... FROM e INSERT ... SELECT"""
+
+    def test_assigns_categories_and_logs_only_changes(self, segmented_customers):
+        """Categorías según gasto no cancelado; historial solo para los cambios"""
+        result = recalculate_all_categories(batch_size=2)
+
+        assert result == {'updated': 4, 'changed': 3}
+        assert _categories() == {
+            'vip': 'VIP',
+            'frecuente': 'Frecuente',
+            'cancelado': 'Regular',
+            'sin_pedidos': 'Regular',
+        }
+
+        history = {
+            h.customer.numero_documento: h for h in CustomerCategoryHistory.query.all()
+        }
+        assert set(history) == {'vip', 'frecuente', 'cancelado'}
+        assert history['vip'].old_category == 'Regular'
+        assert float(history['vip'].total_spent) == 1100
+        assert history['cancelado'].new_category == 'Regular'
+        assert re.fullmatch(r'[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}',
+                            history['vip'].id)
+
+    def test_second_run_changes_nothing_and_reports_progress(self, segmented_customers):
+        """Un segundo recálculo no genera historial y reporta progreso por bloque"""
+        recalculate_all_categories()
+        progress = []
+
+        result = recalculate_all_categories(
+            progress_callback=lambda processed, total: progress.append((processed, total)),
+            batch_size=3
+        )
+
+        assert result == {'updated': 4, 'changed': 0}
+        assert CustomerCategoryHistory.query.count() == 3
+        assert progress == [(0, 4), (3, 4), (4, 4)]
+
+    def test_refused_while_another_worker_holds_the_lock(self, segmented_customers, client,
+                                                         auth_headers, monkeypatch):
+        """Con el lock tomado por otro proceso responde 409 y no escribe historial"""
+        from app.services import customer_segmentation_service
+
+        @contextmanager
+        def lock_held_elsewhere(name):
+            yield False
+
+        monkeypatch.setattr(customer_segmentation_service, 'advisory_lock', lock_held_elsewhere)
+
+        response = client.post('/api/customers/segmentation/recalculate', headers=auth_headers)
+
+        assert response.status_code == 409
+        assert response.get_json()['error']['code'] == 'RECALCULATION_IN_PROGRESS'
+        assert CustomerCategoryHistory.query.count() == 0
+
+
+class TestSegmentationStats:
+    """Tests del dashboard de segmentación sobre customer_stats"""
+
+    def test_counts_customers_not_orders_in_one_query(self, segmented_customers, query_counter):
+        """El cliente VIP con dos pedidos cuenta una sola vez; secciones en una consulta"""
+        recalculate_all_categories()
+
+        with query_counter() as counter:
+            stats = get_segmentation_stats()
+
+        # Configuración + una consulta UNION ALL para distribución, métricas y top VIP
+        assert counter.count == 2
+        assert sum('UNION ALL' in statement for statement in counter.statements) == 1
+        metrics = {m['category']: m for m in stats['metrics']}
+        assert metrics['VIP'] == {'category': 'VIP', 'count': 1, 'total_spent': 1100.0, 'avg_spent': 1100.0}
+        assert metrics['Regular']['count'] == 2
+        assert stats['total_customers'] == 4
+        assert [c['nombre_razon_social'] for c in stats['top_vip']] == ['vip']
+        assert stats['top_vip'][0]['order_count'] == 2
+
+    def test_cached_until_categories_change(self, segmented_customers, query_counter):
+        """La segunda lectura sale de caché; un recálculo con cambios la invalida"""
+        before = get_segmentation_stats()
+        with query_counter() as counter:
+            assert get_segmentation_stats() == before
+        assert counter.count == 0
+
+        recalculate_all_categories()
+
+        after = get_segmentation_stats()
+        assert after['distribution'] != before['distribution']
+        assert {d['category']: d['count'] for d in after['distribution']} == {
+            'VIP': 1, 'Frecuente': 1, 'Regular': 2
+        }
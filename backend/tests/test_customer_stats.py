@@ -0,0 +1,155 @@
+"""
+US-CUST-011: Tests de los acumulados de compra por cliente (CustomerStatsService)
+
+Los acumulados se mantienen por delta desde OrderService y ReturnService y
+deben coincidir con una reconstrucción completa desde pedidos.
+"""
+
+import pytest
+from decimal import Decimal
+from app import db
+from app.models.category import Category
+from app.models.customer import Customer
+from app.models.customer_stats import CustomerStats
+from app.models.product import Product
+from app.models.return_order import Return, ReturnItem
+from app.services.customer_stats_service import CustomerStatsService
+from app.services.order_service import OrderService
+from app.services.return_service import ReturnService
+
+
+@pytest.fixture
+def sale_setup(app, admin_user):
+    """Dos clientes y un producto con stock"""
+    customers = []
+    for documento in ('111', '222'):
+        customer = Customer(
+            tipo_documento='CC',
+            numero_documento=documento,
+            nombre_razon_social=f'Cliente {documento}',
+            tipo_contribuyente='Persona Natural',
+            correo=f'{documento}@example.com'
+        )
+        db.session.add(customer)
+        customers.append(customer)
+
+    category = Category(name='General')
+    db.session.add(category)
+    db.session.flush()
+
+    product = Product(
+        sku='STAT-001',
+        name='Producto',
+        cost_price=Decimal('50.00'),
+        sale_price=Decimal('100.00'),
+        stock_quantity=100,
+        category_id=category.id,
+        last_updated_by_id=admin_user.id
+    )
+    db.session.add(product)
+    db.session.commit()
+    return {'customers': [c.id for c in customers], 'product_id': product.id, 'user_id': admin_user.id}
+
+
+def _order_data(customer_id, product_id, quantity):
+    return {
+        'customer_id': customer_id,
+        'items': [{'product_id': product_id, 'quantity': quantity, 'unit_price': 100}],
+    }
+
+
+def _stats(customer_id):
+    stats = db.session.get(CustomerStats, customer_id)
+    db.session.refresh(stats)
+    return float(stats.total_spent), stats.order_count, stats.last_order_at
+
+
+def _assert_matches_rebuild(customer_ids):
+    """El estado por delta coincide con la reconstrucción desde pedidos"""
+    incremental = {cid: _stats(cid)[:2] for cid in customer_ids}
+    CustomerStatsService.rebuild()
+    db.session.commit()
+    assert {cid: _stats(cid)[:2] for cid in customer_ids} == incremental
+
+
+class TestCustomerStats:
+    """Tests de los deltas de customer_stats"""
+
+    def test_new_customer_starts_at_zero(self, sale_setup):
+        """Al crear un cliente se crea su fila de acumulados en cero"""
+        assert _stats(sale_setup['customers'][0]) == (0.0, 0, None)
+
+    def test_create_and_cancel_order(self, sale_setup):
+        """Crear suma total y pedido; cancelar los resta y limpia la última compra"""
+        first, _ = sale_setup['customers']
+        order = OrderService.create_order(
+            _order_data(first, sale_setup['product_id'], 3), sale_setup['user_id'], 'Admin'
+        )
+        total, count, last_order_at = _stats(first)
+        assert (total, count) == (300.0, 1)
+        assert last_order_at == order.created_at
+
+        OrderService.cancel_order(order.id, sale_setup['user_id'])
+        assert _stats(first) == (0.0, 0, None)
+        _assert_matches_rebuild(sale_setup['customers'])
+
+    def test_update_order_moves_spend_between_customers(self, sale_setup):
+        """Editar total y cliente traslada el gasto al nuevo cliente"""
+        first, second = sale_setup['customers']
+        order = OrderService.create_order(
+            _order_data(first, sale_setup['product_id'], 2), sale_setup['user_id'], 'Admin'
+        )
+
+        OrderService.update_order(
+            order.id, _order_data(second, sale_setup['product_id'], 5), sale_setup['user_id'], 'Admin'
+        )
+
+        assert _stats(first) == (0.0, 0, None)
+        assert _stats(second)[:2] == (500.0, 1)
+        _assert_matches_rebuild(sale_setup['customers'])
+
+    def test_approved_return_reduces_spend(self, sale_setup):
+        """Una devolución aprobada descuenta su monto del gasto"""
+        first, _ = sale_setup['customers']
+        order = OrderService.create_order(
+            _order_data(first, sale_setup['product_id'], 4), sale_setup['user_id'], 'Admin'
+        )
+        order.status = 'Entregado'
+        return_obj = Return(
+            return_number='DEV-0001',
+            order_id=order.id,
+            created_by_id=sale_setup['user_id'],
+            reason='Producto defectuoso',
+            total_amount=Decimal('100.00'),
+            items=[ReturnItem(
+                product_id=sale_setup['product_id'],
+                quantity=1,
+                unit_price=Decimal('100.00'),
+                subtotal=Decimal('100.00'),
+                product_name='Producto',
+                product_sku='STAT-001'
+            )]
+        )
+        db.session.add(return_obj)
+        db.session.commit()
+
+        ReturnService.update_status(return_obj.id, {'status': 'Aprobada'}, sale_setup['user_id'], 'Admin')
+
+        assert _stats(first)[:2] == (300.0, 1)
+        _assert_matches_rebuild(sale_setup['customers'])
+
+    def test_cancelled_orders_still_block_deletion(self, client, auth_headers, sale_setup):
+        """customer_stats excluye cancelados, pero el cliente sigue teniendo pedidos"""
+        first, _ = sale_setup['customers']
+        order = OrderService.create_order(
+            _order_data(first, sale_setup['product_id'], 1), sale_setup['user_id'], 'Admin'
+        )
+        OrderService.cancel_order(order.id, sale_setup['user_id'])
+
+        check = client.get(f'/api/customers/{first}/can-delete', headers=auth_headers)
+        assert check.get_json()['data']['can_delete'] is False
+        assert check.get_json()['data']['orders_count'] == 1
+
+        response = client.delete(f'/api/customers/{first}', headers=auth_headers)
+        assert response.status_code == 409
+        assert response.get_json()['error']['code'] == 'HAS_ORDERS'
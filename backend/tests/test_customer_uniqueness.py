@@ -0,0 +1,123 @@
+"""
+US-CUST-001: Tests de check-documento / check-correo con filtro de Bloom
+"""
+
+import pytest
+from datetime import datetime
+from app import db
+from app.models.customer import Customer
+from app.services.customer_uniqueness_service import _FILTER_KEY
+from app.utils.bloom_filter import BloomFilter
+
+
+def _customer(documento, correo):
+    return Customer(
+        tipo_documento='CC',
+        numero_documento=documento,
+        nombre_razon_social=f'Cliente {documento}',
+        tipo_contribuyente='Persona Natural',
+        correo=correo
+    )
+
+
+@pytest.fixture
+def registered_customer(app):
+    """Cliente con correo en mayúsculas y minúsculas"""
+    db.session.add(_customer('1001', 'Ana@Example.com'))
+    db.session.commit()
+    db.session.expunge_all()
+
+
+class TestBloomFilter:
+    """Tests del filtro de Bloom en memoria"""
+
+    def test_no_false_negatives(self):
+        """Todo valor agregado se encuentra; los ajenos rara vez dan positivo"""
+        bloom = BloomFilter(capacity=200)
+        values = [f'valor-{i}' for i in range(200)]
+        for value in values:
+            bloom.add(value)
+
+        assert all(value in bloom for value in values)
+        assert sum(f'otro-{i}' in bloom for i in range(1000)) < 50
+
+
+class TestUniquenessProbes:
+    """Tests de GET /api/customers/check-documento y /check-correo"""
+
+    def test_free_values_skip_database(self, client, auth_headers, registered_customer, query_counter):
+        """Tras cargar el filtro, un valor libre se responde sin consultar la tabla"""
+        client.get('/api/customers/check-documento?numero_documento=9999', headers=auth_headers)
+
+        with query_counter() as counter:
+            documento = client.get('/api/customers/check-documento?numero_documento=5555', headers=auth_headers)
+            correo = client.get('/api/customers/check-correo?correo=nuevo@example.com', headers=auth_headers)
+
+        assert documento.get_json()['data']['available'] is True
+        assert correo.get_json()['data']['available'] is True
+        assert not any('FROM customers' in statement for statement in counter.statements)
+
+    def test_existing_values_are_reported(self, client, auth_headers, registered_customer):
+        """El correo se compara sin distinguir mayúsculas; exclude_id lo libera"""
+        response = client.get('/api/customers/check-correo?correo=ana@EXAMPLE.com', headers=auth_headers)
+        data = response.get_json()['data']
+        assert data['available'] is False
+        assert data['existing_customer']['nombre_razon_social'] == 'Cliente 1001'
+
+        customer_id = data['existing_customer']['id']
+        response = client.get(
+            f'/api/customers/check-documento?numero_documento=1001&exclude_id={customer_id}',
+            headers=auth_headers
+        )
+        assert response.get_json()['data']['available'] is True
+
+    def test_customers_created_after_load_are_detected(self, client, auth_headers, registered_customer):
+        """Las altas de este proceso se agregan al filtro ya cargado"""
+        client.get('/api/customers/check-documento?numero_documento=9999', headers=auth_headers)
+
+        db.session.add(_customer('2002', 'luis@example.com'))
+        db.session.commit()
+
+        response = client.get('/api/customers/check-documento?numero_documento=2002', headers=auth_headers)
+        assert response.get_json()['data']['available'] is False
+
+    def test_other_process_customers_are_synced(self, app, client, auth_headers, registered_customer):
+        """Las altas que no pasan por este proceso entran con la sincronización incremental"""
+        client.get('/api/customers/check-documento?numero_documento=9999', headers=auth_headers)
+
+        # Alta fuera del ORM (como la de otro worker): no llama a register()
+        db.session.execute(Customer.__table__.insert().values(
+            id='otro-proceso', tipo_documento='CC', numero_documento='3003',
+            nombre_razon_social='Cliente 3003', tipo_contribuyente='Persona Natural',
+            correo='otro@example.com', created_at=datetime.utcnow(), updated_at=datetime.utcnow()
+        ))
+        db.session.commit()
+        app.config['CUSTOMER_UNIQUENESS_SYNC_INTERVAL'] = 0
+
+        response = client.get('/api/customers/check-correo?correo=otro@example.com', headers=auth_headers)
+        assert response.get_json()['data']['available'] is False
+
+    def test_expired_filter_rebuilds_off_request(self, app, client, auth_headers, registered_customer,
+                                                 query_counter, monkeypatch):
+        """Con el TTL vencido se sigue sirviendo el filtro y la reconstrucción va en segundo plano"""
+        from app import socketio
+
+        client.get('/api/customers/check-documento?numero_documento=9999', headers=auth_headers)
+        filters = app.extensions[_FILTER_KEY]
+        filters['built_at'] -= 10 ** 6
+        scheduled = []
+        monkeypatch.setattr(socketio, 'start_background_task', lambda *args: scheduled.append(args))
+
+        with query_counter() as counter:
+            for documento in ('5555', '6666'):
+                client.get(f'/api/customers/check-documento?numero_documento={documento}', headers=auth_headers)
+
+        assert len(scheduled) == 1
+        assert app.extensions[_FILTER_KEY] is filters
+        assert not any('count(customers.id)' in statement for statement in counter.statements)
+
+        # La tarea reemplaza el filtro por uno nuevo
+        target, *args = scheduled[0]
+        target(*args)
+        assert app.extensions[_FILTER_KEY] is not filters
+        assert app.extensions[_FILTER_KEY]['rebuilding'] is False
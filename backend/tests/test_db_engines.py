@@ -0,0 +1,77 @@
+"""
+Tests de la configuración de engines: opciones, bind de reportes y pool
+"""
+
+import logging
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from app import db
+from app.config import build_engine_options
+from app.utils.db_engines import use_reporting_engine, init_pool_monitoring, REPORTS_BIND_KEY
+
+
+class TestEngineOptions:
+    """Tests de build_engine_options"""
+
+    def test_postgres_options(self):
+        """PostgreSQL: pre-ping, pool acotado, statement_timeout y application_name"""
+        options = build_engine_options(
+            'postgresql://u:p@localhost/gestrack', 'gestrack-api',
+            statement_timeout_ms=30000, pool_size=10, max_overflow=5
+        )
+
+        assert options['pool_pre_ping'] is True
+        assert options['pool_size'] == 10
+        assert options['max_overflow'] == 5
+        assert options['connect_args'] == {
+            'application_name': 'gestrack-api',
+            'options': '-c statement_timeout=30000',
+        }
+
+    def test_other_engines_use_defaults(self):
+        """SQLite conserva las opciones por defecto de Flask-SQLAlchemy"""
+        assert build_engine_options('sqlite:///:memory:', 'x', 1000, 5, 5) == {}
+
+
+class TestReportingEngine:
+    """Tests del enrutamiento de lecturas al bind 'reports'"""
+
+    def test_decorated_reads_use_reports_bind(self, app):
+        """Dentro de la ruta decorada se usa el engine de reportes; fuera, el principal"""
+        reports_engine = create_engine('sqlite://')
+        db.engines[REPORTS_BIND_KEY] = reports_engine
+
+        @use_reporting_engine
+        def report():
+            return db.session.get_bind()
+
+        try:
+            assert report() is reports_engine
+            assert db.session.get_bind() is db.engine
+        finally:
+            db.engines.pop(REPORTS_BIND_KEY)
+            reports_engine.dispose()
+
+    def test_without_reports_bind_uses_default(self, app):
+        """Sin bind de reportes (tests, SQLite) todo va al engine principal"""
+        @use_reporting_engine
+        def report():
+            return db.session.get_bind()
+
+        assert report() is db.engine
+
+
+class TestPoolMonitoring:
+    """Tests del aviso de saturación del pool"""
+
+    def test_warns_when_pool_nearly_full(self, app, caplog):
+        """Un checkout que llena el pool deja un aviso con engine y capacidad"""
+        engine = create_engine('sqlite://', poolclass=QueuePool, pool_size=1, max_overflow=0)
+        init_pool_monitoring(app, {None: engine})
+
+        with caplog.at_level(logging.WARNING, logger='app.utils.db_engines'):
+            with engine.connect():
+                pass
+
+        assert 'engine=default en_uso=1 capacidad=1' in caplog.text
+        engine.dispose()
@@ -0,0 +1,105 @@
+"""
+US-INV-005 CA-5: Tests de rotación, días de inventario, sell-through y ABC
+"""
+
+import pytest
+from decimal import Decimal
+from app import db
+from app.models.category import Category
+from app.models.customer import Customer
+from app.models.product import Product
+from app.services.inventory_analytics_service import InventoryAnalyticsService
+from app.services.order_service import OrderService
+
+
+@pytest.fixture
+def sales_setup(app, admin_user):
+    """Tres productos a $10 con 100 unidades; se venden 60 de A y 30 de B"""
+    customer = Customer(
+        tipo_documento='CC',
+        numero_documento='700',
+        nombre_razon_social='Cliente Analítica',
+        tipo_contribuyente='Persona Natural',
+        correo='analitica@example.com'
+    )
+    category = Category(name='General')
+    db.session.add_all([customer, category])
+    db.session.flush()
+
+    ids = {}
+    for sku in ('ANA-A', 'ANA-B', 'ANA-C'):
+        product = Product(
+            sku=sku,
+            name=f'Producto {sku}',
+            cost_price=Decimal('10.00'),
+            sale_price=Decimal('20.00'),
+            stock_quantity=100,
+            category_id=category.id,
+            last_updated_by_id=admin_user.id
+        )
+        db.session.add(product)
+        db.session.flush()
+        ids[sku] = product.id
+    db.session.commit()
+
+    for sku, quantity in (('ANA-A', 60), ('ANA-B', 30)):
+        OrderService.create_order({
+            'customer_id': customer.id,
+            'items': [{'product_id': ids[sku], 'quantity': quantity, 'unit_price': 20}],
+        }, admin_user.id)
+    return ids
+
+
+class TestInventoryAnalytics:
+    """Tests del cálculo y de su exposición"""
+
+    def test_product_metrics(self, sales_setup):
+        """COGS, inventario promedio desde el rollup, rotación, DIO y sell-through"""
+        analytics = InventoryAnalyticsService.compute(window_days=365)
+        products = {p['sku']: p for p in analytics['products']}
+
+        product_a = products['ANA-A']
+        assert product_a['cogs'] == 600.0
+        assert product_a['average_inventory_value'] == 700.0   # (100 + 40) / 2 × 10
+        assert product_a['inventory_turnover'] == 0.86
+        assert product_a['days_of_inventory'] == 425.8
+        assert product_a['sell_through'] == 60.0
+        assert product_a['abc_class'] == 'A'
+
+        product_c = products['ANA-C']
+        assert product_c['inventory_turnover'] == 0.0
+        assert product_c['days_of_inventory'] is None
+        assert product_c['abc_class'] == 'C'
+
+        assert analytics['summary']['cogs'] == 900.0
+        assert analytics['summary']['sell_through'] == 30.0
+        assert analytics['categories'][0]['product_count'] == 3
+
+    def test_metrics_endpoint(self, client, auth_headers, sales_setup):
+        """/value/metrics ya no devuelve rotación ni DIO en null"""
+        response = client.get('/api/inventory/value/metrics', headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert data['inventory_turnover'] is not None
+        assert data['days_of_inventory'] is not None
+        assert sum(data['abc_counts'].values()) == 3
+
+    def test_export_includes_analytics(self, client, auth_headers, sales_setup):
+        """La exportación de inventario incluye las columnas de analítica"""
+        response = client.get('/api/inventory/export?format=csv', headers=auth_headers)
+
+        assert response.status_code == 200
+        body = response.get_data(as_text=True)
+        assert 'Clase ABC' in body.splitlines()[0]
+
+    def test_cache_hits_share_cached_objects(self, app, sales_setup):
+        """Un acierto de caché no copia la lista por producto"""
+        first = InventoryAnalyticsService.get_analytics(include_products=True)
+        second = InventoryAnalyticsService.get_analytics()
+
+        assert 'products' not in second
+        assert second['summary'] is first['summary']
+        assert InventoryAnalyticsService.get_summary()['summary'] is first['summary']
+        metrics = InventoryAnalyticsService.get_product_metrics()
+        assert all(metrics[product['product_id']] is product for product in first['products'])
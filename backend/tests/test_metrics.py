@@ -0,0 +1,103 @@
+"""
+Tests del endpoint GET /metrics y de las métricas en proceso
+"""
+
+import pytest
+from decimal import Decimal
+from app import db
+from app.models.category import Category
+from app.models.product import Product
+from app.services.stock_service import StockService, InsufficientStockError
+from app.utils.metrics import EXPORT_DURATION, Histogram, SERVICE_DURATION, STOCK_MUTATIONS
+
+
+@pytest.fixture
+def product_id(app, admin_user):
+    """Producto con 10 unidades"""
+    category = Category(name='General')
+    db.session.add(category)
+    db.session.flush()
+    product = Product(
+        sku='MET-001',
+        name='Producto Métricas',
+        cost_price=Decimal('50.00'),
+        sale_price=Decimal('100.00'),
+        stock_quantity=10,
+        category_id=category.id,
+        last_updated_by_id=admin_user.id
+    )
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+class TestHistogram:
+    """Tests del formato de exposición"""
+
+    def test_cumulative_buckets(self):
+        """Los buckets son acumulativos y terminan en +Inf"""
+        histogram = Histogram('test_duration_seconds', 'Duración de prueba', ('op',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value, op='x')
+
+        lines = histogram.collect()
+        assert 'test_duration_seconds_bucket{op="x",le="0.1"} 1' in lines
+        assert 'test_duration_seconds_bucket{op="x",le="1"} 2' in lines
+        assert 'test_duration_seconds_bucket{op="x",le="+Inf"} 3' in lines
+        assert 'test_duration_seconds_count{op="x"} 3' in lines
+
+
+class TestMetricsEndpoint:
+    """Tests de GET /metrics"""
+
+    def test_exposes_route_latency(self, app, client):
+        """La latencia se agrupa por blueprint y regla de ruta"""
+        app.config['METRICS_TOKEN'] = 'secreto'
+        client.get('/health')
+
+        response = client.get('/metrics', headers={'Authorization': 'Bearer secreto'})
+
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain')
+        body = response.get_data(as_text=True)
+        assert 'gestrack_http_request_duration_seconds_count{blueprint="",endpoint="/health",method="GET",status="200"}' in body
+        assert '# TYPE gestrack_stock_mutations_total counter' in body
+
+    def test_token_required_when_configured(self, app, client):
+        """Con METRICS_TOKEN el endpoint exige el token"""
+        app.config['METRICS_TOKEN'] = 'secreto'
+
+        assert client.get('/metrics').status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer secreto'}).status_code == 200
+
+    def test_hidden_without_token(self, app, client):
+        """Sin METRICS_TOKEN el endpoint no existe salvo METRICS_PUBLIC"""
+        assert client.get('/metrics').status_code == 404
+
+        app.config['METRICS_PUBLIC'] = True
+        assert client.get('/metrics').status_code == 200
+
+
+class TestServiceMetrics:
+    """Tests de los contadores de stock y de la latencia de StockService"""
+
+    def test_stock_update_counted_on_commit(self, admin_user, product_id):
+        """Solo cuentan los movimientos confirmados; la latencia registra el resultado"""
+        mutations = STOCK_MUTATIONS.value(movement_type='Entrada')
+        errors = SERVICE_DURATION.count(operation='stock_update', outcome='error')
+
+        StockService.update_stock(product_id, 5, admin_user.id, 'Entrada')
+        with pytest.raises(InsufficientStockError):
+            StockService.update_stock(product_id, -100, admin_user.id, 'Entrada')
+
+        assert STOCK_MUTATIONS.value(movement_type='Entrada') == mutations + 1
+        assert SERVICE_DURATION.count(operation='stock_update', outcome='error') == errors + 1
+
+    def test_exports_record_duration(self, client, auth_headers, product_id):
+        """Las exportaciones no streaming también registran su duración por formato"""
+        csv_exports = EXPORT_DURATION.count(format='csv')
+
+        client.get('/api/inventory/export?format=csv', headers=auth_headers)
+        client.get('/api/inventory/movements/export?format=csv', headers=auth_headers)
+
+        assert EXPORT_DURATION.count(format='csv') == csv_exports + 2
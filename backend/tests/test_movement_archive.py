@@ -0,0 +1,115 @@
+"""
+US-INV-003: Tests del archivo de movimientos fuera de la retención
+
+En SQLite no hay particiones: archivar es exportar el mes y borrarlo por rango.
+"""
+
+import csv
+import gzip
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from app import db
+from app.models.category import Category
+from app.models.inventory_movement import InventoryMovement
+from app.models.movement_daily_rollup import MovementDailyRollup
+from app.models.product import Product
+from app.services.movement_archive_service import MovementArchiveService
+
+
+@pytest.fixture
+def archive_setup(app, admin_user):
+    """Movimientos en enero y febrero de 2023 y uno reciente"""
+    category = Category(name='General')
+    db.session.add(category)
+    db.session.flush()
+
+    product = Product(
+        sku='ARC-001',
+        name='Producto archivado',
+        cost_price=Decimal('10.00'),
+        sale_price=Decimal('20.00'),
+        stock_quantity=15,
+        category_id=category.id,
+        last_updated_by_id=admin_user.id
+    )
+    db.session.add(product)
+    db.session.flush()
+
+    for created_at, quantity, previous in (
+        (datetime(2023, 1, 10, 9), 10, 0),
+        (datetime(2023, 1, 20, 9), -3, 10),
+        (datetime(2023, 2, 5, 9), 5, 7),
+        (datetime.utcnow(), 3, 12),
+    ):
+        db.session.add(InventoryMovement(
+            product_id=product.id,
+            user_id=admin_user.id,
+            movement_type='Entrada' if quantity > 0 else 'Salida',
+            quantity=quantity,
+            previous_stock=previous,
+            new_stock=previous + quantity,
+            created_at=created_at
+        ))
+    db.session.commit()
+    return product.id
+
+
+class TestMovementArchive:
+    """Tests de MovementArchiveService.archive"""
+
+    def test_archives_months_before_cutoff(self, archive_setup, tmp_path):
+        """Cada mes anterior al corte queda en un CSV comprimido y sale de la tabla"""
+        archived = MovementArchiveService.archive(
+            before=date(2023, 2, 15), directory=str(tmp_path), archive_format='csv'
+        )
+
+        assert archived == [{
+            'month': '2023-01',
+            'rows': 2,
+            'file': str(tmp_path / 'inventory_movements_2023_01.csv.gz'),
+        }]
+        with gzip.open(archived[0]['file'], 'rt', encoding='utf-8') as archive:
+            rows = list(csv.DictReader(archive))
+        assert [int(row['quantity']) for row in rows] == [10, -3]
+
+        # Febrero y el movimiento reciente siguen; el rollup conserva enero
+        assert InventoryMovement.query.count() == 2
+        assert MovementDailyRollup.query.filter(MovementDailyRollup.day < date(2023, 2, 1)).count() == 2
+
+    def test_nothing_to_archive(self, archive_setup, tmp_path):
+        """Sin movimientos anteriores al corte no se escribe nada"""
+        assert MovementArchiveService.archive(
+            before=date(2022, 12, 1), directory=str(tmp_path), archive_format='csv'
+        ) == []
+        assert InventoryMovement.query.count() == 4
+
+    def test_archive_command(self, runner, archive_setup, tmp_path):
+        """`flask movements archive` usa la retención configurada"""
+        result = runner.invoke(args=[
+            'movements', 'archive', '--dir', str(tmp_path), '--format', 'csv'
+        ])
+
+        assert result.exit_code == 0, result.output
+        assert '2 meses archivados' in result.output
+        assert InventoryMovement.query.count() == 1
+
+    def test_backfill_keeps_archived_rollup(self, runner, archive_setup, tmp_path):
+        """`flask rollups backfill` sin argumentos no borra el rollup de los meses archivados"""
+        MovementArchiveService.archive(before=date(2023, 2, 15), directory=str(tmp_path), archive_format='csv')
+
+        result = runner.invoke(args=['rollups', 'backfill'])
+
+        assert result.exit_code == 0, result.output
+        january = MovementDailyRollup.query.filter(MovementDailyRollup.day < date(2023, 2, 1))
+        assert sorted(row.qty_in - row.qty_out for row in january) == [-3, 10]
+        assert MovementDailyRollup.query.filter(MovementDailyRollup.day >= date(2023, 2, 1)).count() == 2
+
+        result = runner.invoke(args=['rollups', 'backfill', '--force'])
+
+        assert result.exit_code == 0, result.output
+        assert january.count() == 0
+
+    def test_ensure_partitions_is_noop_on_sqlite(self, app):
+        """Fuera de PostgreSQL no hay particiones que crear"""
+        assert MovementArchiveService.ensure_partitions() == []
@@ -0,0 +1,101 @@
+"""
+Tests de los agregados diarios de movimientos (movement_daily_rollup)
+
+El rollup se mantiene al insertar movimientos y se reconstruye con
+`flask rollups backfill`; estadísticas, dashboard y demanda lo leen.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app import db
+from app.models.category import Category
+from app.models.inventory_movement import InventoryMovement
+from app.models.movement_daily_rollup import MovementDailyRollup
+from app.models.product import Product
+from app.services.inventory_dashboard_service import InventoryDashboardService
+from app.services.inventory_movement_service import InventoryMovementService
+from app.services.stock_service import StockService
+
+
+@pytest.fixture
+def rollup_setup(app, admin_user):
+    """Dos productos con 50 unidades; uno sin movimientos"""
+    category = Category(name='General')
+    db.session.add(category)
+    db.session.flush()
+
+    product_ids = []
+    for sku in ('ROL-001', 'ROL-002'):
+        product = Product(
+            sku=sku,
+            name=f'Producto {sku}',
+            cost_price=Decimal('10.00'),
+            sale_price=Decimal('20.00'),
+            stock_quantity=50,
+            category_id=category.id,
+            last_updated_by_id=admin_user.id
+        )
+        db.session.add(product)
+        db.session.flush()
+        product_ids.append(product.id)
+    db.session.commit()
+    return {'product_ids': product_ids, 'user_id': admin_user.id}
+
+
+def _rollup_rows():
+    return sorted(
+        (row.product_id, row.day, row.movement_type, row.count, row.qty_in, row.qty_out)
+        for row in MovementDailyRollup.query.all()
+    )
+
+
+class TestMovementRollup:
+    """Tests del mantenimiento y la reconstrucción del rollup"""
+
+    def test_maintained_on_insert(self, rollup_setup):
+        """Cada movimiento suma a su producto, día y tipo"""
+        product_id, user_id = rollup_setup['product_ids'][0], rollup_setup['user_id']
+        StockService.update_stock(product_id, 10, user_id, 'Entrada')
+        StockService.update_stock(product_id, 5, user_id, 'Entrada')
+        StockService.update_stock(product_id, -7, user_id, 'Salida')
+
+        today = datetime.utcnow().date()
+        assert _rollup_rows() == sorted([
+            (product_id, today, 'Entrada', 2, 15, 0),
+            (product_id, today, 'Salida', 1, 0, 7),
+        ])
+
+    def test_backfill_command(self, runner, rollup_setup):
+        """El backfill reconstruye movimientos cargados fuera del ORM"""
+        product_id, user_id = rollup_setup['product_ids'][0], rollup_setup['user_id']
+        StockService.update_stock(product_id, -3, user_id, 'Salida')
+        old_day = datetime.utcnow() - timedelta(days=40)
+        db.session.execute(InventoryMovement.__table__.insert().values(
+            id='legacy-1', product_id=product_id, user_id=user_id, movement_type='Salida',
+            quantity=-4, previous_stock=60, new_stock=56, created_at=old_day
+        ))
+        db.session.commit()
+        expected = sorted(_rollup_rows() + [(product_id, old_day.date(), 'Salida', 1, 0, 4)])
+
+        result = runner.invoke(args=['rollups', 'backfill'])
+
+        assert result.exit_code == 0, result.output
+        assert '2 filas' in result.output
+        assert _rollup_rows() == expected
+
+    def test_statistics_read_rollup(self, rollup_setup):
+        """Estadísticas por día completo y dashboard salen del rollup"""
+        product_id, user_id = rollup_setup['product_ids'][0], rollup_setup['user_id']
+        StockService.update_stock(product_id, 10, user_id, 'Entrada')
+        StockService.update_stock(product_id, -4, user_id, 'Salida')
+        today = datetime.utcnow().date().isoformat()
+
+        statistics = InventoryMovementService.get_movement_statistics(today, today)
+        stats = InventoryDashboardService.get_additional_stats(days=30)
+
+        assert statistics['total_movements'] == 2
+        assert statistics['total_quantity'] == 14
+        assert stats['movements_total'] == 2
+        assert stats['movements_by_type']['Salida'] == {'count': 1, 'total_units': 4}
+        assert stats['inactive_products_90d'] == 1
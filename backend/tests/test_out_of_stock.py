@@ -0,0 +1,102 @@
+"""
+US-INV-007 CA-4: Tests del listado de productos sin stock (paginación por keyset)
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app import db
+from app.models.category import Category
+from app.models.inventory_alert import InventoryAlert
+from app.models.inventory_movement import InventoryMovement
+from app.models.product import Product
+
+
+@pytest.fixture
+def out_of_stock(app, admin_user):
+    """5 productos en 0 con alertas escalonadas; uno sin alerta; uno con stock"""
+    category = Category(name='General')
+    db.session.add(category)
+    db.session.flush()
+
+    base = datetime(2026, 1, 1)
+    for index in range(6):
+        product = Product(
+            sku=f'OOS-{index:03d}',
+            name=f'Producto {index}',
+            cost_price=Decimal('10.00'),
+            sale_price=Decimal('20.00'),
+            stock_quantity=0 if index < 5 else 8,
+            reorder_point=5,
+            category_id=category.id,
+            last_updated_by_id=admin_user.id
+        )
+        db.session.add(product)
+        db.session.flush()
+
+        # Dos veces en 0: solo debe mostrarse el movimiento más reciente
+        for days, reference in ((0, 'viejo'), (1, 'reciente')):
+            db.session.add(InventoryMovement(
+                product_id=product.id,
+                user_id=admin_user.id,
+                movement_type='Salida',
+                quantity=-3,
+                previous_stock=3,
+                new_stock=0,
+                reference=f'{reference}-{index}',
+                created_at=base + timedelta(days=index * 10 + days)
+            ))
+
+        if 0 < index < 5:
+            db.session.add(InventoryAlert(
+                product_id=product.id,
+                alert_type='out_of_stock',
+                current_stock=0,
+                reorder_point=5,
+                created_at=base + timedelta(days=index * 10 + 1)
+            ))
+    db.session.commit()
+    db.session.expunge_all()
+
+
+class TestOutOfStockList:
+    """Tests de GET /api/inventory/out-of-stock"""
+
+    def test_keyset_pages_cover_all_products(self, client, auth_headers, out_of_stock):
+        """Las páginas por cursor recorren todo sin repetir; sin alerta va primero"""
+        skus = []
+        references = []
+        cursor = ''
+        while cursor is not None:
+            response = client.get(
+                f'/api/inventory/out-of-stock?per_page=2&cursor={cursor}', headers=auth_headers
+            )
+            data = response.get_json()['data']
+            assert 'total' not in data['pagination']
+            skus += [p['sku'] for p in data['products']]
+            references += [p['last_movement']['reference'] for p in data['products']]
+            cursor = data['pagination']['next_cursor']
+
+        assert skus == [f'OOS-{i:03d}' for i in range(5)]
+        assert references == [f'reciente-{i}' for i in range(5)]
+
+    def test_keyset_descending(self, client, auth_headers, out_of_stock):
+        """El cursor respeta el orden descendente"""
+        first = client.get(
+            '/api/inventory/out-of-stock?per_page=3&sort_order=desc&cursor=', headers=auth_headers
+        ).get_json()['data']
+        second = client.get(
+            f"/api/inventory/out-of-stock?per_page=3&sort_order=desc&cursor={first['pagination']['next_cursor']}",
+            headers=auth_headers
+        ).get_json()['data']
+
+        assert [p['sku'] for p in first['products'] + second['products']] == \
+            [f'OOS-{i:03d}' for i in (4, 3, 2, 1, 0)]
+        assert second['pagination'] == {'per_page': 3, 'has_more': False, 'next_cursor': None}
+
+    def test_invalid_cursor(self, client, auth_headers, out_of_stock):
+        """Un cursor manipulado responde 400"""
+        response = client.get('/api/inventory/out-of-stock?cursor=no-valido', headers=auth_headers)
+
+        assert response.status_code == 400
+        assert response.get_json()['error']['code'] == 'VALIDATION_ERROR'
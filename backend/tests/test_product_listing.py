@@ -0,0 +1,105 @@
+"""
+US-PROD-002 / US-PROD-008: Tests del listado de productos (ProductListingService)
+
+Verifica que total y estadísticas salgan de un único agregado coherente
+con la página, y el modo sin conteo para scroll infinito.
+"""
+
+import pytest
+from decimal import Decimal
+from app import db
+from app.models.product import Product
+from app.models.category import Category
+
+
+@pytest.fixture
+def products(app, admin_user):
+    """5 productos: 2 normales, 2 con stock bajo y 1 sin stock (min_stock_level=10)"""
+    category = Category(name='General')
+    db.session.add(category)
+    db.session.flush()
+
+    for index, stock in enumerate([50, 20, 5, 3, 0]):
+        db.session.add(Product(
+            sku=f'LST-{index:03d}',
+            name=f'Producto {index}',
+            cost_price=Decimal('100.00'),
+            sale_price=Decimal('150.00'),
+            stock_quantity=stock,
+            min_stock_level=10,
+            reorder_point=10,
+            category_id=category.id,
+            last_updated_by_id=admin_user.id
+        ))
+    db.session.commit()
+    category_id = category.id
+    # Forzar que los endpoints carguen todo desde la base de datos
+    db.session.expunge_all()
+    return category_id
+
+
+class TestProductListing:
+    """Tests de GET /api/products y GET /api/products/low-stock"""
+
+    def test_statistics_and_pagination_share_filters(self, client, auth_headers, products):
+        """Las estadísticas respetan el filtro y la paginación usa el mismo total"""
+        response = client.get('/api/products?limit=10&stock_status=low', headers=auth_headers)
+        body = response.get_json()
+
+        assert response.status_code == 200
+        assert body['statistics'] == {'total': 2, 'normal_stock': 0, 'low_stock': 2, 'out_of_stock': 0}
+        assert body['pagination']['total'] == 2
+        assert body['pagination']['pages'] == 1
+        assert {p['sku'] for p in body['data']} == {'LST-002', 'LST-003'}
+
+    def test_without_count_uses_lookahead(self, client, auth_headers, products):
+        """with_count=false omite estadísticas y detecta la página siguiente"""
+        response = client.get('/api/products?limit=10&with_count=false', headers=auth_headers)
+        body = response.get_json()
+
+        assert response.status_code == 200
+        assert body['statistics'] is None
+        assert body['pagination']['total'] is None
+        assert body['pagination']['has_next'] is False
+        assert len(body['data']) == 5
+
+    def test_low_stock_endpoint_stats(self, client, auth_headers, products):
+        """/low-stock: productos bajo el punto de reorden, con sin-stock contado aparte"""
+        response = client.get('/api/products/low-stock?per_page=2', headers=auth_headers)
+        body = response.get_json()
+
+        assert response.status_code == 200
+        assert body['stats'] == {'total_low_stock': 3, 'out_of_stock': 1}
+        assert body['pagination']['total'] == 3
+        assert body['pagination']['pages'] == 2
+        assert body['pagination']['has_next'] is True
+        assert body['data'][0]['sku'] == 'LST-004'
+
+
+class TestProductListQueryCount:
+    """Las vistas de lista no disparan lazy loads por fila"""
+
+    def _assert_queries(self, client, auth_headers, query_counter, url, max_queries):
+        with query_counter() as counter:
+            response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        assert counter.count <= max_queries, counter.statements
+
+    def test_products_list(self, client, auth_headers, query_counter, products):
+        """Agregado de estadísticas + página (categoría y usuario en el mismo SELECT)"""
+        self._assert_queries(client, auth_headers, query_counter, '/api/products?limit=10', 2)
+
+    def test_low_stock_list(self, client, auth_headers, query_counter, products):
+        """Agregado de estadísticas + página"""
+        self._assert_queries(client, auth_headers, query_counter, '/api/products/low-stock', 2)
+
+    def test_out_of_stock_list(self, client, auth_headers, query_counter, products):
+        """Página con último movimiento en el mismo SELECT + conteo"""
+        self._assert_queries(client, auth_headers, query_counter, '/api/inventory/out-of-stock', 2)
+
+    def test_category_products_list(self, client, auth_headers, query_counter, products):
+        """Categoría + productos"""
+        self._assert_queries(
+            client, auth_headers, query_counter,
+            f'/api/inventory/by-category/{products}/products', 2
+        )
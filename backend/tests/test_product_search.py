@@ -0,0 +1,83 @@
+"""
+US-PROD-003: Tests para la búsqueda de productos (ProductSearchService)
+
+En SQLite la búsqueda usa la tabla virtual FTS5 `products_fts`,
+mantenida por triggers sobre `products`.
+"""
+
+import pytest
+from decimal import Decimal
+from app import db
+from app.models.product import Product
+from app.models.category import Category
+from app.services.product_search_service import ProductSearchService
+
+
+@pytest.fixture
+def catalog(app):
+    """Catálogo pequeño con nombres acentuados y SKUs con prefijos comunes"""
+    category = Category(name='Bebidas')
+    db.session.add(category)
+    db.session.flush()
+
+    rows = [
+        ('CAF-001', 'Café molido tradicional', 'Café colombiano de origen'),
+        ('CAF-002', 'Café en grano', None),
+        ('AZU-010', 'Azúcar morena', 'Endulzante para café'),
+        ('TE-100', 'Té verde', 'Infusión'),
+    ]
+    for sku, name, description in rows:
+        db.session.add(Product(
+            sku=sku,
+            name=name,
+            description=description,
+            cost_price=Decimal('1000.00'),
+            sale_price=Decimal('1500.00'),
+            stock_quantity=5,
+            category_id=category.id
+        ))
+    db.session.commit()
+    return category
+
+
+def _search(term):
+    return [p.sku for p in ProductSearchService.apply(Product.query, term).all()]
+
+
+class TestProductSearch:
+    """Tests de filtrado y relevancia"""
+
+    def test_normalize_term_removes_accents_and_case(self):
+        """El término se normaliza sin acentos, en minúsculas y sin espacios extra"""
+        assert ProductSearchService.normalize_term('  Café   MOLIDO ') == 'cafe molido'
+
+    def test_accent_insensitive_match(self, catalog):
+        """'cafe' encuentra 'Café' en nombre y descripción"""
+        results = _search('cafe')
+        assert set(results) == {'CAF-001', 'CAF-002', 'AZU-010'}
+
+    def test_word_prefix_match(self, catalog):
+        """Los tokens se buscan como prefijo ('azuc' -> 'Azúcar')"""
+        assert _search('azuc') == ['AZU-010']
+
+    def test_sku_prefix_ranks_first(self, catalog):
+        """Un SKU exacto o por prefijo aparece antes que coincidencias de texto"""
+        results = _search('caf-002')
+        assert results[0] == 'CAF-002'
+
+    def test_index_follows_updates_and_deletes(self, catalog):
+        """Los triggers mantienen el índice al editar y eliminar productos"""
+        product = Product.query.filter_by(sku='TE-100').first()
+        product.name = 'Té negro'
+        db.session.commit()
+
+        assert _search('negro') == ['TE-100']
+        assert _search('verde') == []
+
+        db.session.delete(product)
+        db.session.commit()
+        assert _search('negro') == []
+
+    def test_like_wildcards_are_literal(self, catalog):
+        """'%' y '_' no actúan como comodines"""
+        assert _search('%') == []
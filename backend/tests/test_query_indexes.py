@@ -0,0 +1,34 @@
+"""
+Tests de los índices de las consultas frecuentes (migración f8a9b0c1d2e3)
+
+Comprueban con EXPLAIN QUERY PLAN de SQLite que cada forma de consulta usa su
+índice; benchmark_indexes.py compara planes y latencias en PostgreSQL.
+"""
+
+import pytest
+from sqlalchemy import text
+from app import db
+
+QUERY_INDEXES = [
+    ("SELECT id FROM orders WHERE status IN ('Pendiente', 'Confirmado') ORDER BY created_at DESC",
+     'ix_orders_status_created'),
+    ("SELECT id FROM orders WHERE created_at >= '2026-01-01' ORDER BY created_at DESC",
+     'ix_orders_created_at'),
+    ("SELECT order_id, quantity FROM order_items WHERE product_id = 'p'",
+     'ix_order_items_product_order'),
+    ("SELECT id FROM payments WHERE order_id = 'o' AND is_deleted = 0",
+     'ix_payments_order_deleted'),
+    ("SELECT id FROM products WHERE is_active AND deleted_at IS NULL AND category_id = 'c' ORDER BY name",
+     'ix_products_listed_category_name'),
+    ("SELECT id FROM inventory_movements WHERE related_order_id = 'o'",
+     'ix_inventory_movements_related_order'),
+    ("SELECT id FROM inventory_movements WHERE product_id = 'p' ORDER BY created_at DESC",
+     'ix_inventory_movements_product_created'),
+]
+
+
+@pytest.mark.parametrize('sql,index_name', QUERY_INDEXES)
+def test_query_shape_uses_index(app, sql, index_name):
+    """La forma de consulta se resuelve con su índice"""
+    plan = ' '.join(str(row[-1]) for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+    assert index_name in plan
@@ -0,0 +1,67 @@
+"""
+Tests de la instrumentación SQL por request (Server-Timing, N+1, presupuesto)
+"""
+
+import pytest
+from sqlalchemy import select
+from app import db
+from app.models.customer import Customer
+from app.utils.query_instrumentation import statement_shape, track_queries
+
+
+@pytest.fixture
+def many_customers(app):
+    """Página completa de clientes"""
+    for index in range(20):
+        db.session.add(Customer(
+            tipo_documento='CC',
+            numero_documento=f'QI{index:03d}',
+            nombre_razon_social=f'Cliente {index:03d}',
+            tipo_contribuyente='Persona Natural',
+            correo=f'qi{index}@example.com'
+        ))
+    db.session.commit()
+    db.session.expunge_all()
+
+
+class TestStatementShape:
+    """Tests de la normalización de sentencias"""
+
+    def test_literals_and_in_lists_collapse(self):
+        """Literales e IN de cualquier tamaño comparten forma"""
+        assert statement_shape("SELECT * FROM t WHERE a IN (?, ?, ?) AND b = 'x' LIMIT 10") == \
+            statement_shape("SELECT *  FROM t\nWHERE a IN (?) AND b = 'y' LIMIT 20")
+
+
+class TestQueryTracking:
+    """Tests del colector y de la cabecera Server-Timing"""
+
+    def test_repeated_shapes_are_reported(self, app, many_customers):
+        """La misma sentencia con distintos parámetros cuenta como repetida"""
+        with track_queries() as stats:
+            for documento in ('QI000', 'QI001', 'QI002'):
+                db.session.execute(select(Customer.id).where(Customer.numero_documento == documento))
+
+        assert stats.count == 3
+        assert [n for _, n in stats.repeated()] == [3]
+
+    def test_server_timing_header(self, client, auth_headers, many_customers):
+        """Cada respuesta informa queries y tiempo de base de datos"""
+        response = client.get('/api/customers', headers=auth_headers)
+
+        timing = response.headers['Server-Timing']
+        assert timing.startswith('db;dur=')
+        assert 'queries"' in timing
+
+    def test_customer_list_within_budget(self, client, auth_headers, many_customers, query_budget):
+        """El listado no crece con el número de clientes (sin N+1)"""
+        with query_budget(6, max_repeats=1):
+            response = client.get('/api/customers?include_audit=true', headers=auth_headers)
+        assert response.status_code == 200
+
+    def test_budget_fails_when_exceeded(self, app, many_customers, query_budget):
+        """El helper falla listando las formas repetidas"""
+        with pytest.raises(pytest.fail.Exception, match='Presupuesto de queries excedido'):
+            with query_budget(2):
+                for customer_id in db.session.execute(select(Customer.id)).scalars().all():
+                    db.session.get(Customer, customer_id)
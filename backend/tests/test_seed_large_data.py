@@ -0,0 +1,110 @@
+"""
+Tests del generador de datos a escala y del arnés de benchmark de endpoints
+"""
+
+import pytest
+from datetime import date
+from sqlalchemy import func, select
+from app import db
+from app.models.customer import Customer
+from app.models.inventory_movement import InventoryMovement
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from benchmark_endpoints import compare, run_benchmark
+from app.services.customer_search_service import CustomerSearchService
+from seed_large_data import TABLE_COLUMNS, generate
+
+UNTIL = date(2024, 6, 30)
+
+
+# Autoría: distinta en cada base (usuario existente o creado por el generador)
+USER_COLUMNS = {'created_by_id', 'approved_by_id', 'user_id'}
+
+
+def _generate_small():
+    return generate(customers=20, orders=150, products=8, categories=2, days=90,
+                    until=UNTIL, seed=7, batch_size=40)
+
+
+def _snapshot():
+    """Filas generadas de cada tabla, sin las columnas de autoría"""
+    snapshot = {}
+    for name, columns in TABLE_COLUMNS.items():
+        table = db.metadata.tables[name]
+        selected = [table.c[column] for column in columns if column not in USER_COLUMNS]
+        snapshot[name] = db.session.execute(select(*selected).order_by(table.c.id)).all()
+    return snapshot
+
+
+@pytest.fixture
+def generated(app, admin_user):
+    """Conjunto pequeño y determinista"""
+    return _generate_small()
+
+
+class TestSeedLargeData:
+    """Tests de seed_large_data.generate"""
+
+    def test_counts_and_consistent_stock(self, generated):
+        assert generated['customers'] == 20
+        assert generated['orders'] == 150
+        assert db.session.query(func.count(Order.id)).scalar() == 150
+        assert generated['order_items'] == db.session.query(func.count(OrderItem.id)).scalar()
+
+        # El stock final de cada producto es el new_stock de su último movimiento
+        for product in Product.query.all():
+            last = InventoryMovement.query.filter_by(product_id=product.id).order_by(
+                InventoryMovement.created_at.desc(), InventoryMovement.id.desc()
+            ).first()
+            assert last.new_stock == product.stock_quantity
+            assert 0 <= product.reserved_stock
+
+    def test_same_seed_same_data(self, generated):
+        """Misma --seed y --until en una base nueva producen las mismas filas"""
+        first = _snapshot()
+
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        _generate_small()
+
+        assert _snapshot() == first
+
+    def test_customers_are_searchable(self, generated):
+        """search_text se calcula en la escritura masiva como lo haría el modelo"""
+        found = Customer.query.filter(CustomerSearchService.build_filter('cliente gen 7')).all()
+
+        assert 'Cliente GEN 7' in [customer.nombre_razon_social for customer in found]
+        for customer in Customer.query.all():
+            assert customer.search_text == customer.build_search_text()
+
+    def test_refuses_second_run(self, generated):
+        with pytest.raises(RuntimeError):
+            generate(customers=1, orders=1, products=1, categories=1, days=10, until=UNTIL, seed=7)
+
+
+class TestBenchmarkEndpoints:
+    """Tests del arnés benchmark_endpoints"""
+
+    def test_run_benchmark_records_latency_and_queries(self, client, auth_headers, generated):
+        results = run_benchmark(client, auth_headers, {
+            'products_list': '/api/products?page=1&per_page=20',
+            'orders_list': '/api/orders?page=1&per_page=20',
+        }, runs=2)
+
+        for result in results.values():
+            assert result['status'] == 200
+            assert result['queries'] > 0
+            assert result['p50_ms'] <= result['max_ms']
+
+    def test_compare_flags_slower_and_chattier_endpoints(self):
+        baseline = {'orders_list': {'p50_ms': 10.0, 'queries': 3},
+                    'products_list': {'p50_ms': 10.0, 'queries': 2}}
+        current = {'orders_list': {'p50_ms': 20.0, 'queries': 3},
+                   'products_list': {'p50_ms': 10.5, 'queries': 4}}
+
+        regressions = compare(current, baseline, threshold=0.2)
+
+        assert {(r['endpoint'], r['metric']) for r in regressions} == {
+            ('orders_list', 'p50_ms'), ('products_list', 'queries')
+        }
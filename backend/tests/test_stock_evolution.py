@@ -0,0 +1,99 @@
+"""
+US-INV-003 CA-4: Tests de la evolución de stock con agrupación por intervalos
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app import db
+from app.models.category import Category
+from app.models.inventory_movement import InventoryMovement
+from app.models.product import Product
+from app.services.inventory_movement_service import InventoryMovementService
+
+
+@pytest.fixture
+def evolution_setup(app, admin_user):
+    """Producto con 600 movimientos en 300 días (una entrada y una salida por día)"""
+    category = Category(name='General')
+    db.session.add(category)
+    db.session.flush()
+
+    product = Product(
+        sku='EVO-001',
+        name='Producto con historial',
+        cost_price=Decimal('10.00'),
+        sale_price=Decimal('20.00'),
+        stock_quantity=0,
+        category_id=category.id,
+        last_updated_by_id=admin_user.id
+    )
+    db.session.add(product)
+    db.session.flush()
+
+    start = datetime(2024, 1, 1)
+    stock = 0
+    movements = []
+    for day in range(300):
+        for hour, quantity in ((9, 10), (17, -4)):
+            movements.append(InventoryMovement(
+                product_id=product.id,
+                user_id=admin_user.id,
+                movement_type='Entrada' if quantity > 0 else 'Salida',
+                quantity=quantity,
+                previous_stock=stock,
+                new_stock=stock + quantity,
+                created_at=start + timedelta(days=day, hours=hour)
+            ))
+            stock += quantity
+    product.stock_quantity = stock
+    db.session.add_all(movements)
+    db.session.commit()
+    return {'product_id': product.id, 'final_stock': stock}
+
+
+class TestStockEvolution:
+    """Tests de get_stock_evolution"""
+
+    def test_downsampled_covers_full_range(self, evolution_setup):
+        """Con más movimientos que el límite, los puntos cubren todo el historial"""
+        evolution = InventoryMovementService.get_stock_evolution(
+            evolution_setup['product_id'], limit=100
+        )
+        points, resolution = evolution['points'], evolution['resolution']
+
+        assert resolution['downsampled'] is True
+        assert resolution['total_movements'] == 600
+        assert len(points) <= 100
+        assert resolution['points'] == len(points)
+        # 300 días en 100 intervalos: unas 3 días por punto
+        assert 2 * 86400 < resolution['bucket_seconds'] <= 3 * 86400
+
+        # El último punto es el stock actual, no el de los primeros movimientos
+        assert points[-1]['stock'] == evolution_setup['final_stock']
+        assert points[0]['date'].startswith('2024-01-')
+        assert sum(point['movements'] for point in points) == 600
+        assert sum(point['quantity'] for point in points) == evolution_setup['final_stock']
+        assert all(p['min_stock'] <= p['stock'] <= p['max_stock'] for p in points)
+
+    def test_small_range_is_not_grouped(self, evolution_setup):
+        """Si el rango tiene pocos movimientos se devuelven todos"""
+        evolution = InventoryMovementService.get_stock_evolution(
+            evolution_setup['product_id'], date_from='2024-01-01', date_to='2024-01-05'
+        )
+
+        assert evolution['resolution']['downsampled'] is False
+        assert evolution['resolution']['bucket_seconds'] is None
+        assert len(evolution['points']) == 10
+
+    def test_route_includes_resolution(self, client, auth_headers, evolution_setup):
+        """El endpoint devuelve los puntos y la resolución usada"""
+        response = client.get(
+            f"/api/inventory/movements/stock-evolution/{evolution_setup['product_id']}?limit=50",
+            headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert len(body['data']) <= 50
+        assert body['resolution']['downsampled'] is True
@@ -0,0 +1,84 @@
+"""
+Tests para el servicio de archivos subidos (/uploads)
+
+Cubre caché inmutable para nombres con hash, ETag fuerte, GET condicional,
+peticiones Range y el modo X-Accel-Redirect
+"""
+
+import pytest
+
+
+HASHED_NAME = 'products/SKU-001_0123456789abcdef.png'
+LEGACY_NAME = 'products/SKU-001_2f39200a.png'
+CONTENT = b'\x89PNG-fake-image-bytes-0123456789'
+
+
+@pytest.fixture
+def upload_client(app, tmp_path):
+    """Cliente con UPLOAD_FOLDER temporal y dos archivos de ejemplo"""
+    products_dir = tmp_path / 'products'
+    products_dir.mkdir()
+    for name in (HASHED_NAME, LEGACY_NAME):
+        (tmp_path / name).write_bytes(CONTENT)
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    return app.test_client()
+
+
+class TestUploadServing:
+    """Tests del endpoint /uploads/<path>"""
+
+    def test_hashed_file_is_immutable_with_strong_etag(self, upload_client):
+        """Archivo con hash: caché de un año, inmutable y ETag = hash"""
+        response = upload_client.get(f'/uploads/{HASHED_NAME}')
+
+        assert response.status_code == 200
+        assert response.data == CONTENT
+        assert response.cache_control.immutable
+        assert response.cache_control.max_age == 365 * 24 * 60 * 60
+        assert response.get_etag() == ('0123456789abcdef', False)
+
+    def test_legacy_file_is_not_immutable(self, upload_client):
+        """Archivo sin hash: caché corta y revalidable"""
+        response = upload_client.get(f'/uploads/{LEGACY_NAME}')
+
+        assert response.status_code == 200
+        assert not response.cache_control.immutable
+        assert response.cache_control.max_age == 3600
+
+    def test_if_none_match_returns_304(self, upload_client):
+        """GET condicional con el ETag vigente responde 304 sin cuerpo"""
+        response = upload_client.get(
+            f'/uploads/{HASHED_NAME}',
+            headers={'If-None-Match': '"0123456789abcdef"'}
+        )
+
+        assert response.status_code == 304
+        assert response.data == b''
+
+    def test_range_request_returns_partial_content(self, upload_client):
+        """Petición Range responde 206 con el fragmento solicitado"""
+        response = upload_client.get(
+            f'/uploads/{HASHED_NAME}',
+            headers={'Range': 'bytes=0-3'}
+        )
+
+        assert response.status_code == 206
+        assert response.data == CONTENT[:4]
+
+    def test_missing_file_returns_404(self, upload_client):
+        """Archivo inexistente o fuera de UPLOAD_FOLDER responde 404"""
+        assert upload_client.get('/uploads/products/nope.png').status_code == 404
+        assert upload_client.get('/uploads/../config.py').status_code == 404
+
+    def test_x_accel_mode_delegates_to_web_server(self, app, upload_client):
+        """Modo x-accel: respuesta vacía con X-Accel-Redirect y cabeceras de caché"""
+        app.config['UPLOADS_SENDFILE_MODE'] = 'x-accel'
+        app.config['UPLOADS_ACCEL_PREFIX'] = '/protected-uploads'
+
+        response = upload_client.get(f'/uploads/{HASHED_NAME}')
+
+        assert response.status_code == 200
+        assert response.data == b''
+        assert response.headers['X-Accel-Redirect'] == f'/protected-uploads/{HASHED_NAME}'
+        assert response.headers['Content-Type'] == 'image/png'
+        assert response.cache_control.immutable